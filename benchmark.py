@@ -0,0 +1,323 @@
+"""
+性能基准脚本
+在不同尺寸（0.3-100 百万像素）、颜色模式（RGB/RGBA/P/L）和内容类型的合成输入（见 corpus.py）上
+测量 image_processor 热点函数，
+输出包含耗时、编码次数和峰值内存的 JSON 结果，并可与保存的基线比较以发现性能回退
+
+用法:
+    python benchmark.py                                   # 默认尺寸 0.3/2/12 MP
+    python benchmark.py --full                            # 全部尺寸，直到 100 MP
+    python benchmark.py --filter compress --modes RGB L   # 只运行名称包含 compress 的用例
+    python benchmark.py --kinds photo screenshot texture  # 默认只用 photo 内容
+    python benchmark.py --output results.json --save-baseline baseline.json
+    python benchmark.py --baseline baseline.json          # 与基线比较，有回退时退出码为 1
+"""
+
+import argparse
+import contextlib
+import ctypes
+import ctypes.util
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import PIL
+from PIL import Image
+
+import corpus
+from src import image_processor
+
+
+# 输入尺寸（百万像素，4:3）
+DEFAULT_SIZES = (0.3, 2, 12)
+FULL_SIZES = (0.3, 2, 12, 24, 50, 100)
+
+# 输入颜色模式
+MODES = corpus.MODES
+
+# 默认输入内容类型
+DEFAULT_KINDS = ('photo',)
+
+# 压缩目标（每像素比特数）：easy 在质量搜索中即可满足，hard 需要降低分辨率
+COMPRESS_TARGETS = {
+    ('JPEG', 'easy'): 1.5,
+    ('JPEG', 'hard'): 0.05,
+    ('PNG', 'easy'): 8.0,
+    ('PNG', 'hard'): 1.0,
+}
+
+# 比较基线时视为回退的耗时增幅
+DEFAULT_THRESHOLD = 0.25
+
+# 内存采样间隔（秒）
+_MEMORY_SAMPLE_INTERVAL = 0.002
+
+
+def _rss_bytes():
+    """当前进程的常驻内存（字节），无法获取时返回None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+def _release_memory():
+    """回收垃圾并把 malloc 缓存的空闲内存还给操作系统（glibc），使下一次测量从较低的基线开始"""
+    gc.collect()
+    try:
+        ctypes.CDLL(ctypes.util.find_library('c')).malloc_trim(0)
+    except (OSError, AttributeError, TypeError):
+        pass
+
+
+@contextlib.contextmanager
+def measure_memory(result):
+    """
+    在后台线程中采样常驻内存，结束时把相对开始时的峰值增量（字节）写入 result['peak_bytes']
+
+    Pillow 的像素缓冲区不经过 Python 的内存分配器，tracemalloc 统计不到，因此采样 RSS。
+    """
+    _release_memory()
+    start = _rss_bytes()
+    if start is None:
+        result['peak_bytes'] = None
+        yield
+        return
+    peak = [start]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(_MEMORY_SAMPLE_INTERVAL):
+            peak[0] = max(peak[0], _rss_bytes())
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        peak[0] = max(peak[0], _rss_bytes())
+        result['peak_bytes'] = peak[0] - start
+
+
+@contextlib.contextmanager
+def count_encodes(counter):
+    """统计期间 Image.save 的调用次数（每次调用即一次完整编码）"""
+    original = Image.Image.save
+
+    def save(self, *args, **kwargs):
+        counter[0] += 1
+        return original(self, *args, **kwargs)
+
+    Image.Image.save = save
+    try:
+        yield
+    finally:
+        Image.Image.save = original
+
+
+def build_cases(output_dir):
+    """
+    返回全部基准用例
+
+    返回:
+        [(名称, 函数(image))] 列表
+    """
+    def compress(format, level):
+        bits = COMPRESS_TARGETS[(format, level)]
+        return lambda image: image_processor.compress_to_size(
+            image, image.width * image.height * bits / 8 / 1024, format
+        )
+
+    def save(extension):
+        path = os.path.join(output_dir, 'out' + extension)
+        return lambda image: image_processor.save_image(image, path)
+
+    return [
+        ('fit_image_to_canvas', lambda image: image_processor.fit_image_to_canvas(image, 1280, 800)),
+        ('crop_image', lambda image: image_processor.crop_image(
+            image, image.width // 4, image.height // 4, image.width * 3 // 4, image.height * 3 // 4)),
+        ('center_crop', lambda image: image_processor.center_crop(image, image.width // 2, image.height // 2)),
+        ('compress_to_size/JPEG/easy', compress('JPEG', 'easy')),
+        ('compress_to_size/JPEG/hard', compress('JPEG', 'hard')),
+        ('compress_to_size/PNG/easy', compress('PNG', 'easy')),
+        ('compress_to_size/PNG/hard', compress('PNG', 'hard')),
+        ('save_image/JPEG', save('.jpg')),
+        ('save_image/PNG', save('.png')),
+        ('resize_with_crop', lambda image: image_processor.resize_with_crop(image, 1024, 1024)),
+        ('resize_with_pad', lambda image: image_processor.resize_with_pad(image, 1024, 1024)),
+    ]
+
+
+def run_case(func, image, repeat):
+    """
+    运行一个用例 repeat 次
+
+    返回:
+        {'wall_ms', 'wall_ms_median', 'cpu_ms', 'encodes', 'peak_mb'}（编码次数和峰值内存取第一次运行）
+    """
+    walls = []
+    cpus = []
+    encodes = [0]
+    memory = {}
+    for i in range(repeat):
+        if i == 0:
+            with measure_memory(memory), count_encodes(encodes):
+                wall, cpu = _timed(func, image)
+        else:
+            wall, cpu = _timed(func, image)
+        walls.append(wall)
+        cpus.append(cpu)
+    walls.sort()
+    return {
+        'wall_ms': round(walls[0] * 1000, 3),
+        'wall_ms_median': round(walls[len(walls) // 2] * 1000, 3),
+        'cpu_ms': round(min(cpus) * 1000, 3),
+        'encodes': encodes[0],
+        'peak_mb': None if memory['peak_bytes'] is None else round(memory['peak_bytes'] / 2 ** 20, 1),
+    }
+
+
+def _timed(func, image):
+    """返回 (墙钟时间, CPU时间)，单位秒"""
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    func(image)
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, modes=MODES, name_filter=None, repeat=3, seed=0, progress=None,
+                   kinds=DEFAULT_KINDS, corpus_dir=corpus.CORPUS_DIR):
+    """
+    运行基准
+
+    参数:
+        sizes: 输入尺寸（百万像素）列表
+        modes: 颜色模式列表
+        name_filter: 只运行名称包含此字符串的用例
+        repeat: 每个用例的重复次数（耗时取最小值和中位数）
+        seed: 输入的随机种子
+        progress: 每个用例完成后的回调 progress(结果字典)
+        kinds: 输入内容类型列表（见 corpus.KINDS）
+        corpus_dir: 测试图像缓存目录（None 表示每次重新生成）
+
+    返回:
+        {'meta': {...}, 'results': [...]} 字典
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        cases = [(name, func) for name, func in build_cases(output_dir)
+                 if not name_filter or name_filter in name]
+        images = corpus.Corpus(corpus_dir, seed).images(sizes, kinds, modes)
+        for kind, megapixels, mode, image in images:
+            for name, func in cases:
+                result = {'case': f'{name}@{megapixels}MP/{mode}/{kind}', 'op': name,
+                          'megapixels': megapixels, 'mode': mode, 'kind': kind}
+                result.update(run_case(func, image, repeat))
+                results.append(result)
+                if progress:
+                    progress(result)
+            del image
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'seed': seed,
+            'corpus_version': corpus.GENERATOR_VERSION,
+        },
+        'results': results,
+    }
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    与基线比较
+
+    耗时（最小值）超过基线 (1 + threshold) 倍或编码次数增加视为回退。
+
+    参数:
+        results: run_benchmarks 的返回值
+        baseline: 之前保存的结果
+        threshold: 耗时增幅阈值
+
+    返回:
+        回退列表 [{'case', 'metric', 'baseline', 'current'}]
+    """
+    previous = {result['case']: result for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        old = previous.get(result['case'])
+        if old is None:
+            continue
+        if result['wall_ms'] > old['wall_ms'] * (1 + threshold):
+            regressions.append({'case': result['case'], 'metric': 'wall_ms',
+                                'baseline': old['wall_ms'], 'current': result['wall_ms']})
+        if result['encodes'] > old['encodes']:
+            regressions.append({'case': result['case'], 'metric': 'encodes',
+                                'baseline': old['encodes'], 'current': result['encodes']})
+    return regressions
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='image_processor 性能基准')
+    parser.add_argument('--full', action='store_true', help='运行全部尺寸（0.3-100 MP）')
+    parser.add_argument('--sizes', type=float, nargs='+', help='输入尺寸（百万像素）')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help='颜色模式')
+    parser.add_argument('--filter', help='只运行名称包含此字符串的用例')
+    parser.add_argument('--repeat', type=int, default=3, help='每个用例的重复次数')
+    parser.add_argument('--kinds', nargs='+', choices=corpus.KINDS, default=list(DEFAULT_KINDS), help='输入内容类型')
+    parser.add_argument('--seed', type=int, default=0, help='输入的随机种子')
+    parser.add_argument('--corpus-dir', default=corpus.CORPUS_DIR, help='测试图像缓存目录')
+    parser.add_argument('--output', help='结果JSON文件')
+    parser.add_argument('--baseline', help='与此基线JSON比较，有回退时退出码为 1')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='耗时回退阈值（默认 0.25）')
+    parser.add_argument('--save-baseline', help='把本次结果保存为基线')
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (FULL_SIZES if args.full else DEFAULT_SIZES)
+
+    def report(result):
+        peak = '-' if result['peak_mb'] is None else f"{result['peak_mb']:.1f}"
+        print(f"{result['case']:<50} {result['wall_ms']:>10.1f} ms  "
+              f"{result['encodes']:>3} 次编码  峰值 {peak} MB", file=sys.stderr)
+
+    results = run_benchmarks(sizes, args.modes, args.filter, args.repeat, args.seed, report,
+                             args.kinds, args.corpus_dir)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"✗ {regression['case']}: {regression['metric']} "
+                  f"{regression['baseline']} -> {regression['current']}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("✓ 未发现性能回退", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+合成测试图像库
+按随机种子确定性地生成接近真实内容的测试图像，供基准和回归测试使用，不必在仓库中保存二进制素材
+
+纯色图像压缩后几乎为零，无法反映 compress_to_size 等函数的真实行为。这里生成四类内容:
+    photo       照片：多尺度平滑渐变 + 硬边缘的形状 + 颗粒噪声
+    screenshot  截图：平坦的界面色块和大量文字
+    graphic     图形：透明背景上的平坦色块（带半透明）
+    texture     纹理：高频条纹叠加噪声（最难压缩）
+
+生成的图像以 PNG 缓存在磁盘上（默认工作目录下的 .corpus），文件名包含种子、尺寸、模式和生成器版本。
+
+用法:
+    python corpus.py --sizes 0.3 2 12 --kinds photo screenshot   # 预先生成
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+
+# 内容类型
+KINDS = ('photo', 'screenshot', 'graphic', 'texture')
+
+# 各内容类型的自然颜色模式
+NATURAL_MODES = {'photo': 'RGB', 'screenshot': 'RGB', 'graphic': 'RGBA', 'texture': 'L'}
+
+# 支持的颜色模式
+MODES = ('RGB', 'RGBA', 'P', 'L')
+
+# 默认缓存目录（与语言配置一样位于工作目录）
+CORPUS_DIR = '.corpus'
+
+# 生成算法版本，修改生成逻辑时递增，使旧缓存失效
+GENERATOR_VERSION = 1
+
+# 逐块处理的行数（限制大图生成时的临时内存）
+_CHUNK_ROWS = 512
+
+
+def image_size(megapixels, aspect=4 / 3):
+    """按百万像素数和宽高比计算 (宽, 高)"""
+    width = max(1, int(round((megapixels * 1e6 * aspect) ** 0.5)))
+    return width, max(1, int(round(width / aspect)))
+
+
+def _smooth_field(rng, size, cell, channels=3):
+    """低分辨率随机场放大得到的平滑渐变（uint8）"""
+    width, height = size
+    small = rng.integers(0, 256, (height // cell + 2, width // cell + 2, channels), dtype=np.uint8)
+    image = Image.fromarray(small if channels > 1 else small[:, :, 0])
+    # 放大后再模糊，消除插值留下的网格痕迹
+    return image.resize(size, Image.BICUBIC).filter(ImageFilter.BoxBlur(cell // 2))
+
+
+def _add_noise(image, rng, amplitude):
+    """逐块叠加均匀噪声（避免为整幅大图分配 int16 临时数组）"""
+    array = np.array(image)
+    for top in range(0, array.shape[0], _CHUNK_ROWS):
+        block = array[top:top + _CHUNK_ROWS].astype(np.int16)
+        block += rng.integers(-amplitude, amplitude + 1, block.shape, dtype=np.int16)
+        array[top:top + _CHUNK_ROWS] = np.clip(block, 0, 255)
+    return Image.fromarray(array, image.mode)
+
+
+def _random_color(rng, alpha=None):
+    color = tuple(int(v) for v in rng.integers(0, 256, 3))
+    return color + (alpha,) if alpha is not None else color
+
+
+def _draw_shapes(draw, rng, size, count, alpha_range=None):
+    """绘制随机的矩形、椭圆和多边形"""
+    width, height = size
+    for _ in range(count):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        w = int(rng.integers(width // 40 + 1, width // 4 + 2))
+        h = int(rng.integers(height // 40 + 1, height // 4 + 2))
+        alpha = int(rng.integers(*alpha_range)) if alpha_range else None
+        fill = _random_color(rng, alpha)
+        shape = rng.integers(0, 3)
+        if shape == 0:
+            draw.rectangle((x, y, x + w, y + h), fill=fill)
+        elif shape == 1:
+            draw.ellipse((x, y, x + w, y + h), fill=fill)
+        else:
+            points = [(x + int(rng.integers(-w, w + 1)), y + int(rng.integers(-h, h + 1))) for _ in range(5)]
+            draw.polygon(points, fill=fill)
+
+
+def _photo(rng, size):
+    image = Image.blend(_smooth_field(rng, size, 256), _smooth_field(rng, size, 24), 0.3)
+    _draw_shapes(ImageDraw.Draw(image), rng, size, 12)
+    # 轻微模糊让形状边缘接近镜头成像，再叠加传感器颗粒
+    image = image.filter(ImageFilter.GaussianBlur(max(0.6, min(size) / 2000)))
+    return _add_noise(image, rng, 8)
+
+
+def _screenshot(rng, size):
+    width, height = size
+    image = Image.new('RGB', size, (240, 240, 243))
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz      '))
+
+    # 标题栏、侧栏和内容面板
+    draw.rectangle((0, 0, width, max(8, height // 20)), fill=_random_color(rng))
+    sidebar = width // 5
+    draw.rectangle((0, max(8, height // 20), sidebar, height), fill=(225, 228, 232))
+    for _ in range(6):
+        x = int(rng.integers(sidebar, width - 10))
+        y = int(rng.integers(height // 20, height - 10))
+        draw.rectangle((x, y, x + int(rng.integers(40, width // 3 + 41)), y + int(rng.integers(20, height // 6 + 21))),
+                       fill=(255, 255, 255), outline=(200, 200, 205))
+
+    # 文字行
+    line_height = 14
+    chars_per_line = max(1, (width - sidebar) // 7)
+    for y in range(height // 20 + 6, height - line_height, line_height):
+        length = int(rng.integers(chars_per_line // 3, chars_per_line + 1))
+        text = ''.join(rng.choice(letters, length))
+        color = (30, 30, 30) if rng.random() < 0.85 else (20, 90, 200)
+        draw.text((sidebar + 8, y), text, fill=color, font=font)
+        if rng.random() < 0.3:
+            draw.text((6, y), ''.join(rng.choice(letters, max(1, sidebar // 8))), fill=(70, 70, 80), font=font)
+    return image
+
+
+def _graphic(rng, size):
+    image = Image.new('RGBA', size, (0, 0, 0, 0))
+    _draw_shapes(ImageDraw.Draw(image), rng, size, 24, alpha_range=(96, 256))
+    return image
+
+
+def _texture(rng, size):
+    width, height = size
+    array = np.empty((height, width), dtype=np.uint8)
+    x = np.arange(width, dtype=np.float32)[None, :]
+    fx, fy, phase = (float(v) for v in rng.uniform(0.5, 1.5, 3))
+    for top in range(0, height, _CHUNK_ROWS):
+        y = np.arange(top, min(top + _CHUNK_ROWS, height), dtype=np.float32)[:, None]
+        block = 128 + 70 * np.sin(x * fx + phase) * np.sin(y * fy) + 40 * np.sin((x + y) * 0.37)
+        block += rng.normal(0, 20, block.shape).astype(np.float32)
+        array[top:top + len(y)] = np.clip(block, 0, 255)
+    return Image.fromarray(array, 'L')
+
+
+_GENERATORS = {'photo': _photo, 'screenshot': _screenshot, 'graphic': _graphic, 'texture': _texture}
+
+
+def convert_mode(image, mode):
+    """
+    转换到指定颜色模式
+
+    RGB 转 RGBA 时加一个径向渐隐的透明通道，使透明度真实存在；
+    透明图像转 RGB/L 时合成到白色背景；P 使用 256 色量化（透明图像保留透明色）。
+    """
+    if image.mode == mode:
+        return image
+    if mode == 'RGBA':
+        rgba = image.convert('RGBA')
+        if image.mode != 'RGBA':
+            width, height = image.size
+            y = np.linspace(-1, 1, height, dtype=np.float32)[:, None]
+            x = np.linspace(-1, 1, width, dtype=np.float32)[None, :]
+            alpha = np.clip(255 * (1.6 - 1.2 * np.hypot(x, y)), 0, 255).astype(np.uint8)
+            rgba.putalpha(Image.fromarray(alpha, 'L'))
+        return rgba
+    if image.mode == 'RGBA' and mode in ('RGB', 'L'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background.convert(mode)
+    if mode == 'P':
+        if image.mode == 'RGBA':
+            return image.quantize(256, method=Image.Quantize.FASTOCTREE)
+        return image.convert('RGB').quantize(256)
+    return image.convert(mode)
+
+
+def generate(kind, megapixels, mode=None, seed=0):
+    """
+    生成一张测试图像（不使用缓存）
+
+    参数:
+        kind: 内容类型，见 KINDS
+        megapixels: 百万像素数（宽高比 4:3）
+        mode: 颜色模式（默认为该内容类型的自然模式）
+        seed: 随机种子；相同参数总是生成相同的像素
+
+    返回:
+        PIL.Image对象
+    """
+    if kind not in _GENERATORS:
+        raise ValueError(f"未知的内容类型: {kind}")
+    # 每种内容和尺寸使用独立的随机序列，增加新类型不影响已有图像
+    rng = np.random.default_rng([seed, KINDS.index(kind), int(megapixels * 1000)])
+    image = _GENERATORS[kind](rng, image_size(megapixels))
+    return convert_mode(image, mode or NATURAL_MODES[kind])
+
+
+class Corpus:
+    """按种子缓存在磁盘上的测试图像库"""
+
+    def __init__(self, cache_dir=CORPUS_DIR, seed=0):
+        """
+        参数:
+            cache_dir: 缓存目录（None 表示不缓存）
+            seed: 随机种子
+        """
+        self.cache_dir = cache_dir
+        self.seed = seed
+
+    def path(self, kind, megapixels, mode):
+        """缓存文件路径"""
+        width, height = image_size(megapixels)
+        name = f'v{GENERATOR_VERSION}-seed{self.seed}-{kind}-{width}x{height}-{mode}.png'
+        return os.path.join(self.cache_dir, name)
+
+    def get(self, kind, megapixels, mode=None):
+        """
+        返回测试图像，已缓存时直接读取，否则生成并写入缓存
+
+        参数:
+            kind: 内容类型
+            megapixels: 百万像素数
+            mode: 颜色模式（默认为自然模式）
+
+        返回:
+            已加载的PIL.Image对象
+        """
+        mode = mode or NATURAL_MODES[kind]
+        if self.cache_dir is None:
+            return generate(kind, megapixels, mode, self.seed)
+        path = self.path(kind, megapixels, mode)
+        if os.path.exists(path):
+            with Image.open(path) as image:
+                image.load()
+                return image
+        image = generate(kind, megapixels, mode, self.seed)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # 先写临时文件再重命名，并行运行的进程不会读到写了一半的缓存
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        image.save(temp_path, 'PNG', compress_level=1)
+        os.replace(temp_path, path)
+        return image
+
+    def images(self, sizes, kinds=KINDS, modes=None):
+        """
+        按尺寸、内容类型和模式遍历图像
+
+        参数:
+            sizes: 百万像素数列表
+            kinds: 内容类型列表
+            modes: 颜色模式列表（None 表示每种内容只用自然模式）
+
+        返回:
+            生成器，产出 (内容类型, 百万像素数, 模式, PIL.Image对象)
+        """
+        for megapixels in sizes:
+            for kind in kinds:
+                for mode in modes or (NATURAL_MODES[kind],):
+                    yield kind, megapixels, mode, self.get(kind, megapixels, mode)
+
+
+def main(argv=None):
+    """命令行入口：预先生成并缓存测试图像"""
+    parser = argparse.ArgumentParser(description='生成合成测试图像库')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[0.3, 2, 12], help='百万像素数')
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS), help='内容类型')
+    parser.add_argument('--modes', nargs='+', choices=MODES, help='颜色模式（默认为各内容类型的自然模式）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--cache-dir', default=CORPUS_DIR, help='缓存目录')
+    args = parser.parse_args(argv)
+
+    corpus = Corpus(args.cache_dir, args.seed)
+    for kind, megapixels, mode, image in corpus.images(args.sizes, args.kinds, args.modes):
+        print(f"{corpus.path(kind, megapixels, mode)}  {image.width}x{image.height} {image.mode}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
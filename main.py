@@ -2,16 +2,22 @@
 图像处理桌面应用 - 主入口文件
 """
 
+import multiprocessing
 import tkinter as tk
+from src import instrumentation
 from src.app import ImageProcessorApp
 
 
 def main():
     """应用程序主入口"""
+    # IMAGE_TOOL_INSTRUMENT=1 时在状态栏显示每次操作的耗时（见 src/instrumentation.py）
+    instrumentation.enable_from_env()
     root = tk.Tk()
     app = ImageProcessorApp(root)
     root.mainloop()
 
 
 if __name__ == "__main__":
+    # 打包为 EXE 后，缩略图生成等进程池的子进程需要从这里启动
+    multiprocessing.freeze_support()
     main()
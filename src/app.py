@@ -8,29 +8,55 @@ from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
 import os
 
-from . import image_processor
+from . import image_processor, instrumentation
 from .crop_tool import CropTool
+from .executor import TaskExecutor
+from .folder_browser import FolderBrowser, list_images
+from .image_cache import ImageCache, DEFAULT_BUDGET_MB
+from .source_image import open_source, KEEP_BYTES
+from .thumbnail_store import ThumbnailStore
 from .ui_components import (
     PixelInfoPanel,
     CenterCropPanel,
     CompressPanel,
     ActionPanel,
-    ResizePanel
+    ResizePanel,
+    ThumbnailGrid
 )
 from .language import get_text, set_language, get_current_language
 
 
+# 浏览文件夹时在一张图像上停留多久（毫秒）后才加载完整图像
+BROWSE_SETTLE_MS = 300
+
+# 开启性能记录时状态栏摘要的刷新间隔（毫秒）
+METRICS_REFRESH_MS = 500
+
+# 记录性能的操作处理函数（见 instrumentation）
+INSTRUMENTED_HANDLERS = (
+    'open_image', 'load_file', 'browse', 'show_folder_view', 'display_image_on_canvas',
+    'zoom_in', 'zoom_out', 'zoom_reset', 'on_center_crop', 'on_auto_trim', 'apply_interactive_crop',
+    'on_compress', 'on_resize', 'save_image', 'show_preview', 'reset_image',
+)
+
+
 class ImageProcessorApp:
     """图像处理应用主窗口类"""
 
-    def __init__(self, root):
+    def __init__(self, root, keep_original=KEEP_BYTES, cache_mb=DEFAULT_BUDGET_MB):
         """
         初始化应用
 
         参数:
             root: tkinter根窗口
+            keep_original: 原图保留方式（见 source_image.KEEP_MODES），
+                           默认只保留编码字节和预览代理图，重置时重新解码
+            cache_mb: 最近打开图像的缓存预算（MB），为 0 时不缓存；只缓存已切换离开的图像，
+                      正在编辑的图像不占用缓存
         """
         self.root = root
+        self.keep_original = keep_original
+        self.image_cache = ImageCache(cache_mb)  # 最近切换离开的图像（含显示金字塔），重新打开时不必再解码
         self.root.title(get_text('app_title'))
         self.root.geometry("1200x700")
 
@@ -43,7 +69,7 @@ class ImageProcessorApp:
             pass  # 如果图标加载失败，继续运行
 
         # 图像数据
-        self.original_image = None  # 原始图像
+        self.source = None          # 原始图像（SourceImage，用于预览对比和重置）
         self.current_image = None   # 当前处理后的图像
         self.display_image = None   # 显示在Canvas上的图像
         self.photo_image = None     # PhotoImage对象（用于Canvas显示）
@@ -60,6 +86,16 @@ class ImageProcessorApp:
         # 中心点
         self.center_point = None   # (x, y) 原图坐标
 
+        # 后台任务
+        self.executor = TaskExecutor(self.root)
+        self.current_task = None   # 当前正在执行的后台任务
+
+        # 文件夹浏览
+        self.browser = None        # 当前图像所在目录的浏览器（FolderBrowser）
+        self.browse_job = None     # 延迟加载完整图像的 after 任务
+        self.thumbnail_store = None     # 缩略图存储（第一次打开文件夹视图时创建）
+        self.thumbnail_executor = TaskExecutor(self.root)   # 缩略图生成与图像编辑互不阻塞
+
         # 创建UI
         self.create_menu()
         self.create_ui()
@@ -73,6 +109,11 @@ class ImageProcessorApp:
         # 状态栏
         self.update_status(get_text('status_ready'))
 
+        # 性能记录（默认关闭，见 instrumentation.enable_from_env）
+        self.metrics_sink = None
+        if instrumentation.is_enabled():
+            self.start_metrics()
+
     def create_menu(self):
         """创建菜单栏"""
         menubar = tk.Menu(self.root)
@@ -84,6 +125,10 @@ class ImageProcessorApp:
         file_menu.add_command(label=get_text('menu_open'), command=self.open_image, accelerator="Ctrl+O")
         file_menu.add_command(label=get_text('menu_save'), command=self.save_image, accelerator="Ctrl+S")
         file_menu.add_separator()
+        file_menu.add_command(label=get_text('menu_next_image'), command=lambda: self.browse(1), accelerator="PgDn")
+        file_menu.add_command(label=get_text('menu_prev_image'), command=lambda: self.browse(-1), accelerator="PgUp")
+        file_menu.add_command(label=get_text('menu_folder_view'), command=self.show_folder_view, accelerator="Ctrl+G")
+        file_menu.add_separator()
         file_menu.add_command(label=get_text('menu_exit'), command=self.root.quit)
 
         # 编辑菜单
@@ -91,6 +136,7 @@ class ImageProcessorApp:
         menubar.add_cascade(label=get_text('menu_edit'), menu=edit_menu)
         edit_menu.add_command(label=get_text('menu_reset'), command=self.reset_image)
         edit_menu.add_command(label=get_text('menu_clear_crop'), command=self.clear_crop)
+        edit_menu.add_command(label=get_text('menu_auto_trim'), command=self.on_auto_trim)
 
         # 语言菜单
         language_menu = tk.Menu(menubar, tearoff=0)
@@ -107,6 +153,10 @@ class ImageProcessorApp:
         # 绑定快捷键
         self.root.bind('<Control-o>', lambda e: self.open_image())
         self.root.bind('<Control-s>', lambda e: self.save_image())
+        self.root.bind('<Escape>', lambda e: self.cancel_task())
+        self.root.bind('<Next>', lambda e: self.browse(1))
+        self.root.bind('<Prior>', lambda e: self.browse(-1))
+        self.root.bind('<Control-g>', lambda e: self.show_folder_view())
 
     def create_ui(self):
         """创建用户界面"""
@@ -207,7 +257,10 @@ class ImageProcessorApp:
         self.center_crop_panel.frame.pack(fill='x', pady=5)
 
         # 3. 压缩面板
-        self.compress_panel = CompressPanel(scrollable_frame, self.on_compress)
+        self.compress_panel = CompressPanel(
+            scrollable_frame, self.on_compress,
+            on_abort_callback=self.cancel_task, on_accept_callback=self.accept_task
+        )
         self.compress_panel.frame.pack(fill='x', pady=5)
 
         # 4. 尺寸调整面板
@@ -215,7 +268,7 @@ class ImageProcessorApp:
         self.resize_panel.frame.pack(fill='x', pady=5)
 
         # 5. 操作按钮面板
-        self.action_panel = ActionPanel(scrollable_frame, self.save_image, self.show_preview)
+        self.action_panel = ActionPanel(scrollable_frame, self.save_image, self.show_preview, self.cancel_task)
         self.action_panel.frame.pack(fill='x', pady=5)
 
         # 递归绑定鼠标滚轮到所有面板（确保所有控件都支持滚动）
@@ -331,31 +384,176 @@ class ImageProcessorApp:
         )
 
         if file_path:
-            try:
-                # 加载图像
-                self.original_image = image_processor.load_image(file_path)
-                self.current_image = self.original_image.copy()
+            self.load_file(file_path)
 
-                # 重置缩放级别
-                self.zoom_level = 1.0
-                self.manual_zoom = False
+    def load_file(self, file_path):
+        """在后台加载图片文件"""
+        if not self.check_idle():
+            return
 
-                # 显示图像
-                self.display_image_on_canvas()
+        def load(cancel_token):
+            source, image = open_source(file_path, self.keep_original, cache=self.image_cache)
+            if cancel_token.cancelled:
+                source.close()
+                cancel_token.raise_if_cancelled()
+            return source, image
 
-                # 清除裁剪框和中心点
-                self.crop_tool.clear()
-                self.crop_tool.clear_center_point()
-                self.center_point = None
-                self.pixel_info_panel.clear()
-                self.compress_panel.clear_result()
+        def on_loaded(result):
+            # 处理函数总是返回新图像，当前图像在第一次修改前就是解码得到的原图
+            if self.source is not None:
+                self.source.close()
+            self.source, self.current_image = result
+
+            # 重置缩放级别
+            self.zoom_level = 1.0
+            self.manual_zoom = False
+
+            # 显示图像
+            self.display_image_on_canvas()
+
+            # 清除裁剪框和中心点
+            self.crop_tool.clear()
+            self.crop_tool.clear_center_point()
+            self.center_point = None
+            self.pixel_info_panel.clear()
+            self.compress_panel.clear_result()
+
+            # 定位文件夹浏览器（换了目录时重新创建）
+            if self.browser is not None and self.browser.contains(file_path):
+                self.browser.select(file_path)
+            else:
+                if self.browser is not None:
+                    self.browser.close()
+                self.browser = FolderBrowser.for_file(file_path)
+
+            # 更新状态
+            width, height = self.source.size
+            self.update_status(get_text('status_loaded', filename=os.path.basename(file_path), width=width, height=height))
+
+        def on_error(e):
+            messagebox.showerror(get_text('error'), get_text('error_open_image', error=str(e)))
+
+        self.update_status(get_text('status_loading', filename=os.path.basename(file_path)))
+        self.run_task('open', load, on_loaded, on_error)
+
+    def browse(self, offset):
+        """
+        在当前目录中前后切换图像
+
+        立即显示预读好的预览图，在一张图像上停留 BROWSE_SETTLE_MS 毫秒后才在后台加载完整图像，
+        快速翻页时不会为中间经过的每张图像都做完整解码。
+
+        参数:
+            offset: 移动的文件数（负数向前）
+        """
+        if self.browser is None:
+            return
+        if self.executor.busy:
+            # 只有还在加载的图像可以被跳过，其他操作需要先完成或取消
+            if self.current_task is None or self.current_task.name != 'open':
+                self.update_status(get_text('status_busy'))
+                return
+            self.current_task.cancel()
+
+        file_path = self.browser.move(offset)
+        if file_path is None:
+            return
+        try:
+            preview, (width, height) = self.browser.preview(file_path)
+        except Exception as e:
+            self.update_status(get_text('error_open_image', error=str(e)))
+            return
+
+        # 完整图像加载前只显示预览，不能编辑
+        if self.source is not None:
+            self.source.close()
+        self.source = None
+        self.current_image = None
+        self.crop_tool.clear()
+        self.crop_tool.clear_center_point()
+        self.center_point = None
+        self.pixel_info_panel.clear()
+        self.compress_panel.clear_result()
+        self.display_preview_image(preview, width)
+        self.update_status(get_text(
+            'status_browsing', filename=os.path.basename(file_path),
+            index=self.browser.index + 1, total=len(self.browser), width=width, height=height
+        ))
+
+        if self.browse_job is not None:
+            self.root.after_cancel(self.browse_job)
+        self.browse_job = self.root.after(BROWSE_SETTLE_MS, lambda: self.load_browsed(file_path))
+
+    def load_browsed(self, file_path):
+        """停留足够久后加载浏览到的完整图像（被取消的加载尚未结束时稍后重试）"""
+        self.browse_job = None
+        if self.executor.busy:
+            self.browse_job = self.root.after(50, lambda: self.load_browsed(file_path))
+            return
+        self.load_file(file_path)
+
+    def show_folder_view(self):
+        """
+        显示当前图像所在文件夹的缩略图网格
+
+        缩略图从 SQLite 存储中读取，缺失或过期的在后台用进程池生成，生成一张显示一张。
+        """
+        if self.browser is not None:
+            directory = self.browser.directory
+        else:
+            directory = filedialog.askdirectory()
+            if not directory:
+                return
+        paths = list_images(directory)
+        if self.thumbnail_store is None:
+            self.thumbnail_store = ThumbnailStore()
+
+        grid = ThumbnailGrid(self.root, directory, on_select_callback=self.load_file)
+        grid.set_paths(paths)
+
+        def on_result(path, result):
+            if result is not None:
+                grid.set_thumbnail(path, result[2])
+
+        def populate(cancel_token):
+            return self.thumbnail_store.populate(
+                paths, on_result=self.thumbnail_executor.main_thread_callback(on_result),
+                cancel_token=cancel_token
+            )
+
+        def on_done(counts):
+            self.update_status(get_text('status_thumbnails', **counts))
 
-                # 更新状态
-                width, height = self.original_image.size
-                self.update_status(get_text('status_loaded', filename=os.path.basename(file_path), width=width, height=height))
+        def on_error(e):
+            messagebox.showerror(get_text('error'), str(e))
 
-            except Exception as e:
-                messagebox.showerror(get_text('error'), get_text('error_open_image', error=str(e)))
+        task = self.thumbnail_executor.submit('thumbnails', populate, on_success=on_done, on_error=on_error)
+        grid.on_close_callback = task.cancel
+
+    def display_preview_image(self, preview, original_width):
+        """
+        在Canvas上显示预览图
+
+        参数:
+            preview: 预览图
+            original_width: 原图宽度（缩放比例相对原图计算，像素信息仍按原图坐标显示）
+        """
+        self.canvas.update()
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+        resized_image, _, self.display_width, self.display_height = \
+            image_processor.fit_image_to_canvas(preview, canvas_width, canvas_height)
+        self.scale = self.display_width / original_width
+        self.offset_x = (canvas_width - self.display_width) // 2
+        self.offset_y = (canvas_height - self.display_height) // 2
+        self.canvas.config(scrollregion=(0, 0, canvas_width, canvas_height))
+
+        self.photo_image = ImageTk.PhotoImage(resized_image)
+        self.canvas.delete("all")
+        self.canvas.create_image(
+            self.offset_x, self.offset_y,
+            image=self.photo_image, anchor='nw', tags='image'
+        )
 
     def display_image_on_canvas(self):
         """在Canvas上显示图像"""
@@ -367,13 +565,17 @@ class ImageProcessorApp:
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
 
+        # 当前图像尚未编辑时，从原图的显示金字塔中最接近的层级缩放
+        entry = self.source.entry_for(self.current_image) if self.source is not None else None
+        pyramid = entry.pyramid if entry is not None else None
+
         if self.manual_zoom:
             # 手动缩放模式：根据 zoom_level 缩放
             img_width, img_height = self.current_image.size
 
             # 首先计算适配Canvas的基础缩放
             base_resized, base_scale, _, _ = \
-                image_processor.fit_image_to_canvas(self.current_image, canvas_width, canvas_height)
+                image_processor.fit_image_to_canvas(self.current_image, canvas_width, canvas_height, pyramid)
 
             # 应用手动缩放级别
             self.scale = base_scale * self.zoom_level
@@ -381,7 +583,8 @@ class ImageProcessorApp:
             self.display_height = int(img_height * self.scale)
 
             # 缩放图像
-            resized_image = self.current_image.resize(
+            source = pyramid.level_for(self.scale, self.scale) if pyramid is not None else self.current_image
+            resized_image = source.resize(
                 (self.display_width, self.display_height),
                 Image.LANCZOS
             )
@@ -418,7 +621,7 @@ class ImageProcessorApp:
         else:
             # 自动适配模式：缩放图像以适配Canvas
             resized_image, self.scale, self.display_width, self.display_height = \
-                image_processor.fit_image_to_canvas(self.current_image, canvas_width, canvas_height)
+                image_processor.fit_image_to_canvas(self.current_image, canvas_width, canvas_height, pyramid)
 
             # 计算居中显示的偏移量
             self.offset_x = (canvas_width - self.display_width) // 2
@@ -468,24 +671,38 @@ class ImageProcessorApp:
             self.center_crop_panel.set_center_point(real_x, real_y)
             self.update_status(get_text('status_center_set', x=real_x, y=real_y))
 
-    def on_center_crop(self, width, height, center_x, center_y):
-        """执行中心点切割"""
+    def on_center_crop(self, width, height, center_x, center_y, auto_center=False):
+        """
+        执行中心点切割
+
+        参数:
+            width, height: 裁剪尺寸
+            center_x, center_y: 中心点（None 表示未设置）
+            auto_center: 未设置中心点时是否按显著区域自动确定中心
+        """
         if self.current_image is None:
             messagebox.showwarning(get_text('warning'), get_text('warn_no_image'))
             return
+        if not self.check_idle():
+            return
 
-        try:
-            # 使用设置的中心点或默认中心
-            if center_x is None or center_y is None:
-                img_width, img_height = self.current_image.size
-                center_x = img_width // 2
-                center_y = img_height // 2
+        source = self.current_image
+        use_auto = auto_center and (center_x is None or center_y is None)
 
+        # 使用设置的中心点或默认中心
+        if not use_auto and (center_x is None or center_y is None):
+            img_width, img_height = self.current_image.size
+            center_x = img_width // 2
+            center_y = img_height // 2
+
+        def crop(cancel_token):
+            if use_auto:
+                # 按显著区域自动确定中心点
+                return image_processor.auto_center_crop(source, width, height)
             # 执行中心点裁剪
-            cropped = image_processor.center_crop(
-                self.current_image, width, height, center_x, center_y
-            )
+            return image_processor.center_crop(source, width, height, center_x, center_y)
 
+        def on_cropped(cropped):
             # 更新当前图像
             self.current_image = cropped
             self.display_image_on_canvas()
@@ -499,14 +716,54 @@ class ImageProcessorApp:
             self.update_status(get_text('status_crop_complete', width=crop_w, height=crop_h))
             messagebox.showinfo(get_text('success'), get_text('success_crop', width=crop_w, height=crop_h))
 
-        except Exception as e:
+        def on_error(e):
+            messagebox.showerror(get_text('error'), get_text('error_crop_failed', error=str(e)))
+
+        self.run_task('center_crop', crop, on_cropped, on_error)
+
+    def on_auto_trim(self):
+        """自动去除均匀边框"""
+        if self.current_image is None:
+            messagebox.showwarning(get_text('warning'), get_text('warn_no_image'))
+            return
+        if not self.check_idle():
+            return
+
+        source = self.current_image
+
+        def trim(cancel_token):
+            return image_processor.auto_trim(source)
+
+        def on_trimmed(trimmed):
+            if trimmed is source:
+                self.update_status(get_text('status_trim_none'))
+                return
+
+            # 更新当前图像
+            self.current_image = trimmed
+            self.display_image_on_canvas()
+
+            # 清除裁剪框和中心点
+            self.crop_tool.clear()
+            self.crop_tool.clear_center_point()
+            self.center_point = None
+            self.pixel_info_panel.clear()
+
+            trim_w, trim_h = trimmed.size
+            self.update_status(get_text('status_trim_complete', width=trim_w, height=trim_h))
+
+        def on_error(e):
             messagebox.showerror(get_text('error'), get_text('error_crop_failed', error=str(e)))
 
+        self.run_task('auto_trim', trim, on_trimmed, on_error)
+
     def apply_interactive_crop(self):
         """应用交互式裁剪框"""
         if self.current_image is None:
             messagebox.showwarning(get_text('warning'), get_text('warn_no_image'))
             return
+        if not self.check_idle():
+            return
 
         # 获取裁剪框坐标
         crop_rect = self.crop_tool.get_crop_rect()
@@ -544,63 +801,79 @@ class ImageProcessorApp:
         except Exception as e:
             messagebox.showerror(get_text('error'), get_text('error_crop_failed', error=str(e)))
 
-    def on_compress(self, target_size_kb, format_type):
-        """执行图像压缩"""
+    def on_compress(self, target_size_kb, format_type, tolerance=0.0):
+        """
+        执行图像压缩
+
+        参数:
+            target_size_kb: 目标大小（KB）
+            format_type: 输出格式
+            tolerance: 提前结束容差（0-1）
+        """
         if self.current_image is None:
             messagebox.showwarning(get_text('warning'), get_text('warn_no_image'))
-            return None
+            return
+        if not self.check_idle():
+            return
 
-        try:
-            # 执行压缩
-            self.update_status(get_text('status_compressing', size=target_size_kb))
-            compressed, actual_size_kb = image_processor.compress_to_size(
-                self.current_image, target_size_kb, format_type
+        source = self.current_image
+
+        def show_progress(probes, quality, scale, best_size_kb):
+            self.compress_panel.show_progress(probes, quality, scale, best_size_kb)
+
+        progress_callback = self.executor.main_thread_callback(show_progress)
+
+        def compress(cancel_token):
+            return image_processor.compress_to_size(
+                source, target_size_kb, format_type,
+                progress_callback=progress_callback,
+                cancel_token=cancel_token,
+                tolerance=tolerance
             )
 
+        def on_compressed(result):
+            compressed, actual_size_kb = result
+
             # 更新当前图像
             self.current_image = compressed
             self.display_image_on_canvas()
 
+            self.compress_panel.show_result(actual_size_kb)
             self.update_status(get_text('status_compress_complete', target=target_size_kb, actual=actual_size_kb))
-            return actual_size_kb
 
-        except Exception as e:
+        def on_error(e):
             messagebox.showerror(get_text('error'), get_text('error_compress_failed', error=str(e)))
-            return None
+
+        self.update_status(get_text('status_compressing', size=target_size_kb))
+        self.run_task('compress', compress, on_compressed, on_error)
 
     def on_resize(self, target_width, target_height, mode):
         """执行图像尺寸调整"""
         if self.current_image is None:
             messagebox.showwarning(get_text('warning'), get_text('warn_no_image'))
-            return False
+            return
+        if not self.check_idle():
+            return
 
-        try:
-            # 获取原始尺寸
-            orig_width, orig_height = self.current_image.size
+        if mode not in ('stretch', 'crop', 'pad'):
+            messagebox.showerror(get_text('error'), f"Unknown resize mode: {mode}")
+            return
 
-            self.update_status(f"Resizing: {orig_width}×{orig_height} → {target_width}×{target_height}")
+        source = self.current_image
 
+        def resize(cancel_token):
             # 根据模式调整尺寸
             if mode == 'stretch':
                 # 强制拉伸
-                resized = self.current_image.resize(
-                    (target_width, target_height),
-                    Image.LANCZOS
-                )
+                return image_processor.resize_image(source, (target_width, target_height))
             elif mode == 'crop':
                 # 保持比例，裁剪超出部分
-                resized = image_processor.resize_with_crop(
-                    self.current_image, target_width, target_height
-                )
-            elif mode == 'pad':
-                # 保持比例，填充空白
-                resized = image_processor.resize_with_pad(
-                    self.current_image, target_width, target_height
-                )
+                return image_processor.resize_with_crop(source, target_width, target_height)
             else:
-                messagebox.showerror(get_text('error'), f"Unknown resize mode: {mode}")
-                return False
+                # 保持比例，填充空白
+                return image_processor.resize_with_pad(source, target_width, target_height)
 
+        def on_resized(resized):
             # 更新当前图像
             self.current_image = resized
             self.display_image_on_canvas()
@@ -609,19 +882,24 @@ class ImageProcessorApp:
             self.crop_tool.clear()
             self.pixel_info_panel.clear()
 
+            self.resize_panel.show_result(target_width, target_height)
             self.update_status(f"Resize complete: {target_width}×{target_height}")
             messagebox.showinfo(get_text('success'), get_text('success_resize', width=target_width, height=target_height))
-            return True
 
-        except Exception as e:
+        def on_error(e):
             messagebox.showerror(get_text('error'), f"Resize failed: {str(e)}")
-            return False
+
+        orig_width, orig_height = source.size
+        self.update_status(f"Resizing: {orig_width}×{orig_height} → {target_width}×{target_height}")
+        self.run_task('resize', resize, on_resized, on_error)
 
     def save_image(self):
         """保存图片"""
         if self.current_image is None:
             messagebox.showwarning(get_text('warning'), get_text('warn_no_save'))
             return
+        if not self.check_idle():
+            return
 
         # 检查是否有裁剪框
         crop_rect = self.crop_tool.get_crop_rect()
@@ -657,17 +935,32 @@ class ImageProcessorApp:
             ]
         )
 
-        if file_path:
-            try:
-                image_processor.save_image(self.current_image, file_path)
-                self.update_status(get_text('status_saved', filename=os.path.basename(file_path)))
-                messagebox.showinfo(get_text('success'), get_text('success_save'))
-            except Exception as e:
-                messagebox.showerror(get_text('error'), get_text('error_save_failed', error=str(e)))
+        if not file_path:
+            return
+
+        # 覆盖源文件前先把原图复制到内存，重置时不会读到写了一半的文件（内存映射时甚至会 SIGBUS）
+        if (self.source is not None and os.path.exists(file_path) and os.path.exists(self.source.path)
+                and os.path.samefile(self.source.path, file_path)):
+            self.source.detach_file()
+
+        source = self.current_image
+
+        def save(cancel_token):
+            return image_processor.save_image(source, file_path)
+
+        def on_saved(result):
+            self.update_status(get_text('status_saved', filename=os.path.basename(file_path)))
+            messagebox.showinfo(get_text('success'), get_text('success_save'))
+
+        def on_error(e):
+            messagebox.showerror(get_text('error'), get_text('error_save_failed', error=str(e)))
+
+        self.update_status(get_text('status_saving', filename=os.path.basename(file_path)))
+        self.run_task('save', save, on_saved, on_error)
 
     def show_preview(self):
         """显示预览对比窗口"""
-        if self.original_image is None or self.current_image is None:
+        if self.source is None or self.current_image is None:
             messagebox.showwarning(get_text('warning'), get_text('warn_no_preview'))
             return
 
@@ -700,7 +993,7 @@ class ImageProcessorApp:
         left_frame.pack(side='left', fill='both', expand=True, padx=5)
 
         tk.Label(left_frame, text=get_text('preview_original'), font=('Arial', 12, 'bold')).pack()
-        orig_w, orig_h = self.original_image.size
+        orig_w, orig_h = self.source.size
         tk.Label(left_frame, text=get_text('preview_size', width=orig_w, height=orig_h)).pack()
 
         orig_canvas = tk.Canvas(left_frame, bg='white')
@@ -719,10 +1012,10 @@ class ImageProcessorApp:
 
         # 显示图像
         def display_preview():
-            # 原图
+            # 原图（使用显示分辨率的代理图，不需要完整原图）
             orig_canvas.update()
             orig_resized, _, _, _ = image_processor.fit_image_to_canvas(
-                self.original_image,
+                self.source.proxy,
                 orig_canvas.winfo_width(),
                 orig_canvas.winfo_height()
             )
@@ -753,31 +1046,132 @@ class ImageProcessorApp:
 
     def reset_image(self):
         """重置图片到原始状态"""
-        if self.original_image is None:
+        if self.source is None or not self.check_idle():
             return
 
-        # 重置缩放级别
-        self.zoom_level = 1.0
-        self.manual_zoom = False
+        source = self.source
 
-        self.current_image = self.original_image.copy()
-        self.display_image_on_canvas()
-        self.crop_tool.clear()
-        self.crop_tool.clear_center_point()
-        self.center_point = None
-        self.pixel_info_panel.clear()
-        self.compress_panel.clear_result()
-        self.update_status(get_text('status_reset'))
+        def decode(cancel_token):
+            # 只保留编码字节时在这里重新解码完整原图
+            return source.decode()
+
+        def on_decoded(image):
+            # 重置缩放级别
+            self.zoom_level = 1.0
+            self.manual_zoom = False
+
+            self.current_image = image
+            self.display_image_on_canvas()
+            self.crop_tool.clear()
+            self.crop_tool.clear_center_point()
+            self.center_point = None
+            self.pixel_info_panel.clear()
+            self.compress_panel.clear_result()
+            self.update_status(get_text('status_reset'))
+
+        def on_error(e):
+            messagebox.showerror(get_text('error'), get_text('error_open_image', error=str(e)))
+
+        self.run_task('reset', decode, on_decoded, on_error)
 
     def clear_crop(self):
         """清除裁剪框"""
         self.crop_tool.clear()
         self.pixel_info_panel.clear()
 
+    def check_idle(self):
+        """
+        检查是否可以开始新的操作
+
+        返回:
+            没有正在执行的后台任务时返回True
+        """
+        if self.executor.busy:
+            self.update_status(get_text('status_busy'))
+            return False
+        return True
+
+    def run_task(self, name, func, on_success, on_error):
+        """
+        在后台线程中执行图像操作
+
+        执行期间禁用会产生冲突的面板按钮，结束后（无论成功、失败或取消）恢复。
+
+        参数:
+            name: 任务名称
+            func: 工作函数 func(cancel_token)，返回值传给 on_success
+            on_success: 成功回调（主线程）
+            on_error: 失败回调（主线程）
+        """
+        def on_cancel():
+            self.update_status(get_text('status_cancelled'))
+
+        def on_finally():
+            self.current_task = None
+            self.set_busy(False)
+
+        if instrumentation.is_enabled():
+            func = instrumentation.instrument(func, f'task.{name}')
+        self.set_busy(True)
+        self.current_task = self.executor.submit(
+            name, func,
+            on_success=on_success, on_error=on_error,
+            on_cancel=on_cancel, on_finally=on_finally
+        )
+        return self.current_task
+
+    def cancel_task(self):
+        """取消当前后台任务"""
+        if self.current_task is not None:
+            self.current_task.cancel()
+            self.update_status(get_text('status_cancelling'))
+
+    def accept_task(self):
+        """让当前后台任务提前结束并接受目前的最佳结果"""
+        if self.current_task is not None:
+            self.current_task.accept()
+
+    def set_busy(self, busy):
+        """
+        设置忙碌状态
+
+        参数:
+            busy: True 禁用操作按钮并启用取消按钮，False 恢复
+        """
+        self.center_crop_panel.set_busy(busy)
+        self.compress_panel.set_busy(busy)
+        self.resize_panel.set_busy(busy)
+        self.action_panel.set_busy(busy)
+        if busy:
+            self.pixel_info_panel.apply_button.config(state='disabled')
+        elif self.crop_tool.get_crop_rect():
+            self.pixel_info_panel.apply_button.config(state='normal')
+        self.root.config(cursor='watch' if busy else '')
+
     def update_status(self, message):
         """更新状态栏"""
         self.status_bar.config(text=message)
 
+    def start_metrics(self):
+        """在状态栏右侧显示最近一次操作的性能记录（使用已有的环形缓冲区输出，没有时新建一个）"""
+        self.metrics_sink = next(
+            (sink for sink in instrumentation.sinks() if isinstance(sink, instrumentation.RingBufferSink)), None
+        )
+        if self.metrics_sink is None:
+            self.metrics_sink = instrumentation.RingBufferSink()
+            instrumentation.add_sink(self.metrics_sink)
+        # 覆盖在状态栏上，不改变状态栏的布局
+        self.metrics_label = tk.Label(self.status_bar, anchor='e', fg='gray35')
+        self.metrics_label.place(relx=1.0, rely=0.5, anchor='e')
+        self.refresh_metrics()
+
+    def refresh_metrics(self):
+        """刷新状态栏中的性能摘要（记录可能来自工作线程，因此定时轮询）"""
+        record = self.metrics_sink.last()
+        if record is not None:
+            self.metrics_label.config(text=instrumentation.format_record(record))
+        self.root.after(METRICS_REFRESH_MS, self.refresh_metrics)
+
     def show_help(self):
         """显示使用说明"""
         messagebox.showinfo(get_text('help_title'), get_text('help_text'))
@@ -798,3 +1192,9 @@ class ImageProcessorApp:
                 get_text('language_change_title'),
                 get_text('language_change_message')
             )
+
+
+# 操作处理函数的性能记录（输入像素数取当前图像）
+instrumentation.instrument_methods(
+    ImageProcessorApp, INSTRUMENTED_HANDLERS, 'app', inputs=lambda args: args[0].current_image
+)
@@ -0,0 +1,239 @@
+"""
+归档批处理模块
+直接从 zip/tar 归档中读取图像交给批处理流水线，结果写入输出归档，中间不解压到磁盘
+
+归档的读取和写出都是顺序的：输入归档在流水线的输入线程中逐个读出成员
+（tar 以流模式打开，支持 .tar.gz 等压缩格式和不可定位的输入），
+写出阶段只有一个线程按完成顺序追加成员；解码、变换和编码仍在各自的工作池中并行执行。
+JPEG/WebP/PNG/GIF 本身已经压缩，写入 zip 时使用存储模式，不再做一遍 deflate。
+
+用法:
+    python -m src.archive 输入.zip 输出.zip --recipe recipe.json
+"""
+
+import argparse
+import io
+import os
+import posixpath
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+
+from .pipeline import Pipeline
+from .recipe import normalize_recipe, load_recipe, output_name
+from .watcher import IMAGE_EXTENSIONS
+
+
+# 写入 zip 时不再压缩的扩展名（数据本身已经压缩）
+STORED_EXTENSIONS = ('.jpg', '.jpeg', '.webp', '.png', '.gif')
+
+# tar 输出的压缩方式（按输出文件扩展名选择）
+_TAR_MODES = (
+    ('.tar.gz', 'w|gz'), ('.tgz', 'w|gz'),
+    ('.tar.bz2', 'w|bz2'), ('.tar.xz', 'w|xz'),
+    ('.tar', 'w|'),
+)
+
+
+class ArchiveMember:
+    """
+    归档中的一个图像成员（作为流水线的输入来源）
+
+    属性:
+        name: 成员在归档中的路径
+        data: 成员内容，被读取阶段取走后为None
+    """
+
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+
+    def __str__(self):
+        return self.name
+
+    def take(self):
+        """取走成员内容（之后不再持有，避免结果列表保留所有输入字节）"""
+        data, self.data = self.data, None
+        return data
+
+
+def is_image_member(name):
+    """成员是否为图像文件（跳过 macOS 的 __MACOSX 和 ._ 资源文件）"""
+    basename = posixpath.basename(name)
+    if name.startswith('__MACOSX/') or basename.startswith('._'):
+        return False
+    return os.path.splitext(basename)[1].lower() in IMAGE_EXTENSIONS
+
+
+def iter_archive(source):
+    """
+    逐个读出归档中的图像成员
+
+    参数:
+        source: 归档文件路径或二进制文件对象（tar 可以从管道流式读取，管道中的 zip 先整个读入内存）
+
+    返回:
+        生成器，按归档中的顺序产出 ArchiveMember
+    """
+    fileobj = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        if not fileobj.seekable():
+            # zip 的目录位于文件末尾，从管道读取时只能先整个读入内存
+            head = fileobj.peek(4)[:4] if hasattr(fileobj, 'peek') else b''
+            if head == b'PK\x03\x04' or not hasattr(fileobj, 'peek'):
+                fileobj = io.BytesIO(fileobj.read())
+        if fileobj.seekable() and zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and is_image_member(info.filename):
+                        yield ArchiveMember(info.filename, archive.read(info))
+        else:
+            if fileobj.seekable():
+                fileobj.seek(0)
+            with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+                for info in archive:
+                    if info.isfile() and is_image_member(info.name):
+                        yield ArchiveMember(info.name, archive.extractfile(info).read())
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            fileobj.close()
+
+
+class ArchiveWriter:
+    """
+    输出归档（线程安全，成员按调用顺序追加）
+
+    格式按文件扩展名选择：.zip 或 .tar/.tar.gz/.tgz/.tar.bz2/.tar.xz。
+    """
+
+    def __init__(self, target, format=None):
+        """
+        参数:
+            target: 输出文件路径或二进制文件对象（可以不可定位，如标准输出）
+            format: 'zip'、'tar' 或 'tar.gz' 等；默认按 target 的扩展名判断，文件对象默认为 zip
+        """
+        name = format or (str(target).lower() if isinstance(target, (str, os.PathLike)) else 'zip')
+        self._lock = threading.Lock()
+        self._zip = self._tar = None
+        if name.endswith('zip'):
+            self._zip = zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            mode = next((mode for ext, mode in _TAR_MODES if name.endswith(ext.lstrip('.'))), 'w|')
+            if isinstance(target, (str, os.PathLike)):
+                self._tar = tarfile.open(target, mode)
+            else:
+                self._tar = tarfile.open(fileobj=target, mode=mode)
+        self.count = 0
+        self.bytes_written = 0
+
+    def write(self, name, data):
+        """
+        追加一个成员
+
+        参数:
+            name: 成员路径
+            data: 成员内容
+        """
+        with self._lock:
+            if self._zip is not None:
+                info = zipfile.ZipInfo(name, time.localtime()[:6])
+                stored = os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+                info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+                self._zip.writestr(info, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                self._tar.addfile(info, io.BytesIO(data))
+            self.count += 1
+            self.bytes_written += len(data)
+
+    def close(self):
+        """写出归档目录并关闭"""
+        if self._zip is not None:
+            self._zip.close()
+        else:
+            self._tar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_archive_batch(source, target, recipe, cancel_token=None, on_result=None, **options):
+    """
+    按配方处理输入归档中的全部图像并写入输出归档
+
+    输出成员保留输入中的目录结构，扩展名换成配方输出格式的扩展名（见 recipe.output_name）。
+
+    参数:
+        source: 输入归档（路径或文件对象）
+        target: 输出归档（路径或文件对象）
+        recipe: 处理配方
+        cancel_token: 取消令牌
+        on_result: 每个条目完成时的回调 on_result(PipelineItem)
+        **options: 传递给 Pipeline 的其他参数（如 workers、process_stages）
+
+    返回:
+        {'done': n, 'failed': n, 'cancelled': n} 统计字典
+
+    异常:
+        输入归档损坏时抛出 zipfile/tarfile 的异常（已处理的成员仍写入输出归档）
+    """
+    recipe = normalize_recipe(recipe)
+    workers = dict(options.pop('workers', None) or {})
+    workers.update(read=1, write=1)   # 归档 I/O 保持顺序
+
+    counts = {'done': 0, 'failed': 0, 'cancelled': 0}
+    with ArchiveWriter(target) as writer:
+        pipeline = Pipeline(
+            recipe, workers=workers,
+            reader=ArchiveMember.take,
+            writer=writer.write,
+            output_path_func=lambda member: output_name(member.name, recipe),
+            **options
+        )
+        for item in pipeline.run(iter_archive(source), cancel_token=cancel_token):
+            if item.cancelled:
+                counts['cancelled'] += 1
+            else:
+                counts['done' if item.ok else 'failed'] += 1
+            if on_result:
+                on_result(item)
+    return counts
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='按配方处理 zip/tar 归档中的图像，结果写入新的归档')
+    parser.add_argument('source', help="输入归档（zip 或 tar，'-' 表示从标准输入读取）")
+    parser.add_argument('target', help='输出归档（.zip、.tar、.tar.gz 等）')
+    parser.add_argument('--recipe', help='配方JSON文件（默认仅重新编码为JPEG）')
+    parser.add_argument('--processes', action='store_true', help='解码/变换/编码使用进程池')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='解码/变换/编码的工作数')
+    args = parser.parse_args(argv)
+
+    recipe = load_recipe(args.recipe) if args.recipe else normalize_recipe({})
+    source = sys.stdin.buffer if args.source == '-' else args.source
+    stages = ('decode', 'transform', 'encode')
+
+    def report(item):
+        if not item.ok and not item.cancelled:
+            print(f"✗ {item.source}: {item.error}", file=sys.stderr)
+
+    counts = run_archive_batch(
+        source, args.target, recipe, on_result=report,
+        workers={stage: args.workers for stage in stages},
+        process_stages=stages if args.processes else ()
+    )
+    print(f"{counts['done']} 个完成, {counts['failed']} 个失败", file=sys.stderr)
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
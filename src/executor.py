@@ -0,0 +1,244 @@
+"""
+后台任务执行模块
+在工作线程中执行耗时的图像操作，并通过 root.after 将结果轮询回 Tk 主线程
+"""
+
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class OperationCancelled(Exception):
+    """操作已被取消"""
+
+
+class CancelToken:
+    """
+    取消令牌，由主线程设置、工作线程在安全点检查
+
+    除取消外还支持"接受"请求：迭代式操作（如 compress_to_size）
+    收到后停止继续搜索，直接返回目前得到的最佳结果。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._accept_event = threading.Event()
+
+    def cancel(self):
+        """请求取消"""
+        self._event.set()
+
+    def accept(self):
+        """请求提前结束并接受当前最佳结果"""
+        self._accept_event.set()
+
+    @property
+    def cancelled(self):
+        """是否已请求取消"""
+        return self._event.is_set()
+
+    @property
+    def accepted(self):
+        """是否已请求接受当前结果"""
+        return self._accept_event.is_set()
+
+    def raise_if_cancelled(self):
+        """如已请求取消则抛出 OperationCancelled"""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+class Task:
+    """已提交的后台任务"""
+
+    def __init__(self, name, on_success=None, on_error=None, on_cancel=None, on_finally=None):
+        """
+        初始化任务
+
+        参数:
+            name: 任务名称（用于冲突检测和状态显示）
+            on_success: 成功回调 on_success(result)，在主线程执行
+            on_error: 失败回调 on_error(exception)，在主线程执行
+            on_cancel: 取消回调 on_cancel()，在主线程执行
+            on_finally: 结束回调 on_finally()，无论结果如何都在主线程执行
+        """
+        self.name = name
+        self.token = CancelToken()
+        self.future = None
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.on_finally = on_finally
+
+    def cancel(self):
+        """
+        取消任务
+
+        尚未开始的任务直接从队列中移除；正在运行的任务会在下一个检查点中止，
+        即使底层操作无法中断，其结果也会被丢弃。
+        """
+        self.token.cancel()
+        if self.future is not None:
+            self.future.cancel()
+
+    def accept(self):
+        """请求任务提前结束并返回当前最佳结果"""
+        self.token.accept()
+
+    @property
+    def cancelled(self):
+        """是否已请求取消"""
+        return self.token.cancelled
+
+
+class TaskExecutor:
+    """
+    后台任务执行器
+
+    工作函数在线程池中运行（Pillow 的解码、缩放和编码会释放 GIL），
+    完成结果放入线程安全队列，由主线程通过 root.after 定时取出并调用回调，
+    因此所有回调都可以安全地操作 Tk 控件。
+    """
+
+    def __init__(self, root, max_workers=1, poll_interval=50):
+        """
+        初始化执行器
+
+        参数:
+            root: tkinter根窗口（或任何提供 after(ms, func) 的对象）
+            max_workers: 工作线程数
+            poll_interval: 结果轮询间隔（毫秒）
+        """
+        self.root = root
+        self.poll_interval = poll_interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-worker')
+        self._results = queue.Queue()
+        self._pending = []
+        self._polling = False
+
+    @property
+    def busy(self):
+        """是否有未完成的任务"""
+        return bool(self._pending)
+
+    def submit(self, name, func, *args, on_success=None, on_error=None,
+               on_cancel=None, on_finally=None, **kwargs):
+        """
+        提交后台任务
+
+        工作函数以 func(*args, cancel_token=token, **kwargs) 的形式调用，
+        可在循环中调用 token.raise_if_cancelled() 以支持及时取消。
+
+        参数:
+            name: 任务名称
+            func: 工作函数
+            *args, **kwargs: 传递给工作函数的参数
+            on_success, on_error, on_cancel, on_finally: 主线程回调，见 Task
+
+        返回:
+            Task对象
+        """
+        task = Task(name, on_success, on_error, on_cancel, on_finally)
+        task.future = self._pool.submit(self._run, task, func, args, kwargs)
+        self._pending.append(task)
+        self._schedule_poll()
+        return task
+
+    def main_thread_callback(self, func):
+        """
+        包装回调，使其可以在工作线程中调用、在主线程中执行
+
+        适用于进度回调等需要在任务执行过程中更新界面的场景。
+
+        参数:
+            func: 主线程中执行的函数
+
+        返回:
+            线程安全的包装函数
+        """
+        def wrapper(*args):
+            self._results.put((None, 'call', (func, args)))
+        return wrapper
+
+    def cancel_all(self):
+        """取消所有未完成的任务"""
+        for task in list(self._pending):
+            task.cancel()
+
+    def shutdown(self):
+        """取消所有任务并关闭线程池"""
+        self.cancel_all()
+        self._pool.shutdown(wait=False)
+
+    def _run(self, task, func, args, kwargs):
+        """在工作线程中执行任务"""
+        try:
+            task.token.raise_if_cancelled()
+            result = func(*args, cancel_token=task.token, **kwargs)
+            self._results.put((task, 'success', result))
+        except OperationCancelled:
+            self._results.put((task, 'cancelled', None))
+        except Exception as e:
+            self._results.put((task, 'error', e))
+
+    def _schedule_poll(self):
+        """启动结果轮询（如尚未启动）"""
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self.poll)
+
+    def poll(self):
+        """在主线程中处理已完成的任务，仍有未完成任务时继续轮询"""
+        try:
+            # 尚未开始就被取消的任务不会进入结果队列
+            for task in list(self._pending):
+                if task.future.cancelled():
+                    self._results.put((task, 'cancelled', None))
+
+            while True:
+                try:
+                    task, status, payload = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if status == 'call':
+                    func, args = payload
+                    self._invoke(func, *args)
+                    continue
+                if task not in self._pending:
+                    continue
+                self._pending.remove(task)
+                self._dispatch(task, status, payload)
+        finally:
+            # 即使出错也要继续轮询，否则剩下的任务永远得不到回调
+            self._polling = False
+            if self._pending:
+                self._schedule_poll()
+
+    def _dispatch(self, task, status, payload):
+        """调用任务回调"""
+        # 已请求取消的任务即使执行完成也丢弃结果
+        if status == 'cancelled' or (status == 'success' and task.cancelled):
+            self._invoke(task.on_cancel)
+        elif status == 'success':
+            self._invoke(task.on_success, payload)
+        else:
+            self._invoke(task.on_error, payload)
+        self._invoke(task.on_finally)
+
+    def _invoke(self, callback, *args):
+        """
+        调用一个回调，回调抛出的异常交给 root.report_callback_exception（与 Tk 事件回调相同），
+        不会中断轮询或跳过其他回调
+        """
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception:
+            report = getattr(self.root, 'report_callback_exception', None)
+            if report is not None:
+                report(*sys.exc_info())
+            else:
+                traceback.print_exc()
@@ -0,0 +1,184 @@
+"""
+文件夹浏览模块
+在当前图像所在的目录中前后切换，并在后台预读相邻文件的预览图
+
+切换图像时先显示显示分辨率的预览图（JPEG 使用 draft 模式在 DCT 阶段直接缩小解码），
+相邻的若干个文件提前在后台线程中解码好，前后翻页时预览图通常已经就绪。
+跳转到别处时，尚未开始的预读任务被取消，超出预读范围的结果被丢弃。
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from . import image_processor, loader
+from .source_image import make_proxy, DEFAULT_PROXY_SIZE
+from .watcher import IMAGE_EXTENSIONS
+
+
+def list_images(directory):
+    """
+    列出目录中的图像文件（不递归，按文件名排序，忽略大小写）
+
+    参数:
+        directory: 目录路径
+
+    返回:
+        文件路径列表
+    """
+    with os.scandir(directory) as entries:
+        paths = [
+            entry.path for entry in entries
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+        ]
+    return sorted(paths, key=lambda path: os.path.basename(path).lower())
+
+
+def load_preview(path, proxy_size=DEFAULT_PROXY_SIZE):
+    """
+    解码显示分辨率的预览图
+
+    一次读入整个文件后立即关闭，JPEG 按预览尺寸做 draft 解码，其他格式完整解码后缩小。
+    预览图只用于显示，缩小时使用更快的 BILINEAR 滤镜（Pillow 缩小时按比例扩大滤镜的采样范围，不会产生锯齿）。
+
+    参数:
+        path: 文件路径
+        proxy_size: 预览图的最大边长
+
+    返回:
+        (预览图, 原图尺寸)
+    """
+    with loader.load_image(path) as image:
+        size = image.size
+        # draft 选择不小于请求尺寸的最小缩放比例（1/2、1/4、1/8），只有 JPEG 支持
+        scale = min(proxy_size / image.width, proxy_size / image.height, 1.0)
+        image.draft(image.mode, (int(image.width * scale) + 1, int(image.height * scale) + 1))
+        image.load()
+        preview = image_processor.normalize_mode(image)
+        preview = make_proxy(preview, proxy_size, resample=Image.BILINEAR)
+        if preview is image:
+            preview = image.copy()
+    return preview, size
+
+
+class FolderBrowser:
+    """
+    目录内的图像导航与预读
+
+    只应在一个线程（Tk 主线程）中调用，预读在内部的线程池中执行。
+    """
+
+    def __init__(self, directory, prefetch=2, proxy_size=DEFAULT_PROXY_SIZE, workers=2):
+        """
+        参数:
+            directory: 目录路径
+            prefetch: 当前图像前后各预读的文件数
+            proxy_size: 预览图的最大边长
+            workers: 预读线程数
+        """
+        self.directory = directory
+        self.prefetch = prefetch
+        self.proxy_size = proxy_size
+        self.files = list_images(directory)
+        self.index = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self._futures = {}   # 路径 -> Future，只保留预读范围内的文件
+
+    @classmethod
+    def for_file(cls, path, **kwargs):
+        """为文件所在的目录创建浏览器，并定位到该文件"""
+        browser = cls(os.path.dirname(os.path.abspath(path)), **kwargs)
+        browser.select(path)
+        return browser
+
+    def __len__(self):
+        return len(self.files)
+
+    @property
+    def current(self):
+        """当前文件路径（目录为空时为None）"""
+        return self.files[self.index] if self.files else None
+
+    def contains(self, path):
+        """文件是否在本浏览器的目录中"""
+        return os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.directory)
+
+    def select(self, path):
+        """
+        定位到指定文件（不在列表中时重新扫描目录）
+
+        参数:
+            path: 文件路径
+
+        返回:
+            当前文件路径
+        """
+        path = os.path.join(self.directory, os.path.basename(path))
+        if path not in self.files:
+            self.files = list_images(self.directory)
+        if path in self.files:
+            self.index = self.files.index(path)
+        self._schedule(+1)
+        return self.current
+
+    def move(self, offset):
+        """
+        向前或向后移动
+
+        参数:
+            offset: 移动的文件数（负数向前）
+
+        返回:
+            新的当前文件路径，已到目录开头或末尾时返回None
+        """
+        index = self.index + offset
+        if not self.files or not 0 <= index < len(self.files):
+            return None
+        self.index = index
+        self._schedule(1 if offset > 0 else -1)
+        return self.current
+
+    def preview(self, path=None):
+        """
+        返回文件的预览图
+
+        已预读的直接返回结果（仍在解码时等待其完成），否则在当前线程中解码。
+
+        参数:
+            path: 文件路径（默认为当前文件）
+
+        返回:
+            (预览图, 原图尺寸)
+        """
+        path = path or self.current
+        future = self._futures.get(path)
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception:
+                self._futures.pop(path, None)
+        return load_preview(path, self.proxy_size)
+
+    def _schedule(self, direction):
+        """提交预读范围内的任务，取消范围外尚未开始的任务"""
+        window = [self.index]
+        for step in range(1, self.prefetch + 1):
+            # 沿浏览方向的文件优先
+            window += [self.index + direction * step, self.index - direction * step]
+        wanted = [self.files[i] for i in window if 0 <= i < len(self.files)]
+
+        for path in list(self._futures):
+            if path not in wanted:
+                self._futures.pop(path).cancel()
+        for path in wanted:
+            if path not in self._futures:
+                self._futures[path] = self._pool.submit(load_preview, path, self.proxy_size)
+
+    def close(self):
+        """取消全部预读并关闭线程池"""
+        # 逐个取消而不用 shutdown(cancel_futures=True)，后者需要 Python 3.9
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,204 @@
+"""
+解码图像缓存模块
+会话范围内的 LRU 缓存，保存最近打开过的图像，重新打开时不必再从磁盘读取和解码
+
+缓存键为 (绝对路径, 修改时间, 文件大小)，文件被修改后旧条目自然失效。
+每个条目同时保存显示用的降采样金字塔和缩略图，总内存占用按字节预算控制，
+超出预算时淘汰最久未使用的条目。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from .renditions import ImagePyramid
+
+
+# 默认内存预算（MB）
+DEFAULT_BUDGET_MB = 512
+
+# 缩略图最大边长
+THUMBNAIL_SIZE = 256
+
+
+def image_nbytes(image):
+    """估算图像像素数据占用的字节数"""
+    return image.width * image.height * len(image.getbands())
+
+
+def cache_key(path):
+    """
+    返回文件的缓存键
+
+    参数:
+        path: 文件路径
+
+    返回:
+        (绝对路径, st_mtime_ns, st_size)
+    """
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+class CachedImage:
+    """
+    缓存条目
+
+    属性:
+        key: 缓存键
+        image: 解码后的PIL.Image对象
+        pyramid: 显示用的降采样金字塔（ImagePyramid，按需生成层级）
+        data: 解码所用的源文件编码字节（可选，SourceImage 以 bytes 方式保留原图时保存，
+              命中时不必再读取文件）
+        nbytes: 按原图加完整金字塔（约 4/3 帧）估算的内存占用，加上编码字节
+    """
+
+    def __init__(self, key, image, data=None):
+        self.key = key
+        self.image = image
+        self.data = data
+        self.pyramid = ImagePyramid(image)
+        self.nbytes = image_nbytes(image) * 4 // 3 + (len(data) if data is not None else 0)
+        self._thumbnail = None
+
+    @property
+    def thumbnail(self):
+        """最大边长不超过 THUMBNAIL_SIZE 的缩略图（从金字塔中最接近的层级生成）"""
+        if self._thumbnail is None:
+            width, height = self.pyramid.size
+            scale = min(THUMBNAIL_SIZE / width, THUMBNAIL_SIZE / height, 1.0)
+            thumbnail = self.pyramid.level_for(scale, scale).copy()
+            thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            self._thumbnail = thumbnail
+        return self._thumbnail
+
+
+class ImageCache:
+    """
+    按字节预算淘汰的 LRU 图像缓存（线程安全）
+
+    打开图像在后台线程中进行，显示在主线程中进行，因此所有操作都加锁。
+    """
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB):
+        """
+        参数:
+            budget_mb: 内存预算（MB），为 0 时不缓存
+        """
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path):
+        """
+        查找文件对应的缓存条目
+
+        参数:
+            path: 文件路径
+
+        返回:
+            CachedImage对象，未缓存（或文件已变化）时返回None
+        """
+        try:
+            key = cache_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, path, image, key=None):
+        """
+        加入缓存，必要时淘汰最久未使用的条目
+
+        参数:
+            path: 文件路径
+            image: 解码后的PIL.Image对象
+            key: 缓存键（默认按当前文件状态计算；应在读取文件之前取得，避免读取期间文件被修改）
+
+        返回:
+            CachedImage对象（超过整个预算的图像不会被缓存，但仍返回条目）
+        """
+        return self.add(CachedImage(key or cache_key(path), image))
+
+    def add(self, entry):
+        """
+        加入已有的条目（保留其中已生成的金字塔层级），必要时淘汰最久未使用的条目
+
+        参数:
+            entry: CachedImage对象
+
+        返回:
+            同一个条目
+        """
+        if entry.nbytes > self.budget:
+            return entry
+        with self._lock:
+            old = self._entries.pop(entry.key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._entries[entry.key] = entry
+            self.nbytes += entry.nbytes
+            while self.nbytes > self.budget:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return entry
+
+    def take(self, path):
+        """
+        取出文件对应的缓存条目（从缓存中移除）
+
+        正在编辑的图像不应留在缓存中：编辑后缓存仍会保留原图，多占用一帧内存，
+        因此打开时取出，离开时再用 add 放回。
+
+        参数:
+            path: 文件路径
+
+        返回:
+            CachedImage对象，未缓存（或文件已变化）时返回None
+        """
+        try:
+            key = cache_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.nbytes -= entry.nbytes
+            self.hits += 1
+            return entry
+
+    def find(self, image):
+        """
+        查找保存了指定图像对象的条目（用于为当前显示的图像找到它的金字塔）
+
+        参数:
+            image: PIL.Image对象
+
+        返回:
+            CachedImage对象或None
+        """
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.image is image:
+                    return entry
+        return None
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
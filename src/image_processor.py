@@ -1,10 +1,28 @@
 """
 图像处理核心逻辑模块
 包含裁剪、压缩、保存等核心功能
+
+所有函数都不修改传入图像的像素，需要改变像素时总是返回新的图像对象，
+因此调用方可以直接共享同一个图像对象（写时复制），不必预先 copy() 一份。
 """
 
 import io
-from PIL import Image, ImageTk
+import sys
+import numpy as np
+from PIL import Image, ImageChops, ImageTk
+
+from . import instrumentation
+
+
+# 保存格式对应的文件扩展名
+FORMAT_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'WEBP': '.webp',
+    'BMP': '.bmp',
+    'GIF': '.gif',
+    'TIFF': '.tif',
+}
 
 
 def load_image(file_path):
@@ -24,7 +42,67 @@ def load_image(file_path):
         raise Exception(f"无法加载图像: {str(e)}")
 
 
-def fit_image_to_canvas(image, canvas_width, canvas_height):
+def has_opaque_alpha(image):
+    """
+    判断带透明通道的图像是否实际上完全不透明
+
+    只对透明通道做 getextrema() 检查。结果不缓存：image.info 会被 copy/crop/convert 继承，
+    paste、putalpha、ImageDraw 等原地编辑也无法让缓存失效，过期的"不透明"会丢掉真实的透明度。
+    解码后由 normalize_mode 立即把不透明图像转为 RGB/L，之后的操作不会再检查它们。
+
+    参数:
+        image: PIL.Image对象
+
+    返回:
+        RGBA/LA 图像的透明通道全为 255 时返回True，其他情况返回False
+    """
+    if image.mode not in ('RGBA', 'LA'):
+        return False
+    return image.getchannel('A').getextrema()[0] == 255
+
+
+def normalize_mode(image):
+    """
+    将完全不透明的 RGBA/LA 图像转换为 RGB/L
+
+    设计工具导出的 PNG 常常是 RGBA 但完全不透明，去掉透明通道后，
+    后续的缩放、合成和编码都只需处理 3 个通道，也不必再合成到白色背景上。
+
+    参数:
+        image: PIL.Image对象
+
+    返回:
+        转换后的PIL.Image对象（无需转换时返回原对象）
+    """
+    if has_opaque_alpha(image):
+        return image.convert('RGB' if image.mode == 'RGBA' else 'L')
+    return image
+
+
+def resize_image(image, size, resample=Image.LANCZOS):
+    """
+    透明度感知的缩放
+
+    Pillow 缩放 RGBA/LA 图像时会先预乘透明度（RGBA → RGBa）、缩放后再反预乘，
+    完全透明像素的颜色不会渗入边缘。调色板图像（P/PA）和带 tRNS 透明色的图像
+    不走这条路径：P 会被强制使用最近邻缩放，PA 会对调色板索引做插值，
+    因此先转换为 RGBA（无透明度的 P 转为 RGB）再缩放。
+
+    参数:
+        image: PIL.Image对象
+        size: 目标尺寸 (宽, 高)
+        resample: 重采样滤镜，默认 LANCZOS
+
+    返回:
+        缩放后的PIL.Image对象
+    """
+    if image.mode in ('P', 'PA') or 'transparency' in image.info:
+        has_alpha = image.mode == 'PA' or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    return image.resize(size, resample)
+
+
+def fit_image_to_canvas(image, canvas_width, canvas_height, pyramid=None):
     """
     缩放图像以适配Canvas，保持宽高比
 
@@ -32,6 +110,8 @@ def fit_image_to_canvas(image, canvas_width, canvas_height):
         image: PIL.Image对象
         canvas_width: Canvas宽度
         canvas_height: Canvas高度
+        pyramid: 图像的降采样金字塔（可选，见 renditions.ImagePyramid），
+                 提供时从最接近显示尺寸的层级缩放，不必每次处理全分辨率图像
 
     返回:
         (缩放后的PIL.Image对象, 缩放比例, 显示宽度, 显示高度)
@@ -46,7 +126,8 @@ def fit_image_to_canvas(image, canvas_width, canvas_height):
     # 缩放图像
     new_width = int(img_width * scale)
     new_height = int(img_height * scale)
-    resized = image.resize((new_width, new_height), Image.LANCZOS)
+    source = pyramid.level_for(scale, scale) if pyramid is not None else image
+    resized = source.resize((new_width, new_height), Image.LANCZOS)
 
     return resized, scale, new_width, new_height
 
@@ -79,6 +160,135 @@ def crop_image(image, x1, y1, x2, y2):
     return image.crop((left, top, right, bottom))
 
 
+def find_content_bbox(image, tolerance=10, border_color=None, proxy_size=512):
+    """
+    查找去除均匀边框后的内容区域
+
+    算法:
+    1. 边框颜色默认取四个角像素的中位数
+    2. 计算每个像素与边框颜色的最大通道偏差，按块取最大值得到长边约 proxy_size 像素的缩小图，
+       用 NumPy 按行/列归约找出偏差超过容差的块，得到近似边界
+       （取最大值而不是平均值，单个超过容差的像素也不会被平均掉）
+    3. 只在近似边界附近的窄条内读取原分辨率像素，精确定位四条边
+
+    参数:
+        image: PIL.Image对象
+        tolerance: 颜色容差（各通道最大偏差）
+        border_color: 边框颜色（默认自动检测）
+        proxy_size: 缩小图长边像素数
+
+    返回:
+        (left, top, right, bottom) 或 None（整张图像都是边框颜色）
+    """
+    work_mode = 'RGBA' if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info else 'RGB'
+    img_width, img_height = image.size
+
+    if border_color is None:
+        corners = [
+            image.getpixel(xy)
+            for xy in ((0, 0), (img_width - 1, 0), (0, img_height - 1), (img_width - 1, img_height - 1))
+        ]
+        corner_image = Image.new(image.mode, (4, 1))
+        if image.mode == 'P':
+            corner_image.putpalette(image.getpalette())
+            if 'transparency' in image.info:
+                corner_image.info['transparency'] = image.info['transparency']
+        corner_image.putdata(corners)
+        border = np.median(np.asarray(corner_image.convert(work_mode), dtype=np.int16)[0], axis=0)
+    else:
+        border = np.array(border_color, dtype=np.int16)
+        if border.size == 3 and work_mode == 'RGBA':
+            border = np.append(border, 255)
+
+    def content_mask(region, threshold):
+        pixels = np.asarray(region.convert(work_mode), dtype=np.int16)
+        return np.abs(pixels - border).max(axis=2) > threshold
+
+    def deviation_proxy(block):
+        """每个 block×block 块内与边框颜色的最大通道偏差（uint8 数组）"""
+        work = image if image.mode == work_mode else image.convert(work_mode)
+        fill = [int(v) for v in np.clip(np.round(border), 0, 255)]
+        deviation = None
+        for band, value in zip(work.split(), fill):
+            band = band.point([abs(v - value) for v in range(256)])
+            deviation = band if deviation is None else ImageChops.lighter(deviation, band)
+        # 补零到块的整数倍（零偏差不会超过容差），先归约行再归约列，两次都是连续内存上的 max
+        pixels = np.asarray(deviation)
+        pad_y, pad_x = -img_height % block, -img_width % block
+        if pad_y or pad_x:
+            pixels = np.pad(pixels, ((0, pad_y), (0, pad_x)))
+        rows = pixels.reshape(-1, block, pixels.shape[1]).max(axis=1)
+        return rows.reshape(rows.shape[0], -1, block).max(axis=2)
+
+    # 缩小图上的近似边界
+    block = int(np.ceil(max(img_width, img_height) / proxy_size))
+    if block > 1:
+        mask = deviation_proxy(block) > tolerance
+    else:
+        mask = content_mask(image, tolerance)
+    rows = np.nonzero(mask.any(axis=1))[0]
+    cols = np.nonzero(mask.any(axis=0))[0]
+    if rows.size == 0:
+        return None
+
+    left = int(cols[0]) * block
+    right = min(img_width, (int(cols[-1]) + 1) * block)
+    top = int(rows[0]) * block
+    bottom = min(img_height, (int(rows[-1]) + 1) * block)
+    if block == 1:
+        return left, top, right, bottom
+
+    # 在近似边界附近的原分辨率窄条内精确定位
+    margin_x = margin_y = block + 1
+    outer_top = max(0, top - margin_y)
+    outer_bottom = min(img_height, bottom + margin_y)
+    outer_left = max(0, left - margin_x)
+    outer_right = min(img_width, right + margin_x)
+
+    def refine(box, axis, first):
+        """在窄条内找到第一个/最后一个包含内容的行或列，返回其在原图中的坐标"""
+        hits = np.nonzero(content_mask(image.crop(box), tolerance).any(axis=axis))[0]
+        if hits.size == 0:
+            return None
+        offset = box[0] if axis == 0 else box[1]
+        return offset + (hits[0] if first else hits[-1] + 1)
+
+    new_left = refine((outer_left, outer_top, min(img_width, left + margin_x), outer_bottom), 0, True)
+    new_right = refine((max(0, right - margin_x), outer_top, outer_right, outer_bottom), 0, False)
+    new_top = refine((outer_left, outer_top, outer_right, min(img_height, top + margin_y)), 1, True)
+    new_bottom = refine((outer_left, max(0, bottom - margin_y), outer_right, outer_bottom), 1, False)
+
+    return (
+        int(left if new_left is None else new_left),
+        int(top if new_top is None else new_top),
+        int(right if new_right is None else new_right),
+        int(bottom if new_bottom is None else new_bottom),
+    )
+
+
+def auto_trim(image, tolerance=10, border_color=None, padding=0, proxy_size=512):
+    """
+    自动裁掉图像四周的均匀边框（白边、黑边等）
+
+    参数:
+        image: PIL.Image对象
+        tolerance: 颜色容差（各通道最大偏差，用于忽略JPEG噪声）
+        border_color: 边框颜色（默认取四角像素的中位数）
+        padding: 在内容区域四周保留的像素数
+        proxy_size: 检测使用的缩小图长边像素数
+
+    返回:
+        裁剪后的PIL.Image对象（没有可去除的边框时返回原图）
+    """
+    bbox = find_content_bbox(image, tolerance, border_color, proxy_size)
+    if bbox is None:
+        return image
+    left, top, right, bottom = bbox
+    if (left, top, right, bottom) == (0, 0) + image.size:
+        return image
+    return crop_image(image, left - padding, top - padding, right + padding, bottom + padding)
+
+
 def center_crop(image, crop_width, crop_height, center_x=None, center_y=None):
     """
     以指定中心点为基准裁剪图像，处理边界情况
@@ -117,7 +327,88 @@ def center_crop(image, crop_width, crop_height, center_x=None, center_y=None):
     return image.crop((left, top, right, bottom))
 
 
-def compress_to_size(image, target_size_kb, format='JPEG'):
+def find_salient_center(image, crop_width, crop_height, proxy_size=256):
+    """
+    在图像中寻找信息量最大的裁剪窗口，返回其中心点
+
+    算法:
+    1. 将图像缩小到长边约 proxy_size 像素的灰度代理图
+    2. 用相邻像素差的绝对值之和作为能量（边缘/纹理越多能量越高）
+    3. 构建能量的积分图，每个候选窗口的能量和只需 4 次查表（O(1)）
+    4. 一次向量化计算所有窗口位置的得分，取得分最高的窗口；
+       得分接近（差距在 1% 以内）的窗口中选离图像中心最近的，纯色图像因此回退到几何中心
+
+    参数:
+        image: PIL.Image对象
+        crop_width: 裁剪宽度
+        crop_height: 裁剪高度
+        proxy_size: 代理图长边像素数
+
+    返回:
+        (中心点x, 中心点y) 原图坐标
+    """
+    img_width, img_height = image.size
+    factor = min(1.0, proxy_size / max(img_width, img_height))
+    proxy_w = max(1, round(img_width * factor))
+    proxy_h = max(1, round(img_height * factor))
+    proxy = image.resize((proxy_w, proxy_h), Image.BOX) if factor < 1.0 else image
+    gray = np.asarray(proxy.convert('L'), dtype=np.float32)
+
+    # 能量图：横向和纵向梯度的绝对值之和
+    energy = np.zeros_like(gray)
+    energy[:, 1:] += np.abs(np.diff(gray, axis=1))
+    energy[1:, :] += np.abs(np.diff(gray, axis=0))
+
+    # 积分图（首行首列补零，便于窗口求和）
+    integral = np.zeros((proxy_h + 1, proxy_w + 1), dtype=np.float64)
+    integral[1:, 1:] = energy.cumsum(axis=0).cumsum(axis=1)
+
+    # 代理图上的窗口尺寸
+    scale_x = proxy_w / img_width
+    scale_y = proxy_h / img_height
+    win_w = min(proxy_w, max(1, round(crop_width * scale_x)))
+    win_h = min(proxy_h, max(1, round(crop_height * scale_y)))
+
+    # 所有窗口位置的能量和
+    scores = (integral[win_h:, win_w:] - integral[:-win_h, win_w:]
+              - integral[win_h:, :-win_w] + integral[:-win_h, :-win_w])
+
+    # 在接近最高分的窗口中选择离中心最近的
+    threshold = scores.max() - 0.01 * (scores.max() - scores.min())
+    tops, lefts = np.nonzero(scores >= threshold)
+    center_top = (proxy_h - win_h) / 2
+    center_left = (proxy_w - win_w) / 2
+    best = np.argmin((tops - center_top) ** 2 + (lefts - center_left) ** 2)
+
+    center_x = (lefts[best] + win_w / 2) / scale_x
+    center_y = (tops[best] + win_h / 2) / scale_y
+    return int(round(center_x)), int(round(center_y))
+
+
+def auto_center_crop(image, crop_width, crop_height, proxy_size=256):
+    """
+    以自动检测的显著区域为中心裁剪图像
+
+    参数:
+        image: PIL.Image对象
+        crop_width: 裁剪宽度
+        crop_height: 裁剪高度
+        proxy_size: 显著性检测使用的代理图长边像素数
+
+    返回:
+        裁剪后的PIL.Image对象
+    """
+    center_x, center_y = find_salient_center(image, crop_width, crop_height, proxy_size)
+
+    # 将中心点限制在使裁剪窗口完全落在图像内的范围，避免边界截断
+    img_width, img_height = image.size
+    center_x = min(max(center_x, crop_width // 2), img_width - (crop_width - crop_width // 2))
+    center_y = min(max(center_y, crop_height // 2), img_height - (crop_height - crop_height // 2))
+    return center_crop(image, crop_width, crop_height, center_x, center_y)
+
+
+def compress_to_size(image, target_size_kb, format='JPEG', progress_callback=None,
+                     cancel_token=None, tolerance=0.0):
     """
     压缩图像到指定文件大小
 
@@ -125,21 +416,63 @@ def compress_to_size(image, target_size_kb, format='JPEG'):
         image: PIL.Image对象
         target_size_kb: 目标文件大小（KB）
         format: 保存格式（JPEG/PNG）
+        progress_callback: 进度回调，每次试编码后调用
+            progress_callback(probes, quality, scale, best_size_kb)，
+            best_size_kb 为目前满足目标的最佳结果大小（尚无时为None）
+        cancel_token: 取消令牌（见 executor.CancelToken），每次编码前检查；
+            请求取消时抛出 OperationCancelled，请求接受时在得到第一个满足目标的结果后立即返回
+        tolerance: 提前结束容差（0-1），结果达到目标的 (1 - tolerance) 以上即停止搜索，
+            例如 0.03 表示在目标的 3% 以内即可
 
     返回:
         (压缩后的PIL.Image对象, 实际文件大小KB)
     """
+    buffer = _compress_buffer(image, target_size_kb, format, progress_callback, cancel_token, tolerance)
+    actual_size_kb = buffer.tell() / 1024
+    buffer.seek(0)
+    compressed_image = Image.open(buffer)
+    compressed_image.load()  # 确保图像数据已加载
+    return compressed_image, actual_size_kb
+
+
+def compress_to_bytes(image, target_size_kb, format='JPEG', progress_callback=None,
+                      cancel_token=None, tolerance=0.0):
+    """
+    压缩图像到指定文件大小，直接返回编码后的字节
+
+    与 compress_to_size 使用相同的搜索策略，但省去了把结果重新解码为图像的开销，
+    适用于批处理等只需要写出文件的场景。参数同 compress_to_size。
+
+    返回:
+        编码后的bytes
+    """
+    buffer = _compress_buffer(image, target_size_kb, format, progress_callback, cancel_token, tolerance)
+    return buffer.getvalue()
+
+
+def _compress_buffer(image, target_size_kb, format, progress_callback, cancel_token, tolerance):
+    """compress_to_size / compress_to_bytes 的共同实现，返回写入位置在末尾的BytesIO"""
     target_size_bytes = target_size_kb * 1024
+    good_enough_bytes = target_size_bytes * (1 - tolerance)
+
+    # RGB转换（JPEG不支持RGBA）；只读取像素，不需要复制
+    work_image = normalize_mode(image)
+    if format == 'JPEG':
+        work_image = _flatten_for_jpeg(work_image)
+
+    probes = 0
 
-    # RGB转换（JPEG不支持RGBA）
-    work_image = image.copy()
-    if format == 'JPEG' and work_image.mode == 'RGBA':
-        # 创建白色背景
-        background = Image.new('RGB', work_image.size, (255, 255, 255))
-        background.paste(work_image, mask=work_image.split()[3])
-        work_image = background
-    elif format == 'JPEG' and work_image.mode != 'RGB':
-        work_image = work_image.convert('RGB')
+    def should_stop():
+        """检查取消请求；已有满足目标的结果且请求接受时返回True"""
+        if cancel_token is None:
+            return False
+        cancel_token.raise_if_cancelled()
+        return best_buffer is not None and cancel_token.accepted
+
+    def report(quality, scale):
+        if progress_callback:
+            best_size_kb = best_buffer.tell() / 1024 if best_buffer else None
+            progress_callback(probes, quality, scale, best_size_kb)
 
     # 二分查找最佳质量参数
     quality_min = 1
@@ -148,13 +481,14 @@ def compress_to_size(image, target_size_kb, format='JPEG'):
     best_buffer = None
 
     # 先尝试质量调整
-    while quality_min <= quality_max:
+    while quality_min <= quality_max and not should_stop():
         quality = (quality_min + quality_max) // 2
 
         # 测试当前质量的文件大小
         buffer = io.BytesIO()
         work_image.save(buffer, format=format, quality=quality, optimize=True)
         size = buffer.tell()
+        probes += 1
 
         if size <= target_size_bytes:
             best_quality = quality
@@ -163,39 +497,75 @@ def compress_to_size(image, target_size_kb, format='JPEG'):
         else:
             quality_max = quality - 1  # 降低质量
 
+        report(quality, 1.0)
+
+        # 已足够接近目标
+        if size <= target_size_bytes and size >= good_enough_bytes:
+            break
+
     # 如果仍然超出大小，尝试降低分辨率
     if best_buffer is None or best_buffer.tell() > target_size_bytes:
         scale = 0.9
         while scale > 0.1:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+
             new_size = (int(work_image.width * scale), int(work_image.height * scale))
             resized = work_image.resize(new_size, Image.LANCZOS)
             buffer = io.BytesIO()
             resized.save(buffer, format=format, quality=best_quality, optimize=True)
+            probes += 1
 
             if buffer.tell() <= target_size_bytes:
                 best_buffer = buffer
                 work_image = resized
+                report(best_quality, scale)
                 break
 
+            report(best_quality, scale)
             scale -= 0.1
 
     # 如果找到了合适的压缩结果
     if best_buffer:
-        best_buffer.seek(0)
-        compressed_image = Image.open(best_buffer)
-        compressed_image.load()  # 确保图像数据已加载
-        actual_size_kb = best_buffer.tell() / 1024
-        return compressed_image, actual_size_kb
+        return best_buffer
 
     # 如果无法压缩到目标大小，返回尽可能小的版本
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
     buffer = io.BytesIO()
     work_image.save(buffer, format=format, quality=1, optimize=True)
-    buffer.seek(0)
-    compressed_image = Image.open(buffer)
-    compressed_image.load()
-    actual_size_kb = buffer.tell() / 1024
+    return buffer
+
+
+def encode_image(image, format='JPEG', quality=95):
+    """
+    将图像编码为指定格式的字节
+
+    参数:
+        image: PIL.Image对象
+        format: 保存格式
+        quality: 保存质量（1-100）
+
+    返回:
+        编码后的bytes
+    """
+    image = normalize_mode(image)
+    if format == 'JPEG':
+        image = _flatten_for_jpeg(image)
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, quality=quality, optimize=True)
+    return buffer.getvalue()
 
-    return compressed_image, actual_size_kb
+
+def _flatten_for_jpeg(image):
+    """将图像转换为JPEG可保存的RGB模式，透明区域合成到白色背景"""
+    if image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        return background
+    elif image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
 
 
 def save_image(image, file_path, format=None, quality=95):
@@ -209,14 +579,12 @@ def save_image(image, file_path, format=None, quality=95):
         quality: 保存质量（1-100）
     """
     try:
+        # 完全不透明的RGBA图像直接按RGB保存
+        image = normalize_mode(image)
+
         # 处理JPEG格式的RGBA图像
         if format == 'JPEG' or (format is None and file_path.lower().endswith('.jpg')):
-            if image.mode == 'RGBA':
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                background.paste(image, mask=image.split()[3])
-                image = background
-            elif image.mode != 'RGB':
-                image = image.convert('RGB')
+            image = _flatten_for_jpeg(image)
 
         if format:
             image.save(file_path, format=format, quality=quality, optimize=True)
@@ -279,6 +647,7 @@ def resize_with_crop(image, target_width, target_height):
     返回:
         调整后的PIL.Image对象
     """
+    image = normalize_mode(image)
     orig_width, orig_height = image.size
 
     # 计算缩放比例（取较大值以覆盖目标尺寸）
@@ -289,7 +658,7 @@ def resize_with_crop(image, target_width, target_height):
     # 缩放图像
     new_width = int(orig_width * scale)
     new_height = int(orig_height * scale)
-    resized = image.resize((new_width, new_height), Image.LANCZOS)
+    resized = resize_image(image, (new_width, new_height))
 
     # 计算裁剪区域（居中）
     left = (new_width - target_width) // 2
@@ -308,19 +677,21 @@ def resize_with_pad(image, target_width, target_height, fill_color=(255, 255, 25
 
     策略：
     1. 计算缩放比例以适应目标尺寸（取较小的比例）
-    2. 按比例缩放图像
+    2. 按比例缩放图像（透明图像按预乘透明度缩放）
     3. 创建目标尺寸的白色画布
-    4. 将缩放后的图像居中粘贴
+    4. 将缩放后的图像居中合成到画布上
 
     参数:
         image: PIL.Image对象
         target_width: 目标宽度
         target_height: 目标高度
-        fill_color: 填充颜色，默认白色 (255, 255, 255)
+        fill_color: 填充颜色，默认白色 (255, 255, 255)；
+                    透明图像可传入 RGBA 颜色，如 (0, 0, 0, 0) 保留透明背景
 
     返回:
         调整后的PIL.Image对象
     """
+    image = normalize_mode(image)
     orig_width, orig_height = image.size
 
     # 计算缩放比例（取较小值以适应目标尺寸）
@@ -331,23 +702,24 @@ def resize_with_pad(image, target_width, target_height, fill_color=(255, 255, 25
     # 缩放图像
     new_width = int(orig_width * scale)
     new_height = int(orig_height * scale)
-    resized = image.resize((new_width, new_height), Image.LANCZOS)
-
-    # 创建目标尺寸的画布
-    # 如果原图有透明通道，使用 RGBA 模式，否则使用 RGB
-    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
-        canvas = Image.new('RGBA', (target_width, target_height), fill_color + (255,))
-    else:
-        canvas = Image.new('RGB', (target_width, target_height), fill_color)
+    resized = resize_image(image, (new_width, new_height))
 
     # 计算粘贴位置（居中）
     paste_x = (target_width - new_width) // 2
     paste_y = (target_height - new_height) // 2
 
-    # 粘贴图像
-    if resized.mode == 'RGBA':
-        canvas.paste(resized, (paste_x, paste_y), resized)
+    # 有透明通道时使用 RGBA 画布并按 "over" 规则合成：
+    # paste(mask) 会把透明通道也按遮罩混合，边缘在不透明画布上变成半透明
+    if resized.mode in ('RGBA', 'LA'):
+        fill = tuple(fill_color) if len(fill_color) == 4 else tuple(fill_color) + (255,)
+        canvas = Image.new('RGBA', (target_width, target_height), fill)
+        canvas.alpha_composite(resized.convert('RGBA'), (paste_x, paste_y))
     else:
+        canvas = Image.new('RGB', (target_width, target_height), tuple(fill_color[:3]))
         canvas.paste(resized, (paste_x, paste_y))
 
     return canvas
+
+
+# 为全部公开函数加上性能记录（默认关闭，关闭时每次调用只多一次标志检查）
+instrumentation.instrument_module(sys.modules[__name__])
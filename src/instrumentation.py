@@ -0,0 +1,372 @@
+"""
+性能记录模块
+为 image_processor 的公开函数和主窗口的操作处理函数记录每次调用的耗时、编解码次数、像素数和内存峰值
+
+默认关闭；关闭时被包装的函数每次调用只多一次标志检查。开启后每次调用产生一条记录（字典）:
+    name           操作名（如 'image_processor.compress_to_size'、'app.on_compress'、'task.compress'）
+    thread         线程名
+    depth          嵌套深度（0 为最外层）
+    start          开始时间（Unix 时间戳）
+    wall_ms        墙钟时间（毫秒）
+    cpu_ms         本线程的 CPU 时间（毫秒）
+    encodes        Image.save 次数（含嵌套调用）
+    decodes        图像文件解码次数（含嵌套调用）
+    input_pixels   输入图像的像素总数
+    output_pixels  返回图像的像素总数
+    peak_bytes     tracemalloc 统计的分配峰值增量（字节），未开启 trace_memory 或非最外层时为None
+    error          抛出的异常类名，正常返回时为None
+
+注意 Pillow 的像素缓冲区不经过 Python 的内存分配器，peak_bytes 只反映 Python 对象（含 NumPy 数组）的分配。
+Python 3.8 及更早版本没有 tracemalloc.reset_peak，无法得到单次调用的峰值，peak_bytes 退化为调用前后
+已分配内存的净增量（峰值的下限）。
+
+记录交给可替换的输出（sink），任何带 emit(record) 方法的对象都可以作为输出:
+    RingBufferSink  内存中的环形缓冲区，保留最近的记录并可汇总
+    JsonLinesSink   每条记录一行 JSON，追加到文件
+
+用法:
+    from src import instrumentation
+    buffer = instrumentation.RingBufferSink()
+    instrumentation.enable([buffer, instrumentation.JsonLinesSink('ops.jsonl')], trace_memory=True)
+
+启动桌面应用前设置环境变量也可以开启（见 enable_from_env）:
+    IMAGE_TOOL_INSTRUMENT=1 python main.py             # 只在状态栏显示
+    IMAGE_TOOL_INSTRUMENT=ops.jsonl python main.py     # 同时写入文件
+"""
+
+import collections
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from PIL import Image, ImageFile
+
+
+# 环形缓冲区默认容量
+DEFAULT_CAPACITY = 1000
+
+# 开启时是否也记录嵌套调用（如 compress_to_size 内部的 normalize_mode）
+_nested = False
+_trace_memory = False
+_started_tracemalloc = False
+_enabled = False
+_sinks = []
+_lock = threading.Lock()
+_local = threading.local()
+
+# tracemalloc.reset_peak 需要 Python 3.9
+_HAS_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+# 开启时替换的 Pillow 方法的原始版本
+_original_save = None
+_original_load = None
+
+
+class RingBufferSink:
+    """内存中的环形缓冲区（线程安全）"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self._records = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def records(self, name=None):
+        """返回缓冲区中的记录（按时间先后），可按操作名筛选"""
+        with self._lock:
+            records = list(self._records)
+        return [r for r in records if name is None or r['name'] == name]
+
+    def last(self):
+        """最近的一条记录，缓冲区为空时返回None"""
+        with self._lock:
+            return self._records[-1] if self._records else None
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def summary(self):
+        """
+        按操作名汇总缓冲区中的记录
+
+        返回:
+            {操作名: {'count', 'errors', 'wall_ms', 'wall_ms_max', 'cpu_ms', 'encodes', 'decodes'}}，
+            时间和次数为合计值
+        """
+        totals = {}
+        for record in self.records():
+            total = totals.setdefault(record['name'], {
+                'count': 0, 'errors': 0, 'wall_ms': 0.0, 'wall_ms_max': 0.0,
+                'cpu_ms': 0.0, 'encodes': 0, 'decodes': 0,
+            })
+            total['count'] += 1
+            total['errors'] += record['error'] is not None
+            total['wall_ms'] += record['wall_ms']
+            total['wall_ms_max'] = max(total['wall_ms_max'], record['wall_ms'])
+            total['cpu_ms'] += record['cpu_ms']
+            total['encodes'] += record['encodes']
+            total['decodes'] += record['decodes']
+        return totals
+
+
+class JsonLinesSink:
+    """把每条记录作为一行 JSON 追加到文件（线程安全）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file.closed:
+                return
+            try:
+                self._file.write(line)
+                self._file.flush()
+            except OSError:
+                pass  # 记录写不进去不应影响图像操作
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def is_enabled():
+    """是否正在记录"""
+    return _enabled
+
+
+def sinks():
+    """当前的输出列表"""
+    with _lock:
+        return list(_sinks)
+
+
+def add_sink(sink):
+    """增加一个输出"""
+    with _lock:
+        _sinks.append(sink)
+
+
+def remove_sink(sink):
+    """移除一个输出（不会关闭它）"""
+    with _lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def enable(sinks=None, trace_memory=False, nested=False):
+    """
+    开始记录
+
+    参数:
+        sinks: 输出列表（None 表示保留当前的输出）
+        trace_memory: 是否用 tracemalloc 统计内存峰值（会明显拖慢 Python 代码）
+        nested: 是否也为嵌套调用单独产生记录；为 False 时嵌套调用的编解码次数计入最外层记录
+    """
+    global _enabled, _trace_memory, _nested, _started_tracemalloc
+    global _original_save, _original_load
+    with _lock:
+        if sinks is not None:
+            _sinks[:] = list(sinks)
+        _trace_memory = trace_memory
+        _nested = nested
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        if _original_save is None:
+            _original_save = Image.Image.save
+            _original_load = ImageFile.ImageFile.load
+            Image.Image.save = _counting_save
+            ImageFile.ImageFile.load = _counting_load
+        _enabled = True
+
+
+def disable():
+    """停止记录并恢复被替换的 Pillow 方法，返回停止前的输出列表（由调用方决定是否关闭）"""
+    global _enabled, _started_tracemalloc, _original_save, _original_load
+    with _lock:
+        _enabled = False
+        if _original_save is not None:
+            Image.Image.save = _original_save
+            ImageFile.ImageFile.load = _original_load
+            _original_save = _original_load = None
+        if _started_tracemalloc:
+            tracemalloc.stop()
+            _started_tracemalloc = False
+        previous = list(_sinks)
+        _sinks.clear()
+        return previous
+
+
+def enable_from_env(environ=None):
+    """
+    按环境变量开启记录
+
+    IMAGE_TOOL_INSTRUMENT: 为 1 时记录到内存中的环形缓冲区，为其他非空值时视为 JSON-lines 文件路径，同时写入该文件
+    IMAGE_TOOL_TRACEMALLOC: 为 1 时统计内存峰值
+
+    返回:
+        是否已开启
+    """
+    environ = os.environ if environ is None else environ
+    value = environ.get('IMAGE_TOOL_INSTRUMENT', '').strip()
+    if value in ('', '0'):
+        return False
+    outputs = [RingBufferSink()]
+    if value != '1':
+        outputs.append(JsonLinesSink(value))
+    enable(outputs, trace_memory=environ.get('IMAGE_TOOL_TRACEMALLOC') == '1')
+    return True
+
+
+def _frames():
+    frames = getattr(_local, 'frames', None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+def _counting_save(self, *args, **kwargs):
+    frames = getattr(_local, 'frames', None)
+    if frames:
+        frames[-1]['encodes'] += 1
+    return _original_save(self, *args, **kwargs)
+
+
+def _counting_load(self):
+    # tile 在解码完成后清空，只有第一次 load 才真正解码
+    frames = getattr(_local, 'frames', None)
+    if frames and self.tile:
+        frames[-1]['decodes'] += 1
+    return _original_load(self)
+
+
+def _count_pixels(value):
+    """统计图像（或图像的列表、元组、字典值）的像素总数"""
+    if isinstance(value, Image.Image):
+        return value.width * value.height
+    if isinstance(value, (list, tuple)):
+        return sum(_count_pixels(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_count_pixels(v) for v in value.values())
+    return 0
+
+
+def _emit(record):
+    for sink in sinks():
+        sink.emit(record)
+
+
+def _call(func, name, inputs, args, kwargs):
+    """开启记录时执行一次被包装的调用"""
+    frames = _frames()
+    if frames and not _nested:
+        return func(*args, **kwargs)
+
+    record = {
+        'name': name,
+        'thread': threading.current_thread().name,
+        'depth': len(frames),
+        'start': time.time(),
+        'wall_ms': 0.0,
+        'cpu_ms': 0.0,
+        'encodes': 0,
+        'decodes': 0,
+        'input_pixels': _count_pixels(inputs(args) if inputs else list(args) + list(kwargs.values())),
+        'output_pixels': 0,
+        'peak_bytes': None,
+        'error': None,
+    }
+    trace = _trace_memory and not frames and tracemalloc.is_tracing()
+    if trace:
+        if _HAS_RESET_PEAK:
+            tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    frames.append(record)
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        result = func(*args, **kwargs)
+        record['output_pixels'] = _count_pixels(result)
+        return result
+    except BaseException as e:
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['cpu_ms'] = round((time.thread_time() - cpu) * 1000, 3)
+        record['wall_ms'] = round((time.perf_counter() - wall) * 1000, 3)
+        if trace and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            record['peak_bytes'] = max(0, (peak if _HAS_RESET_PEAK else current) - base)
+        frames.pop()
+        if frames:
+            frames[-1]['encodes'] += record['encodes']
+            frames[-1]['decodes'] += record['decodes']
+        _emit(record)
+
+
+def instrument(func, name=None, inputs=None):
+    """
+    包装一个函数，开启记录时为每次调用产生一条记录
+
+    参数:
+        func: 被包装的函数
+        name: 操作名（默认为 模块名.函数名）
+        inputs: 从位置参数元组取出输入图像的函数 inputs(args)（默认统计全部参数中的图像）
+
+    返回:
+        包装后的函数（原函数在 __wrapped__ 属性中）
+    """
+    if getattr(func, '__instrumented__', False):
+        return func
+    name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        return _call(func, name, inputs, args, kwargs)
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def instrument_module(module):
+    """包装模块中定义的全部公开函数（替换模块属性）"""
+    prefix = module.__name__.rsplit('.', 1)[-1]
+    for attr, value in list(vars(module).items()):
+        if (not attr.startswith('_') and inspect.isfunction(value)
+                and value.__module__ == module.__name__):
+            setattr(module, attr, instrument(value, f'{prefix}.{attr}'))
+    return module
+
+
+def instrument_methods(cls, names, prefix, inputs=None):
+    """包装类的若干方法（替换类属性）"""
+    for attr in names:
+        setattr(cls, attr, instrument(getattr(cls, attr), f'{prefix}.{attr}', inputs))
+    return cls
+
+
+def format_record(record):
+    """一条记录的单行摘要（用于状态栏）"""
+    parts = [f"{record['name']}: {record['wall_ms']:.0f} ms", f"CPU {record['cpu_ms']:.0f} ms"]
+    if record['encodes'] or record['decodes']:
+        parts.append(f"{record['encodes']} enc / {record['decodes']} dec")
+    if record['input_pixels'] or record['output_pixels']:
+        parts.append(f"{record['input_pixels'] / 1e6:.1f} → {record['output_pixels'] / 1e6:.1f} MP")
+    if record['peak_bytes'] is not None:
+        parts.append(f"peak {record['peak_bytes'] / 2 ** 20:.1f} MB")
+    if record['error']:
+        parts.append(record['error'])
+    return ' | '.join(parts)
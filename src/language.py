@@ -21,11 +21,15 @@ LANGUAGES = {
         # 菜单栏
         'menu_file': 'File',
         'menu_open': 'Open Image',
+        'menu_next_image': 'Next Image in Folder',
+        'menu_prev_image': 'Previous Image in Folder',
+        'menu_folder_view': 'Folder View',
         'menu_save': 'Save Image',
         'menu_exit': 'Exit',
         'menu_edit': 'Edit',
         'menu_reset': 'Reset Image',
         'menu_clear_crop': 'Clear Crop Box',
+        'menu_auto_trim': 'Auto Trim Borders',
         'menu_language': 'Language',
         'menu_help': 'Help',
         'menu_user_guide': 'User Guide',
@@ -49,6 +53,7 @@ LANGUAGES = {
         'crop_height': 'Height',
         'execute_crop': 'Execute Crop',
         'center_crop_hint': 'Tip: Right-click image to set center, or leave blank to use image center',
+        'auto_center': 'Auto center on salient region when no center is set',
 
         # 压缩面板
         'compress_title': 'Image Compression',
@@ -58,6 +63,10 @@ LANGUAGES = {
         'format_label': 'Format',
         'start_compress': 'Start Compression',
         'compress_result': 'Compression complete! Actual size: {size:.2f} KB',
+        'compress_tolerance': 'Stop within',
+        'compress_abort': 'Abort',
+        'compress_accept': 'Accept Current',
+        'compress_progress': 'Probe {probes} | Quality {quality} | Scale {scale:.0%} | Best {best}',
 
         # 尺寸调整面板
         'resize_title': 'Resize Image',
@@ -79,6 +88,7 @@ LANGUAGES = {
         # 操作按钮
         'save_button': 'Save Image',
         'preview_button': 'Preview Comparison',
+        'cancel_button': 'Cancel (Esc)',
 
         # 状态栏
         'status_ready': 'Ready',
@@ -89,6 +99,16 @@ LANGUAGES = {
         'status_compress_complete': 'Compression complete | Target: {target:.2f} KB, Actual: {actual:.2f} KB',
         'status_saved': 'Saved: {filename}',
         'status_reset': 'Image reset',
+        'status_trim_complete': 'Borders trimmed | New size: {width}x{height}',
+        'status_trim_none': 'No uniform border found',
+        'status_loading': 'Loading: {filename}...',
+        'status_browsing': '{filename} ({index}/{total}) | {width}x{height}',
+        'status_thumbnails': 'Thumbnails: {cached} cached, {created} created, {failed} failed',
+        'folder_view_title': 'Folder: {directory}',
+        'status_saving': 'Saving: {filename}...',
+        'status_busy': 'Another operation is in progress (press Esc to cancel)',
+        'status_cancelling': 'Cancelling...',
+        'status_cancelled': 'Operation cancelled',
 
         # 对话框
         'warning': 'Warning',
@@ -194,11 +214,15 @@ Development Date: 2025-11-06
         # 菜单栏
         'menu_file': '文件',
         'menu_open': '打开图片',
+        'menu_next_image': '文件夹中的下一张',
+        'menu_prev_image': '文件夹中的上一张',
+        'menu_folder_view': '文件夹视图',
         'menu_save': '保存图片',
         'menu_exit': '退出',
         'menu_edit': '编辑',
         'menu_reset': '重置图片',
         'menu_clear_crop': '清除裁剪框',
+        'menu_auto_trim': '自动去除边框',
         'menu_language': '语言',
         'menu_help': '帮助',
         'menu_user_guide': '使用说明',
@@ -222,6 +246,7 @@ Development Date: 2025-11-06
         'crop_height': '高度',
         'execute_crop': '执行切割',
         'center_crop_hint': '提示: 点击图片设置中心点，或留空使用图像中心',
+        'auto_center': '未设置中心点时自动对准显著区域',
 
         # 压缩面板
         'compress_title': '图像压缩',
@@ -231,6 +256,10 @@ Development Date: 2025-11-06
         'format_label': '格式',
         'start_compress': '开始压缩',
         'compress_result': '压缩完成！实际大小: {size:.2f} KB',
+        'compress_tolerance': '误差范围',
+        'compress_abort': '中止',
+        'compress_accept': '接受当前结果',
+        'compress_progress': '第 {probes} 次 | 质量 {quality} | 比例 {scale:.0%} | 最佳 {best}',
 
         # 尺寸调整面板
         'resize_title': '调整尺寸',
@@ -252,6 +281,7 @@ Development Date: 2025-11-06
         # 操作按钮
         'save_button': '保存图片',
         'preview_button': '预览对比',
+        'cancel_button': '取消 (Esc)',
 
         # 状态栏
         'status_ready': '就绪',
@@ -262,6 +292,16 @@ Development Date: 2025-11-06
         'status_compress_complete': '压缩完成 | 目标: {target:.2f} KB, 实际: {actual:.2f} KB',
         'status_saved': '已保存: {filename}',
         'status_reset': '图片已重置',
+        'status_trim_complete': '边框已去除 | 新尺寸: {width}x{height}',
+        'status_trim_none': '未检测到均匀边框',
+        'status_loading': '正在加载: {filename}...',
+        'status_browsing': '{filename} ({index}/{total}) | {width}x{height}',
+        'status_thumbnails': '缩略图: 已缓存 {cached}, 新生成 {created}, 失败 {failed}',
+        'folder_view_title': '文件夹: {directory}',
+        'status_saving': '正在保存: {filename}...',
+        'status_busy': '另一个操作正在进行中（按 Esc 取消）',
+        'status_cancelling': '正在取消...',
+        'status_cancelled': '操作已取消',
 
         # 对话框
         'warning': '警告',
@@ -0,0 +1,160 @@
+"""
+文件读取模块
+一次 read() 把整个文件读入自己持有的缓冲区后立即关闭文件描述符，再从内存解码
+
+image_processor.load_image 返回的是惰性打开的图像，文件描述符一直保持打开，
+直到图像被加载或被垃圾回收（多帧 GIF/TIFF 加载后也不会关闭），
+长时间的批处理中容易因 EMFILE（打开文件过多）失败。
+这里的 load_image 返回的图像基于内存缓冲区，不占用任何文件描述符；
+可选的 FilePool 限制同时打开的文件数，并统计打开的文件数和读写字节数。
+"""
+
+import io
+import os
+import threading
+from contextlib import contextmanager
+
+from PIL import Image
+
+
+# 默认同时打开的文件数上限（远低于常见的 ulimit -n 1024）
+DEFAULT_MAX_OPEN = 64
+
+
+class FilePool:
+    """
+    限制同时打开文件数的读写池（线程安全）
+
+    属性:
+        max_open: 同时打开的文件数上限
+    """
+
+    def __init__(self, max_open=DEFAULT_MAX_OPEN):
+        """
+        参数:
+            max_open: 同时打开的文件数上限
+        """
+        self.max_open = max_open
+        self._slots = threading.BoundedSemaphore(max_open)
+        self._lock = threading.Lock()
+        self._open = 0
+        self._peak_open = 0
+        self._files = 0
+        self._bytes_read = 0
+        self._bytes_written = 0
+        self._waits = 0
+
+    @contextmanager
+    def open(self, path, mode='rb'):
+        """
+        在上限内打开文件，已达上限时阻塞等待其他文件关闭
+
+        参数:
+            path: 文件路径
+            mode: 打开模式
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._waits += 1
+            self._slots.acquire()
+        try:
+            with open(path, mode) as f:
+                with self._lock:
+                    self._open += 1
+                    self._files += 1
+                    self._peak_open = max(self._peak_open, self._open)
+                try:
+                    yield f
+                finally:
+                    with self._lock:
+                        self._open -= 1
+        finally:
+            self._slots.release()
+
+    def read(self, path):
+        """一次性读取整个文件"""
+        with self.open(path, 'rb') as f:
+            data = f.read()
+        with self._lock:
+            self._bytes_read += len(data)
+        return data
+
+    def write(self, path, data):
+        """写出整个文件"""
+        with self.open(path, 'wb') as f:
+            f.write(data)
+        with self._lock:
+            self._bytes_written += len(data)
+
+    @property
+    def stats(self):
+        """
+        统计信息
+
+        返回:
+            {'open': 当前打开数, 'peak_open': 最大同时打开数, 'files': 累计打开的文件数,
+             'bytes_read': 读取字节数, 'bytes_written': 写出字节数, 'waits': 因达到上限而等待的次数}
+        """
+        with self._lock:
+            return {
+                'open': self._open,
+                'peak_open': self._peak_open,
+                'files': self._files,
+                'bytes_read': self._bytes_read,
+                'bytes_written': self._bytes_written,
+                'waits': self._waits,
+            }
+
+
+def read_file(path, pool=None):
+    """
+    一次性读取整个文件到内存（单次 read() 调用，读完立即关闭文件）
+
+    参数:
+        path: 文件路径
+        pool: FilePool（可选），限制同时打开的文件数并计数
+    """
+    if pool is not None:
+        return pool.read(path)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def write_file(path, data, pool=None):
+    """
+    写出文件，必要时创建目录
+
+    参数:
+        path: 文件路径
+        data: 要写出的字节
+        pool: FilePool（可选）
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if pool is not None:
+        pool.write(path, data)
+        return
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def load_image(path, pool=None):
+    """
+    读取整个文件后从内存打开图像
+
+    返回的图像仍是惰性的（尚未解码，可以先调用 draft），但数据来自自己持有的缓冲区，
+    返回时文件描述符已经关闭。
+
+    参数:
+        path: 文件路径
+        pool: FilePool（可选）
+
+    返回:
+        PIL.Image对象
+    """
+    data = read_file(path, pool)
+    try:
+        return Image.open(io.BytesIO(data))
+    except Exception as e:
+        raise Exception(f"无法加载图像: {str(e)}")
@@ -0,0 +1,200 @@
+"""
+批处理任务清单模块
+用 SQLite 记录每个输入的内容哈希、配方哈希、输出路径和状态，中断后重新运行时跳过已完成的条目
+
+跳过判断只依赖 (路径, 大小, 修改时间, 配方哈希)：启动时一次性把已完成记录读入字典，
+每个文件只需一次 os.stat 和一次字典查找，不必重新读取或哈希文件内容。
+
+多机分片:
+    多台机器可以共享同一个清单文件（共享文件系统需支持文件锁），
+    每台机器使用不同的 shard_index 和相同的 shard_count，按路径的 CRC32 静态划分输入，
+    各分片处理的条目互不重叠，只在提交结果时短暂竞争写锁。
+"""
+
+import os
+import sqlite3
+import time
+import zlib
+
+from .pipeline import Pipeline
+from .recipe import recipe_hash
+
+
+# 条目状态
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS items (
+    source TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    content_hash TEXT,
+    recipe_hash TEXT,
+    output_path TEXT,
+    status TEXT,
+    error TEXT,
+    shard INTEGER,
+    updated_at REAL
+)
+'''
+
+
+def shard_of(source, shard_count):
+    """返回输入所属的分片编号"""
+    return zlib.crc32(str(source).encode('utf-8')) % shard_count
+
+
+class JobManifest:
+    """批处理任务清单"""
+
+    def __init__(self, path, timeout=30.0):
+        """
+        打开（或创建）清单
+
+        参数:
+            path: SQLite 文件路径
+            timeout: 等待其他分片释放写锁的最长时间（秒）
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=timeout)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        """关闭清单"""
+        self._conn.close()
+
+    def completed(self, recipe_digest):
+        """
+        读取指定配方下所有已完成条目
+
+        参数:
+            recipe_digest: 配方哈希
+
+        返回:
+            {source: (size, mtime_ns)} 字典
+        """
+        rows = self._conn.execute(
+            'SELECT source, size, mtime_ns FROM items WHERE status = ? AND recipe_hash = ?',
+            (STATUS_DONE, recipe_digest)
+        )
+        return {source: (size, mtime_ns) for source, size, mtime_ns in rows}
+
+    def record(self, rows):
+        """
+        批量写入处理结果
+
+        参数:
+            rows: (source, size, mtime_ns, content_hash, recipe_hash, output_path,
+                   status, error, shard) 元组列表
+        """
+        if not rows:
+            return
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO items '
+                '(source, size, mtime_ns, content_hash, recipe_hash, output_path, status, error, shard, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [row + (now,) for row in rows]
+            )
+
+    def summary(self):
+        """
+        统计各状态的条目数
+
+        返回:
+            {status: count} 字典
+        """
+        rows = self._conn.execute('SELECT status, COUNT(*) FROM items GROUP BY status')
+        return dict(rows)
+
+    def failures(self):
+        """
+        返回所有失败条目
+
+        返回:
+            [(source, error), ...] 列表
+        """
+        return list(self._conn.execute(
+            'SELECT source, error FROM items WHERE status = ? ORDER BY source', (STATUS_FAILED,)
+        ))
+
+
+def run_resumable_batch(sources, recipe, output_dir, manifest_path, shard_index=0, shard_count=1,
+                        commit_every=200, cancel_token=None, on_result=None, **pipeline_options):
+    """
+    可断点续跑的批处理
+
+    已完成（且文件大小、修改时间和配方都未变化）的输入直接跳过，失败的输入会重新处理；
+    重复出现的输入只处理第一次。
+    结果每 commit_every 条提交一次；崩溃时最多丢失最后一批记录，这些条目下次会重新处理（输出被覆盖）。
+
+    参数:
+        sources: 输入文件路径的可迭代对象
+        recipe: 处理配方
+        output_dir: 输出目录
+        manifest_path: 清单文件路径
+        shard_index: 本机处理的分片编号（0 到 shard_count - 1）
+        shard_count: 分片总数
+        commit_every: 每处理多少条提交一次清单
+        cancel_token: 取消令牌
+        on_result: 结果回调 on_result(PipelineItem)
+        **pipeline_options: 传递给 Pipeline 的其他参数
+
+    返回:
+        {'skipped': n, 'done': n, 'failed': n, 'cancelled': n} 统计字典
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"无效的分片编号: {shard_index}/{shard_count}")
+
+    digest = recipe_hash(recipe)
+    manifest = JobManifest(manifest_path)
+    counts = {'skipped': 0, 'done': 0, 'failed': 0, 'cancelled': 0}
+    try:
+        completed = manifest.completed(digest)
+        stats = {}
+        seen = set()
+
+        def todo():
+            for source in sources:
+                # 重复的输入会写到同一个输出，第二次只会以"输出路径重复"失败并覆盖第一次的记录
+                if source in seen:
+                    continue
+                seen.add(source)
+                if shard_count > 1 and shard_of(source, shard_count) != shard_index:
+                    continue
+                try:
+                    stat = os.stat(source)
+                    key = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    key = (None, None)   # 交给流水线报告读取错误
+                if completed.get(source) == key:
+                    counts['skipped'] += 1
+                    continue
+                stats[source] = key
+                yield source
+
+        pipeline = Pipeline(recipe, output_dir, hash_inputs=True, **pipeline_options)
+        rows = []
+        for item in pipeline.run(todo(), cancel_token=cancel_token):
+            size, mtime_ns = stats.pop(item.source)
+            if item.cancelled:
+                counts['cancelled'] += 1
+            else:
+                status = STATUS_DONE if item.ok else STATUS_FAILED
+                counts[status] += 1
+                rows.append((
+                    item.source, size, mtime_ns, item.content_hash, digest, item.output_path,
+                    status, None if item.ok else str(item.error), shard_index
+                ))
+            if on_result:
+                on_result(item)
+            if len(rows) >= commit_every:
+                manifest.record(rows)
+                rows = []
+        manifest.record(rows)
+    finally:
+        manifest.close()
+    return counts
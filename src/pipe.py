@@ -0,0 +1,226 @@
+"""
+管道模式模块
+从标准输入读取图像，按命令行参数给出的操作处理后把编码结果写到标准输出，供 shell 管道使用
+
+    python -m src.pipe --trim --resize 800x600 --mode pad --format WEBP < in.jpg > out.webp
+
+操作按命令行中出现的顺序执行，也可以用 --recipe 指定配方文件。
+
+分帧模式（--framed）下一个常驻进程连续处理多张图像，避免每张图像都启动一次 Python：
+    请求帧: 4 字节大端长度 + 图像字节；长度为 0 或输入结束表示结束
+    响应帧: 1 字节状态 + 4 字节大端长度 + 内容；状态 0 时内容为编码结果，1 时为 UTF-8 错误信息
+响应与请求一一对应、顺序相同，单张图像出错不会终止进程。
+"""
+
+import argparse
+import struct
+import sys
+
+from .pipeline import decode_bytes
+from .recipe import normalize_recipe, load_recipe, apply_steps, encode_output
+
+
+# 帧头格式
+FRAME_HEADER = struct.Struct('>I')
+RESPONSE_HEADER = struct.Struct('>BI')
+
+# 响应状态
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+def process_bytes(data, recipe):
+    """
+    按配方处理一张编码图像
+
+    参数:
+        data: 输入图像的编码字节
+        recipe: 处理配方
+
+    返回:
+        输出图像的编码字节
+    """
+    image = decode_bytes(data)
+    image = apply_steps(image, recipe)
+    return encode_output(image, recipe)
+
+
+def _read_exact(stream, size):
+    """读取恰好 size 个字节，输入提前结束时抛出 EOFError"""
+    chunks = []
+    while size:
+        chunk = stream.read(size)
+        if not chunk:
+            raise EOFError("帧数据不完整")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_frame(stream):
+    """
+    读取一个请求帧
+
+    返回:
+        图像字节，输入结束或遇到长度为 0 的结束帧时返回None
+    """
+    header = stream.read(FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < FRAME_HEADER.size:
+        header += _read_exact(stream, FRAME_HEADER.size - len(header))
+    (length,) = FRAME_HEADER.unpack(header)
+    if length == 0:
+        return None
+    return _read_exact(stream, length)
+
+
+def write_frame(stream, data):
+    """写出一个请求帧（供调用方使用）"""
+    stream.write(FRAME_HEADER.pack(len(data)))
+    stream.write(data)
+
+
+def read_response(stream):
+    """
+    读取一个响应帧（供调用方使用）
+
+    返回:
+        (状态, 内容)
+    """
+    status, length = RESPONSE_HEADER.unpack(_read_exact(stream, RESPONSE_HEADER.size))
+    return status, _read_exact(stream, length)
+
+
+def serve_frames(stdin, stdout, recipe):
+    """
+    分帧模式：逐帧处理直到输入结束
+
+    参数:
+        stdin: 二进制输入流
+        stdout: 二进制输出流
+        recipe: 处理配方
+
+    返回:
+        (成功数, 失败数)
+    """
+    done = failed = 0
+    while True:
+        data = read_frame(stdin)
+        if data is None:
+            break
+        try:
+            status, payload = STATUS_OK, process_bytes(data, recipe)
+            done += 1
+        except Exception as e:
+            status, payload = STATUS_ERROR, str(e).encode('utf-8')
+            failed += 1
+        stdout.write(RESPONSE_HEADER.pack(status, len(payload)))
+        stdout.write(payload)
+        # 每张立即刷新，调用方可以逐张读取响应
+        stdout.flush()
+    return done, failed
+
+
+def _parse_size(value):
+    """解析 '宽x高' 格式的尺寸"""
+    try:
+        width, height = (int(v) for v in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"尺寸格式应为 宽x高: {value}")
+    return width, height
+
+
+def _parse_box(value):
+    """解析 'x1,y1,x2,y2' 格式的裁剪框"""
+    try:
+        x1, y1, x2, y2 = (int(v) for v in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"裁剪框格式应为 x1,y1,x2,y2: {value}")
+    return x1, y1, x2, y2
+
+
+class _StepAction(argparse.Action):
+    """把操作参数按出现顺序追加到 namespace.steps"""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        steps = list(getattr(namespace, 'steps', None) or [])
+        op = self.dest
+        if op == 'trim':
+            steps.append({'op': 'trim', 'tolerance': values})
+        elif op == 'crop':
+            x1, y1, x2, y2 = values
+            steps.append({'op': 'crop', 'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2})
+        elif op == 'center_crop':
+            steps.append({'op': 'center_crop', 'width': values[0], 'height': values[1]})
+        elif op == 'auto_center':
+            steps.append({'op': 'center_crop', 'width': values[0], 'height': values[1], 'auto': True})
+        elif op == 'resize':
+            steps.append({'op': 'resize', 'width': values[0], 'height': values[1]})
+        namespace.steps = steps
+
+
+def build_recipe(args):
+    """由命令行参数构建配方（--mode 作用于全部 --resize）"""
+    recipe = load_recipe(args.recipe) if args.recipe else normalize_recipe({})
+    steps = recipe['steps'] + list(args.steps or [])
+    for step in steps:
+        if step['op'] == 'resize' and args.mode:
+            step['mode'] = args.mode
+    options = {'steps': steps}
+    if args.format:
+        options['format'] = args.format
+    if args.quality is not None:
+        options['quality'] = args.quality
+    if args.target_kb is not None:
+        options['target_size_kb'] = args.target_kb
+    recipe.update(options)
+    return normalize_recipe(recipe)
+
+
+def main(argv=None, stdin=None, stdout=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='从标准输入读取图像，处理后写到标准输出')
+    parser.add_argument('--recipe', help='配方JSON文件（命令行中的操作追加在配方步骤之后）')
+    parser.add_argument('--trim', dest='trim', nargs='?', const=10, type=int, action=_StepAction,
+                        metavar='TOLERANCE', help='去除均匀边框（默认容差 10）')
+    parser.add_argument('--crop', dest='crop', type=_parse_box, action=_StepAction,
+                        metavar='X1,Y1,X2,Y2', help='按坐标裁剪')
+    parser.add_argument('--center-crop', dest='center_crop', type=_parse_size, action=_StepAction,
+                        metavar='WxH', help='居中裁剪')
+    parser.add_argument('--auto-center', dest='auto_center', type=_parse_size, action=_StepAction,
+                        metavar='WxH', help='按显著区域确定中心裁剪')
+    parser.add_argument('--resize', dest='resize', type=_parse_size, action=_StepAction,
+                        metavar='WxH', help='调整尺寸')
+    parser.add_argument('--mode', choices=('stretch', 'crop', 'pad'), help='尺寸调整模式（默认 stretch）')
+    parser.add_argument('--format', help='输出格式（默认 JPEG）')
+    parser.add_argument('--quality', type=int, help='输出质量')
+    parser.add_argument('--target-kb', type=float, help='目标文件大小（KB），指定时压缩到该大小以内')
+    parser.add_argument('--framed', action='store_true', help='分帧模式：连续处理长度前缀的多张图像')
+    parser.set_defaults(steps=[])
+    args = parser.parse_args(argv)
+
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    try:
+        recipe = build_recipe(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.framed:
+        done, failed = serve_frames(stdin, stdout, recipe)
+        print(f"{done} 张完成, {failed} 张失败", file=sys.stderr)
+        return 1 if failed else 0
+
+    try:
+        data = process_bytes(stdin.read(), recipe)
+    except Exception as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    stdout.write(data)
+    stdout.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
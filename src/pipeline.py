@@ -0,0 +1,304 @@
+"""
+批处理流水线模块
+读取 → 解码 → 变换 → 编码 → 写出 五个阶段由有界队列连接，各阶段使用独立的工作线程（或进程）池，
+使磁盘/网络I/O与CPU计算相互重叠；有界队列提供背压，内存占用与输入文件数量无关
+"""
+
+import functools
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import image_processor
+from .executor import OperationCancelled
+from .loader import read_file, write_file
+from .recipe import normalize_recipe, apply_steps, encode_output, output_name
+
+
+# 流水线阶段（按执行顺序）
+STAGES = ('read', 'decode', 'transform', 'encode', 'write')
+
+# 各阶段默认工作线程数：I/O阶段多线程掩盖延迟，CPU阶段接近核心数即可
+DEFAULT_WORKERS = {
+    'read': 4,
+    'decode': 2,
+    'transform': 2,
+    'encode': 2,
+    'write': 4,
+}
+
+# 可以放入进程池执行的阶段（处理函数和数据都可被pickle）
+PROCESS_CAPABLE_STAGES = ('decode', 'transform', 'encode')
+
+# 队列结束标记
+_DONE = object()
+
+
+def content_hash(data):
+    """计算内容哈希（blake2b，比 sha256 更快）"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def decode_bytes(data):
+    """从内存中的编码字节解码图像（完全不透明的RGBA转为RGB）"""
+    image = image_processor.load_image(io.BytesIO(data))
+    image.load()
+    return image_processor.normalize_mode(image)
+
+
+def transform_image(image, recipe):
+    """执行配方中的裁剪/尺寸调整操作"""
+    return apply_steps(image, recipe)
+
+
+def encode_image_for_recipe(image, recipe):
+    """按配方的输出设置编码图像"""
+    return encode_output(image, recipe)
+
+
+class PipelineItem:
+    """流水线中流转的单个文件"""
+
+    def __init__(self, source, output_path):
+        """
+        初始化
+
+        参数:
+            source: 输入来源（文件路径或读取函数可识别的其他标识）
+            output_path: 输出路径
+        """
+        self.source = source
+        self.output_path = output_path
+        self.data = None           # 读取阶段后为原始字节，编码阶段后为输出字节
+        self.image = None          # 解码后的PIL.Image对象
+        self.error = None          # 处理失败时的异常
+        self.content_hash = None   # 输入内容哈希（启用 hash_inputs 时计算）
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    @property
+    def ok(self):
+        """是否处理成功"""
+        return self.error is None
+
+    @property
+    def cancelled(self):
+        """是否因取消而未处理"""
+        return isinstance(self.error, OperationCancelled)
+
+
+class Pipeline:
+    """
+    有界队列流水线
+
+    每个阶段的多个工作线程从输入队列取出条目、处理后放入下一阶段的队列。
+    队列长度有限，上游阶段过快时会阻塞等待，整体吞吐量取决于最慢的阶段。
+    """
+
+    def __init__(self, recipe, output_dir=None, workers=None, process_stages=(),
+                 queue_size=8, reader=read_file, writer=write_file, output_path_func=None,
+                 hash_inputs=False, file_pool=None):
+        """
+        初始化流水线
+
+        参数:
+            recipe: 处理配方（见 recipe 模块）
+            output_dir: 输出目录（未指定 output_path_func 时使用）
+            workers: 各阶段工作线程数，如 {'read': 8, 'encode': 4}，未指定的使用默认值
+            process_stages: 使用进程池执行的阶段，可选 decode/transform/encode
+            queue_size: 阶段间队列的最大长度
+            reader: 读取函数 reader(source) -> bytes
+            writer: 写出函数 writer(output_path, data)
+            output_path_func: 输出路径函数 output_path_func(source) -> output_path
+            hash_inputs: 是否在读取阶段计算输入内容哈希（PipelineItem.content_hash）
+            file_pool: loader.FilePool（可选），限制默认读取/写出函数同时打开的文件数并统计读写量
+        """
+        self.recipe = normalize_recipe(recipe)
+        self.output_dir = output_dir
+        self.workers = dict(DEFAULT_WORKERS)
+        self.workers.update(workers or {})
+        for stage in process_stages:
+            if stage not in PROCESS_CAPABLE_STAGES:
+                raise ValueError(f"阶段 {stage} 不支持进程池")
+        self.process_stages = tuple(process_stages)
+        self.queue_size = queue_size
+        if file_pool is not None:
+            if reader is read_file:
+                reader = functools.partial(read_file, pool=file_pool)
+            if writer is write_file:
+                writer = functools.partial(write_file, pool=file_pool)
+        self.file_pool = file_pool
+        self.reader = reader
+        self.writer = writer
+        self.output_path_func = output_path_func or self.default_output_path
+        self.hash_inputs = hash_inputs
+
+        # 各阶段累计耗时（秒）和处理数量，用于定位瓶颈
+        self.stats = {stage: {'items': 0, 'seconds': 0.0} for stage in STAGES}
+        self._stats_lock = threading.Lock()
+
+    def default_output_path(self, source):
+        """输出目录 + 输出文件名（见 recipe.output_name）"""
+        return os.path.join(self.output_dir or '.', output_name(os.path.basename(str(source)), self.recipe))
+
+    def run(self, sources, cancel_token=None):
+        """
+        运行流水线
+
+        参数:
+            sources: 输入来源的可迭代对象（按需消费，可以是生成器）
+            cancel_token: 取消令牌；取消后未处理的条目以 OperationCancelled 结束
+
+        返回:
+            生成器，按完成顺序产出 PipelineItem；输出路径与之前的条目重复的条目以 ValueError 失败，
+            不会覆盖之前的输出
+
+        异常:
+            遍历 sources 或计算输出路径时出错，在已送入的条目全部处理完后抛出该异常
+        """
+        stop = threading.Event()
+
+        def stopped():
+            return stop.is_set() or (cancel_token is not None and cancel_token.cancelled)
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(STAGES) + 1)]
+        pools = {
+            stage: ProcessPoolExecutor(max_workers=self.workers[stage])
+            for stage in self.process_stages
+        }
+        threads = []
+        feed_errors = []
+
+        # 输入线程：按需从 sources 取出条目，受第一个队列的长度限制；
+        # 线程中的异常无法直接传给调用方，记录下来由 run 在队列排空后抛出
+        def feed():
+            output_paths = set()
+            try:
+                for source in sources:
+                    if stopped():
+                        break
+                    item = PipelineItem(source, self.output_path_func(source))
+                    if item.output_path in output_paths:
+                        item.error = ValueError(f"输出路径重复: {item.output_path}")
+                    output_paths.add(item.output_path)
+                    queues[0].put(item)
+            except Exception as e:
+                feed_errors.append(e)
+            finally:
+                for _ in range(self.workers[STAGES[0]]):
+                    queues[0].put(_DONE)
+
+        threads.append(threading.Thread(target=feed, name='pipeline-feed', daemon=True))
+
+        for index, stage in enumerate(STAGES):
+            remaining = [self.workers[stage]]
+            lock = threading.Lock()
+            next_count = self.workers[STAGES[index + 1]] if index + 1 < len(STAGES) else 1
+            for n in range(self.workers[stage]):
+                threads.append(threading.Thread(
+                    target=self._stage_worker,
+                    args=(stage, queues[index], queues[index + 1], pools.get(stage),
+                          stopped, remaining, lock, next_count),
+                    name=f'pipeline-{stage}-{n}', daemon=True
+                ))
+
+        for thread in threads:
+            thread.start()
+
+        results = queues[-1]
+        finished = False
+        try:
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    finished = True
+                    break
+                yield item
+        finally:
+            # 调用方提前停止迭代时，通知各阶段停止并排空队列，避免线程阻塞
+            if not finished:
+                stop.set()
+                while results.get() is not _DONE:
+                    pass
+            for thread in threads:
+                thread.join()
+            for pool in pools.values():
+                pool.shutdown()
+        if feed_errors:
+            raise feed_errors[0]
+
+    def _stage_worker(self, stage, in_queue, out_queue, pool, stopped, remaining, lock, next_count):
+        """阶段工作线程：处理条目直到收到结束标记，最后一个退出的线程通知下一阶段"""
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                break
+            if item.error is None:
+                if stopped():
+                    item.error = OperationCancelled()
+                    item.data = item.image = None
+                else:
+                    start = time.perf_counter()
+                    try:
+                        self._process(stage, item, pool)
+                    except Exception as e:
+                        item.error = e
+                        item.data = item.image = None
+                    with self._stats_lock:
+                        self.stats[stage]['items'] += 1
+                        self.stats[stage]['seconds'] += time.perf_counter() - start
+            out_queue.put(item)
+
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            for _ in range(next_count):
+                out_queue.put(_DONE)
+
+    def _process(self, stage, item, pool):
+        """执行单个阶段的处理"""
+        def call(func, *args):
+            if pool is not None:
+                return pool.submit(func, *args).result()
+            return func(*args)
+
+        if stage == 'read':
+            item.data = self.reader(item.source)
+            item.bytes_read = len(item.data)
+            if self.hash_inputs:
+                item.content_hash = content_hash(item.data)
+        elif stage == 'decode':
+            item.image = call(decode_bytes, item.data)
+            item.data = None
+        elif stage == 'transform':
+            item.image = call(transform_image, item.image, self.recipe)
+        elif stage == 'encode':
+            item.data = call(encode_image_for_recipe, item.image, self.recipe)
+            item.image = None
+        elif stage == 'write':
+            self.writer(item.output_path, item.data)
+            item.bytes_written = len(item.data)
+            item.data = None
+
+
+def run_batch(sources, recipe, output_dir, cancel_token=None, **options):
+    """
+    便捷函数：运行流水线并收集全部结果
+
+    参数:
+        sources: 输入文件路径列表
+        recipe: 处理配方
+        output_dir: 输出目录
+        cancel_token: 取消令牌
+        **options: 传递给 Pipeline 的其他参数
+
+    返回:
+        PipelineItem 列表
+    """
+    pipeline = Pipeline(recipe, output_dir, **options)
+    return list(pipeline.run(sources, cancel_token=cancel_token))
@@ -0,0 +1,397 @@
+"""
+图像头信息探测模块
+只读取文件头，按魔数识别格式并解析尺寸、颜色模式和 EXIF 方向，不创建解码器
+
+Image.open 虽然不会立即解码，但要依次尝试各个格式插件，并且一直持有文件句柄。
+批处理规划和文件夹视图只需要尺寸等信息，这里直接解析常见格式的文件头：
+PNG/GIF/BMP/WEBP 只需开头几十个字节；JPEG 逐个跳过标记段直到 SOF，
+只读取 EXIF 段的开头部分；TIFF 只读取第一个 IFD。
+其他格式回退到 Image.open（同样只读取文件头）。
+
+结果可以保存在 SQLite 索引中，按 (路径, 修改时间, 文件大小) 判断是否过期。
+
+用法:
+    python -m src.probe 目录 [--index probe.sqlite]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from .watcher import IMAGE_EXTENSIONS
+
+
+# 文件开头读取的字节数（足够识别所有格式并解析 PNG/GIF/BMP/WEBP 的尺寸）
+HEAD_SIZE = 64
+
+# EXIF 段最多读取的字节数（方向标签位于 IFD0，通常在前几百字节内）
+EXIF_READ_SIZE = 4096
+
+# EXIF 方向标签
+ORIENTATION_TAG = 0x0112
+
+# JPEG 的帧起始标记（SOF0-SOF15，不包括 DHT/JPG/DAC）
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+_PNG_MODES = {0: 'L', 2: 'RGB', 3: 'P', 4: 'LA', 6: 'RGBA'}
+_JPEG_MODES = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT PRIMARY KEY,
+    directory TEXT,
+    mtime_ns INTEGER,
+    size INTEGER,
+    info TEXT
+);
+CREATE INDEX IF NOT EXISTS probes_directory ON probes (directory);
+'''
+
+
+def sniff_format(head):
+    """
+    按魔数识别图像格式
+
+    参数:
+        head: 文件开头的字节
+
+    返回:
+        Pillow 格式名（如 'JPEG'），无法识别时返回None
+    """
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'JPEG'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'PNG'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'GIF'
+    if head.startswith(b'BM'):
+        return 'BMP'
+    if head[:4] in (b'II*\x00', b'MM\x00*'):
+        return 'TIFF'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def oriented_size(info):
+    """返回按 EXIF 方向旋转后的显示尺寸（方向 5-8 宽高互换）"""
+    if info.get('orientation', 1) in (5, 6, 7, 8):
+        return info['height'], info['width']
+    return info['width'], info['height']
+
+
+def _parse_png(head):
+    width, height, depth, color_type = struct.unpack('>IIBB', head[16:26])
+    mode = _PNG_MODES.get(color_type)
+    if depth == 16 and mode == 'L':
+        mode = 'I;16'
+    return width, height, mode
+
+
+def _parse_gif(head):
+    width, height = struct.unpack('<HH', head[6:10])
+    return width, height, 'P'
+
+
+def _parse_bmp(head):
+    header_size = struct.unpack('<I', head[14:18])[0]
+    if header_size == 12:
+        width, height = struct.unpack('<HH', head[18:22])
+        bits = struct.unpack('<H', head[24:26])[0]
+    else:
+        width, height = struct.unpack('<ii', head[18:26])
+        bits = struct.unpack('<H', head[28:30])[0]
+    mode = {1: '1', 4: 'P', 8: 'P'}.get(bits, 'RGB')
+    return width, abs(height), mode
+
+
+def _parse_webp(head):
+    chunk = head[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF, 'RGB'
+    if chunk == b'VP8L':
+        bits = struct.unpack('<I', head[21:25])[0]
+        mode = 'RGBA' if (bits >> 28) & 1 else 'RGB'
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, mode
+    if chunk == b'VP8X':
+        mode = 'RGBA' if head[20] & 0x10 else 'RGB'
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height, mode
+    raise ValueError("无法识别的 WEBP 数据块")
+
+
+def _tiff_ifd0(data, read_more=None):
+    """
+    解析 TIFF 结构的第一个 IFD
+
+    参数:
+        data: 从 TIFF 头开始的字节
+        read_more: 读取函数 read_more(offset, size) -> bytes，IFD 不在 data 中时使用（如 TIFF 文件）
+
+    返回:
+        {标签: 第一个值} 字典
+    """
+    endian = '<' if data[:2] == b'II' else '>'
+    offset = struct.unpack(endian + 'I', data[4:8])[0]
+    if offset + 2 > len(data) and read_more is not None:
+        data = data[:offset].ljust(offset, b'\0') + read_more(offset, 2 + 12 * 64)
+    count = struct.unpack(endian + 'H', data[offset:offset + 2])[0]
+    if offset + 2 + count * 12 > len(data) and read_more is not None:
+        data = data[:offset].ljust(offset, b'\0') + read_more(offset, 2 + 12 * count)
+
+    tags = {}
+    for i in range(count):
+        entry = data[offset + 2 + i * 12:offset + 14 + i * 12]
+        if len(entry) < 12:
+            break
+        tag, type_ = struct.unpack(endian + 'HH', entry[:4])
+        if type_ == 3:      # SHORT
+            tags[tag] = struct.unpack(endian + 'H', entry[8:10])[0]
+        elif type_ == 4:    # LONG
+            tags[tag] = struct.unpack(endian + 'I', entry[8:12])[0]
+    return tags
+
+
+def _parse_tiff(f, head):
+    def read_more(offset, size):
+        f.seek(offset)
+        return f.read(size)
+
+    tags = _tiff_ifd0(head, read_more)
+    samples = tags.get(0x0115, 1)
+    photometric = tags.get(0x0106)
+    if photometric == 5:
+        mode = 'CMYK'
+    elif samples >= 4:
+        mode = 'RGBA'
+    elif samples == 3:
+        mode = 'RGB'
+    else:
+        mode = '1' if tags.get(0x0102, 8) == 1 else 'L'
+    return tags[0x0100], tags[0x0101], mode, tags.get(ORIENTATION_TAG, 1)
+
+
+def _parse_jpeg(f):
+    """逐个跳过 JPEG 标记段直到 SOF，途中解析 EXIF 方向"""
+    orientation = 1
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError("JPEG 标记段损坏")
+        code = marker[1]
+        if code == 0xFF:        # 填充字节
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if code == 0x01 or 0xD0 <= code <= 0xD7:       # 无长度字段的标记
+            continue
+        length = struct.unpack('>H', f.read(2))[0]
+        if code in _SOF_MARKERS:
+            _, height, width, components = struct.unpack('>BHHB', f.read(6))
+            return width, height, _JPEG_MODES.get(components), orientation
+        if code == 0xE1:
+            segment = f.read(min(length - 2, EXIF_READ_SIZE))
+            if segment.startswith(b'Exif\x00\x00'):
+                try:
+                    orientation = _tiff_ifd0(segment[6:]).get(ORIENTATION_TAG, 1)
+                except struct.error:
+                    pass
+            f.seek(length - 2 - len(segment), os.SEEK_CUR)
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def probe(path, fallback=True):
+    """
+    探测图像文件的格式、尺寸、颜色模式和 EXIF 方向
+
+    参数:
+        path: 文件路径
+        fallback: 无法识别魔数时是否回退到 Image.open（只读取文件头）
+
+    返回:
+        {'format': 'JPEG', 'width': 4000, 'height': 3000, 'mode': 'RGB', 'orientation': 1}
+        宽高为文件中存储的尺寸，按方向旋转后的显示尺寸见 oriented_size
+
+    异常:
+        ValueError: 不是可识别的图像文件
+    """
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_SIZE)
+        image_format = sniff_format(head)
+        orientation = 1
+        try:
+            if image_format == 'JPEG':
+                width, height, mode, orientation = _parse_jpeg(f)
+            elif image_format == 'PNG':
+                width, height, mode = _parse_png(head)
+            elif image_format == 'GIF':
+                width, height, mode = _parse_gif(head)
+            elif image_format == 'BMP':
+                width, height, mode = _parse_bmp(head)
+            elif image_format == 'WEBP':
+                width, height, mode = _parse_webp(head)
+            elif image_format == 'TIFF':
+                width, height, mode, orientation = _parse_tiff(f, head)
+            else:
+                width = None
+        except (struct.error, KeyError, ValueError):
+            width = None
+
+    if width is None:
+        if not fallback:
+            raise ValueError(f"无法识别的图像文件: {path}")
+        try:
+            with Image.open(path) as image:
+                image_format, (width, height), mode = image.format, image.size, image.mode
+                orientation = image.getexif().get(ORIENTATION_TAG, 1)
+        except Exception as e:
+            raise ValueError(f"无法识别的图像文件: {path}") from e
+    return {'format': image_format, 'width': width, 'height': height, 'mode': mode, 'orientation': orientation}
+
+
+class ProbeIndex:
+    """探测结果的 SQLite 索引"""
+
+    def __init__(self, db_path):
+        """
+        参数:
+            db_path: SQLite 文件路径
+        """
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        """关闭索引"""
+        self._conn.close()
+
+    def probe_many(self, paths, workers=8, commit_every=1000):
+        """
+        探测多个文件，未过期的结果直接从索引读取
+
+        探测主要是小块随机读取，使用线程池掩盖 I/O 延迟。
+
+        参数:
+            paths: 文件路径列表
+            workers: 探测线程数
+            commit_every: 每探测多少个文件提交一次
+
+        返回:
+            ({路径: 探测结果}, {路径: 错误信息})
+        """
+        rows = {}
+        for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+            for path, mtime_ns, size, info in self._conn.execute(
+                'SELECT path, mtime_ns, size, info FROM probes WHERE directory = ?', (directory,)
+            ):
+                rows[path] = (mtime_ns, size, info)
+
+        results = {}
+        errors = {}
+        todo = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                errors[path] = str(e)
+                continue
+            row = rows.get(os.path.abspath(path))
+            if row is not None and row[:2] == (stat.st_mtime_ns, stat.st_size):
+                results[path] = json.loads(row[2])
+            else:
+                todo.append((path, stat.st_mtime_ns, stat.st_size))
+
+        def job(item):
+            try:
+                return item, probe(item[0]), None
+            except ValueError as e:
+                return item, None, str(e)
+
+        pending = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for (path, mtime_ns, size), info, error in pool.map(job, todo):
+                if info is None:
+                    errors[path] = error
+                    continue
+                results[path] = info
+                absolute = os.path.abspath(path)
+                pending.append((absolute, os.path.dirname(absolute), mtime_ns, size, json.dumps(info)))
+                if len(pending) >= commit_every:
+                    self._store(pending)
+                    pending = []
+        self._store(pending)
+        return results, errors
+
+    def _store(self, rows):
+        """批量写入探测结果"""
+        if rows:
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO probes (path, directory, mtime_ns, size, info) VALUES (?, ?, ?, ?, ?)',
+                    rows
+                )
+
+
+def scan_directory(directory, recursive=True):
+    """
+    列出目录中的图像文件
+
+    参数:
+        directory: 目录路径
+        recursive: 是否递归子目录
+
+    返回:
+        文件路径列表
+    """
+    paths = []
+    stack = [directory]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                    paths.append(entry.path)
+    return sorted(paths)
+
+
+def main(argv=None):
+    """命令行入口：以 JSON Lines 输出每个文件的探测结果"""
+    parser = argparse.ArgumentParser(description="探测目录中图像文件的格式和尺寸（只读取文件头）")
+    parser.add_argument('directory', help="要扫描的目录")
+    parser.add_argument('--index', help="SQLite 索引文件，重复扫描时跳过未变化的文件")
+    parser.add_argument('--no-recursive', action='store_true', help="不扫描子目录")
+    parser.add_argument('--workers', type=int, default=8, help="探测线程数")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    paths = scan_directory(args.directory, recursive=not args.no_recursive)
+    index = ProbeIndex(args.index or ':memory:')
+    try:
+        results, errors = index.probe_many(paths, workers=args.workers)
+    finally:
+        index.close()
+
+    for path in paths:
+        if path in results:
+            print(json.dumps(dict(results[path], path=path), ensure_ascii=False))
+    for path, error in errors.items():
+        print(f"{path}: {error}", file=sys.stderr)
+    print(f"{len(results)} 个文件, {len(errors)} 个错误, 用时 {time.perf_counter() - start:.2f} 秒",
+          file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
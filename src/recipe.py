@@ -0,0 +1,178 @@
+"""
+处理配方模块
+用可序列化为JSON的字典描述一组裁剪/调整/压缩操作，供批处理等非交互场景复用
+
+配方格式:
+    {
+        'steps': [
+            {'op': 'trim', 'tolerance': 10, 'padding': 0},      # 去除均匀边框
+            {'op': 'center_crop', 'width': 800, 'height': 800},   # 'auto': True 按显著区域确定中心
+            {'op': 'crop', 'x1': 0, 'y1': 0, 'x2': 400, 'y2': 300},
+            {'op': 'resize', 'width': 400, 'height': 400, 'mode': 'pad'},
+        ],
+        'format': 'JPEG',          # 输出格式
+        'quality': 95,             # 输出质量（未指定目标大小时使用）
+        'target_size_kb': None,    # 目标文件大小，指定时使用 compress_to_bytes
+        'tolerance': 0.0,          # 目标大小的提前结束容差
+    }
+"""
+
+import hashlib
+import json
+import os
+
+from . import image_processor
+
+
+# 配方默认值
+DEFAULT_RECIPE = {
+    'steps': [],
+    'format': 'JPEG',
+    'quality': 95,
+    'target_size_kb': None,
+    'tolerance': 0.0,
+}
+
+# 支持的尺寸调整模式
+RESIZE_MODES = ('stretch', 'crop', 'pad')
+
+
+def normalize_recipe(recipe):
+    """
+    补全配方默认值并校验操作
+
+    参数:
+        recipe: 配方字典（可缺省部分字段）
+
+    返回:
+        补全后的新配方字典
+    """
+    result = dict(DEFAULT_RECIPE)
+    result.update(recipe or {})
+    result['steps'] = [dict(step) for step in result['steps']]
+    result['format'] = result['format'].upper()
+    if result['format'] == 'JPG':
+        result['format'] = 'JPEG'
+
+    for step in result['steps']:
+        op = step.get('op')
+        if op not in ('trim', 'crop', 'center_crop', 'resize'):
+            raise ValueError(f"未知的配方操作: {op}")
+        if op == 'resize' and step.get('mode', 'stretch') not in RESIZE_MODES:
+            raise ValueError(f"未知的尺寸调整模式: {step.get('mode')}")
+    return result
+
+
+def load_recipe(file_path):
+    """
+    从JSON文件加载配方
+
+    参数:
+        file_path: 配方文件路径
+
+    返回:
+        补全后的配方字典
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return normalize_recipe(json.load(f))
+
+
+def recipe_hash(recipe):
+    """
+    计算配方的哈希值（字段顺序无关，缺省字段按默认值计算）
+
+    参数:
+        recipe: 配方字典
+
+    返回:
+        十六进制哈希字符串
+    """
+    canonical = json.dumps(normalize_recipe(recipe), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def apply_steps(image, recipe, cancel_token=None):
+    """
+    依次执行配方中的裁剪/尺寸调整操作
+
+    参数:
+        image: PIL.Image对象
+        recipe: 配方字典
+        cancel_token: 取消令牌（每步之前检查）
+
+    返回:
+        处理后的PIL.Image对象
+    """
+    for step in recipe['steps']:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+
+        op = step['op']
+        if op == 'trim':
+            image = image_processor.auto_trim(image, step.get('tolerance', 10), padding=step.get('padding', 0))
+        elif op == 'crop':
+            image = image_processor.crop_image(image, step['x1'], step['y1'], step['x2'], step['y2'])
+        elif op == 'center_crop':
+            if step.get('auto') and step.get('center_x') is None and step.get('center_y') is None:
+                image = image_processor.auto_center_crop(image, step['width'], step['height'])
+            else:
+                image = image_processor.center_crop(
+                    image, step['width'], step['height'],
+                    step.get('center_x'), step.get('center_y')
+                )
+        elif op == 'resize':
+            mode = step.get('mode', 'stretch')
+            width, height = step['width'], step['height']
+            if mode == 'crop':
+                image = image_processor.resize_with_crop(image, width, height)
+            elif mode == 'pad':
+                image = image_processor.resize_with_pad(image, width, height)
+            else:
+                image = image_processor.resize_image(image, (width, height))
+    return image
+
+
+def encode_output(image, recipe, cancel_token=None):
+    """
+    按配方的输出设置编码图像
+
+    参数:
+        image: PIL.Image对象
+        recipe: 配方字典
+        cancel_token: 取消令牌
+
+    返回:
+        编码后的bytes
+    """
+    if recipe.get('target_size_kb'):
+        return image_processor.compress_to_bytes(
+            image, recipe['target_size_kb'], recipe['format'],
+            cancel_token=cancel_token, tolerance=recipe.get('tolerance', 0.0)
+        )
+    return image_processor.encode_image(image, recipe['format'], recipe['quality'])
+
+
+def output_extension(recipe):
+    """返回配方输出格式对应的文件扩展名"""
+    return image_processor.FORMAT_EXTENSIONS.get(recipe['format'], '.' + recipe['format'].lower())
+
+
+def output_name(name, recipe):
+    """
+    返回输出文件名（或对象键）：扩展名换成配方输出格式的扩展名
+
+    源扩展名与输出扩展名不同时保留在文件名中（a.png -> a.png.jpg），
+    否则 a.png 和 a.jpg 会得到同一个输出名，后写出的静默覆盖先写出的。
+
+    参数:
+        name: 源文件的相对路径、归档成员名或对象键
+        recipe: 处理配方
+
+    返回:
+        输出名
+    """
+    extension = output_extension(recipe)
+    stem, source_extension = os.path.splitext(name)
+    if source_extension.lower() == extension:
+        return stem + extension
+    return name + extension
@@ -0,0 +1,237 @@
+"""
+多规格输出模块
+一次解码源图像，构建共享的降采样金字塔，每个输出规格从最接近的金字塔层级派生并并行编码
+
+规格格式:
+    {
+        'name': 'thumb',           # 规格名称（用于结果字典和输出文件名）
+        'width': 300,
+        'height': 300,
+        'mode': 'crop',            # crop/pad/fit/stretch
+        'format': 'JPEG',
+        'quality': 90,             # 未指定目标大小时使用
+        'target_size_kb': None,    # 指定时使用 compress_to_bytes
+    }
+"""
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from . import image_processor, loader
+
+
+# 支持的规格模式（fit：等比缩放到框内，不填充）
+RENDITION_MODES = ('crop', 'pad', 'fit', 'stretch')
+
+# 金字塔可直接处理的模式，其他模式先转换
+_PYRAMID_MODES = ('RGB', 'RGBA', 'L', 'LA')
+
+
+def required_scale(source_size, spec):
+    """
+    计算规格相对源图像需要的缩放比例
+
+    参数:
+        source_size: 源图像 (宽, 高)
+        spec: 规格字典
+
+    返回:
+        (横向比例, 纵向比例)
+    """
+    width, height = source_size
+    scale_w = spec['width'] / width
+    scale_h = spec['height'] / height
+    mode = spec.get('mode', 'crop')
+    if mode == 'crop':
+        scale = max(scale_w, scale_h)
+        return scale, scale
+    if mode in ('pad', 'fit'):
+        scale = min(scale_w, scale_h)
+        return scale, scale
+    return scale_w, scale_h
+
+
+class ImagePyramid:
+    """
+    降采样金字塔
+
+    第0层为源图像，之后每层用 Image.reduce(2) 对上一层做 2x2 盒式降采样，按需生成并缓存。
+    可以在多个线程中同时使用。
+    """
+
+    def __init__(self, image):
+        """
+        参数:
+            image: 已解码的PIL.Image对象
+        """
+        image = image_processor.normalize_mode(image)
+        if image.mode not in _PYRAMID_MODES:
+            has_alpha = 'transparency' in image.info or image.mode in ('PA', 'RGBa')
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        self.levels = [image]
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        """源图像尺寸"""
+        return self.levels[0].size
+
+    def level_for(self, scale_w, scale_h):
+        """
+        返回能满足缩放比例的最小层级
+
+        层级尺寸不小于目标尺寸，最终的 LANCZOS 缩放始终是缩小，不会放大降采样后的图像。
+
+        参数:
+            scale_w, scale_h: 相对源图像的缩放比例
+
+        返回:
+            PIL.Image对象
+        """
+        width, height = self.size
+        target_w = width * scale_w
+        target_h = height * scale_h
+        index = 0
+        while True:
+            next_w, next_h = width >> (index + 1), height >> (index + 1)
+            if next_w < target_w or next_h < target_h or next_w < 1 or next_h < 1:
+                break
+            index += 1
+        with self._lock:
+            while len(self.levels) <= index:
+                self.levels.append(self.levels[-1].reduce(2))
+            return self.levels[index]
+
+
+def render(pyramid, spec):
+    """
+    从金字塔生成单个规格的图像
+
+    参数:
+        pyramid: ImagePyramid对象
+        spec: 规格字典
+
+    返回:
+        PIL.Image对象
+    """
+    mode = spec.get('mode', 'crop')
+    if mode not in RENDITION_MODES:
+        raise ValueError(f"未知的规格模式: {mode}")
+
+    base = pyramid.level_for(*required_scale(pyramid.size, spec))
+    width, height = spec['width'], spec['height']
+    if mode == 'crop':
+        return image_processor.resize_with_crop(base, width, height)
+    if mode == 'pad':
+        return image_processor.resize_with_pad(base, width, height)
+    if mode == 'fit':
+        scale = min(width / base.width, height / base.height, 1.0)
+        size = (max(1, int(base.width * scale)), max(1, int(base.height * scale)))
+        return base.resize(size, Image.LANCZOS) if size != base.size else base
+    return base.resize((width, height), Image.LANCZOS)
+
+
+def encode_rendition(image, spec):
+    """按规格的输出设置编码图像"""
+    format = spec.get('format', 'JPEG').upper()
+    if spec.get('target_size_kb'):
+        return image_processor.compress_to_bytes(image, spec['target_size_kb'], format)
+    return image_processor.encode_image(image, format, spec.get('quality', 90))
+
+
+def open_for_renditions(source, specs):
+    """
+    打开并解码源图像
+
+    对 JPEG 源使用 draft 模式，在 DCT 阶段直接按 1/2、1/4、1/8 缩小解码，
+    前提是缩小后仍不小于所有规格需要的最大尺寸。
+
+    参数:
+        source: 文件路径、bytes 或已打开的PIL.Image对象
+        specs: 规格字典列表
+
+    返回:
+        已解码的PIL.Image对象
+    """
+    if isinstance(source, Image.Image):
+        source.load()
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        image = image_processor.load_image(io.BytesIO(source))
+    else:
+        image = loader.load_image(source)
+    if image.format == 'JPEG' and specs:
+        need_w = need_h = 0
+        for spec in specs:
+            scale_w, scale_h = required_scale(image.size, spec)
+            need_w = max(need_w, image.width * scale_w)
+            need_h = max(need_h, image.height * scale_h)
+        image.draft(image.mode, (int(need_w) + 1, int(need_h) + 1))
+    image.load()
+    return image
+
+
+def generate_renditions(source, specs, workers=None):
+    """
+    生成全部规格
+
+    参数:
+        source: 文件路径、bytes 或PIL.Image对象
+        specs: 规格字典列表
+        workers: 并行编码的线程数（默认为规格数量与CPU核心数中较小者）
+
+    返回:
+        {规格名称: 编码后的bytes} 字典
+    """
+    names = [spec['name'] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("规格名称不能重复")
+
+    pyramid = ImagePyramid(open_for_renditions(source, specs))
+
+    # 金字塔层级在主线程中按需生成，之后的缩放和编码并行执行
+    for spec in specs:
+        pyramid.level_for(*required_scale(pyramid.size, spec))
+
+    def build(spec):
+        return encode_rendition(render(pyramid, spec), spec)
+
+    workers = workers or min(len(specs), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        encoded = list(pool.map(build, specs))
+    return dict(zip(names, encoded))
+
+
+def write_renditions(source, specs, output_dir, basename=None, workers=None):
+    """
+    生成全部规格并写入输出目录
+
+    文件名为 "<basename>_<规格名称><扩展名>"。
+
+    参数:
+        source: 文件路径、bytes 或PIL.Image对象
+        specs: 规格字典列表
+        output_dir: 输出目录
+        basename: 输出文件名前缀（默认取源文件名）
+        workers: 并行编码的线程数
+
+    返回:
+        {规格名称: 输出路径} 字典
+    """
+    if basename is None:
+        basename = os.path.splitext(os.path.basename(source))[0] if isinstance(source, str) else 'image'
+    os.makedirs(output_dir, exist_ok=True)
+
+    renditions = generate_renditions(source, specs, workers)
+    paths = {}
+    for spec in specs:
+        extension = image_processor.FORMAT_EXTENSIONS.get(spec.get('format', 'JPEG').upper(), '.img')
+        path = os.path.join(output_dir, f"{basename}_{spec['name']}{extension}")
+        with open(path, 'wb') as f:
+            f.write(renditions[spec['name']])
+        paths[spec['name']] = path
+    return paths
@@ -0,0 +1,466 @@
+"""
+本地 HTTP 服务模块
+以 HTTP 接口提供居中裁剪、尺寸调整和压缩，供其他服务调用（只使用标准库 http.server）
+
+接口（请求体为图像字节，响应体为处理后的图像字节）:
+    POST /center_crop?width=800&height=800[&x=..&y=..][&auto=1]
+    POST /resize?width=400&height=300&mode=crop|pad|stretch
+    POST /compress?target_kb=200
+    GET  /metrics     Prometheus 文本格式的请求数、队列和延迟直方图
+    GET  /health
+所有 POST 接口都接受 format、quality、target_kb 参数。
+
+连接使用 HTTP/1.1 keep-alive；正在处理和排队的请求总数有上限，超出时不读取请求体，
+立即返回 503 并关闭连接；并发连接数（即处理线程数）也有上限，空闲连接超时后关闭。
+图像处理在进程池中执行，不受 GIL 限制。
+
+无法解码的图像和不适用于该图像的参数返回 422；进程池损坏或内存不足返回 503，其他服务端错误返回 500。
+
+用法:
+    python -m src.service --port 8080 --workers 4
+"""
+
+import argparse
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from PIL import Image
+
+from .pipeline import decode_bytes
+from .recipe import normalize_recipe, apply_steps, encode_output
+
+
+# 延迟直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 默认排队的请求数上限（不含正在处理的）
+DEFAULT_QUEUE_SIZE = 32
+
+# 请求体大小上限（字节）
+MAX_BODY_SIZE = 100 * 1024 * 1024
+
+# 默认并发连接数上限（每个连接一个线程）
+DEFAULT_MAX_CONNECTIONS = 64
+
+# keep-alive 连接的空闲超时（秒）
+IDLE_TIMEOUT = 30
+
+# 连接数超出上限时直接写回的响应
+_CONNECTION_REJECTED = (
+    b'HTTP/1.1 503 Service Unavailable\r\n'
+    b'Content-Type: text/plain\r\nContent-Length: 16\r\nRetry-After: 1\r\nConnection: close\r\n\r\n'
+    b'too many clients'
+)
+
+# 丢弃未读取的请求体时每次读取的字节数
+_DISCARD_CHUNK = 64 * 1024
+
+ENDPOINTS = ('center_crop', 'resize', 'compress')
+
+
+class LatencyHistogram:
+    """累积延迟直方图（线程安全）"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """记录一次耗时"""
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def render(self, name, labels):
+        """输出 Prometheus 文本格式的行"""
+        with self._lock:
+            lines = []
+            total = 0
+            for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+                total += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+            lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+            lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+def _int_param(query, name, default=None):
+    """读取整数查询参数，缺少必需参数或格式错误时抛出 ValueError"""
+    values = query.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f"缺少参数: {name}")
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise ValueError(f"参数 {name} 应为整数: {values[0]}")
+
+
+def build_endpoint_recipe(endpoint, query):
+    """
+    由接口和查询参数构建处理配方
+
+    参数:
+        endpoint: 接口名（见 ENDPOINTS）
+        query: parse_qs 解析的查询参数
+
+    返回:
+        配方字典
+
+    异常:
+        ValueError: 参数缺失或无效
+    """
+    if endpoint == 'center_crop':
+        step = {'op': 'center_crop', 'width': _int_param(query, 'width'), 'height': _int_param(query, 'height')}
+        if 'x' in query or 'y' in query:
+            step['center_x'] = _int_param(query, 'x')
+            step['center_y'] = _int_param(query, 'y')
+        elif query.get('auto', ['0'])[0] not in ('0', 'false', ''):
+            step['auto'] = True
+        steps = [step]
+    elif endpoint == 'resize':
+        steps = [{
+            'op': 'resize',
+            'width': _int_param(query, 'width'),
+            'height': _int_param(query, 'height'),
+            'mode': query.get('mode', ['crop'])[0],
+        }]
+    else:
+        steps = []
+
+    recipe = {'steps': steps}
+    if 'format' in query:
+        recipe['format'] = query['format'][0]
+    if 'quality' in query:
+        recipe['quality'] = _int_param(query, 'quality')
+    if 'target_kb' in query:
+        try:
+            recipe['target_size_kb'] = float(query['target_kb'][0])
+        except ValueError:
+            raise ValueError(f"参数 target_kb 应为数字: {query['target_kb'][0]}")
+    elif endpoint == 'compress':
+        raise ValueError("缺少参数: target_kb")
+    recipe = normalize_recipe(recipe)
+    Image.init()
+    if recipe['format'] not in Image.SAVE:
+        raise ValueError(f"不支持的输出格式: {recipe['format']}")
+    return recipe
+
+
+class InvalidImageError(ValueError):
+    """请求的图像无法解码，或处理参数不适用于该图像（返回 422）"""
+
+
+def _process_body(data, recipe):
+    """
+    进程池任务：按配方处理一个请求的图像
+
+    解码错误（内存不足除外）和参数不适用于该图像的 ValueError 来自请求内容，转换为 InvalidImageError；
+    编码输出时的 OSError、MemoryError 等属于服务端故障，原样抛出。
+
+    返回:
+        输出图像的编码字节
+    """
+    try:
+        image = decode_bytes(data)
+    except MemoryError:
+        raise
+    except Exception as e:
+        raise InvalidImageError(str(e)) from None
+    try:
+        image = apply_steps(image, recipe)
+        return encode_output(image, recipe)
+    except ValueError as e:
+        raise InvalidImageError(str(e)) from None
+
+
+class _BoundedHTTPServer(ThreadingHTTPServer):
+    """并发连接数有上限的 ThreadingHTTPServer：超出上限时回复 503 并关闭，不为该连接创建线程"""
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, max_connections):
+        super().__init__(address, handler)
+        self._connections = threading.BoundedSemaphore(max_connections)
+
+    def process_request(self, request, client_address):
+        if not self._connections.acquire(blocking=False):
+            self.service.count_rejected_connection()
+            try:
+                request.sendall(_CONNECTION_REJECTED)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._connections.release()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理（每个连接一个线程，由 _BoundedHTTPServer 创建）"""
+
+    protocol_version = 'HTTP/1.1'   # 默认保持连接
+    timeout = IDLE_TIMEOUT
+
+    def log_message(self, format, *args):
+        if self.server.service.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        service = self.server.service
+        if path == '/metrics':
+            self._respond(200, service.render_metrics().encode('utf-8'), 'text/plain; version=0.0.4')
+        elif path == '/health':
+            self._respond(200, b'{"status": "ok"}', 'application/json')
+        else:
+            self._respond(404, b'not found', 'text/plain')
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = self._content_length()
+        if length is None:
+            # 无法确定请求体的边界，连接上的后续数据也无法解析
+            self.close_connection = True
+            self._respond(400, b'invalid Content-Length', 'text/plain')
+            return
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True
+            self._respond(413, b'request body too large', 'text/plain')
+            return
+
+        # 请求体只在取得处理名额后才读取，排队已满时不为被拒绝的上传占用内存
+        body_read = []
+
+        def read_body():
+            body_read.append(True)
+            try:
+                return self.rfile.read(length)
+            except OSError:
+                self.close_connection = True   # 读取超时，请求体只读了一部分
+                raise
+
+        status, payload, content_type = self.server.service.handle(
+            url.path.strip('/'), parse_qs(url.query), read_body
+        )
+        headers = {}
+        if status == 503:
+            headers['Retry-After'] = '1'
+        if not body_read:
+            if status == 503:
+                self.close_connection = True
+            else:
+                # 参数错误等情况下丢弃请求体，保证同一连接上的下一个请求能正确解析
+                self._discard_body(length)
+        self._respond(status, payload, content_type, headers)
+
+    def _content_length(self):
+        """请求体长度；没有 Content-Length 时为 0，格式错误或为负数时返回None"""
+        value = self.headers.get('Content-Length')
+        if value is None:
+            return 0
+        try:
+            length = int(value)
+        except ValueError:
+            return None
+        return length if length >= 0 else None
+
+    def _discard_body(self, length):
+        """分块读取并丢弃请求体"""
+        while length > 0:
+            chunk = self.rfile.read(min(length, _DISCARD_CHUNK))
+            if not chunk:
+                break
+            length -= len(chunk)
+
+    def _respond(self, status, payload, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class ImageService:
+    """
+    图像处理 HTTP 服务
+
+    属性:
+        address: 实际监听的 (主机, 端口)（端口为 0 时由系统分配）
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080, workers=None, queue_size=DEFAULT_QUEUE_SIZE,
+                 processes=True, verbose=False, max_connections=DEFAULT_MAX_CONNECTIONS):
+        """
+        参数:
+            host: 监听地址（默认只监听本机）
+            port: 监听端口，0 表示由系统分配
+            workers: 处理进程数（默认为CPU核心数）
+            queue_size: 排队请求数上限，超出时返回 503
+            processes: 是否使用进程池（False 时使用线程池，便于调试）
+            verbose: 是否输出访问日志
+            max_connections: 并发连接数上限，超出时新连接收到 503 并被关闭
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.verbose = verbose
+        pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self._pool = pool_class(max_workers=self.workers)
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._requests = {}      # (接口, 状态码) -> 次数
+        self._rejected = 0
+        self._rejected_connections = 0
+        self._latency = {endpoint: LatencyHistogram() for endpoint in ENDPOINTS}
+        self._server = _BoundedHTTPServer((host, port), _RequestHandler, max_connections)
+        self._server.service = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def handle(self, endpoint, query, body):
+        """
+        处理一个 POST 请求
+
+        参数:
+            endpoint: 接口名
+            query: parse_qs 解析的查询参数
+            body: 请求体字节，或返回请求体字节的函数（参数有效且取得处理名额后才调用）
+
+        返回:
+            (状态码, 响应体, Content-Type)
+        """
+        if endpoint not in ENDPOINTS:
+            return self._finish(endpoint, 404, b'not found', 'text/plain')
+        try:
+            recipe = build_endpoint_recipe(endpoint, query)
+        except ValueError as e:
+            return self._finish(endpoint, 400, str(e).encode('utf-8'), 'text/plain; charset=utf-8')
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            return self._finish(endpoint, 503, b'queue full', 'text/plain')
+        start = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            if callable(body):
+                body = body()
+            data = self._pool.submit(_process_body, body, recipe).result()
+            status, content_type = 200, Image.MIME.get(recipe['format'], 'application/octet-stream')
+        except InvalidImageError as e:
+            status, data, content_type = 422, str(e).encode('utf-8'), 'text/plain; charset=utf-8'
+        except (BrokenExecutor, MemoryError) as e:
+            # 工作进程崩溃（多为内存不足被系统终止）或内存不足，稍后重试可能成功
+            status, data, content_type = 503, f'{type(e).__name__}: {e}'.encode('utf-8'), 'text/plain; charset=utf-8'
+        except Exception as e:
+            status, data, content_type = 500, f'{type(e).__name__}: {e}'.encode('utf-8'), 'text/plain; charset=utf-8'
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+        self._latency[endpoint].observe(time.perf_counter() - start)
+        return self._finish(endpoint, status, data, content_type)
+
+    def count_rejected_connection(self):
+        """记录一次因连接数超出上限而拒绝的连接"""
+        with self._lock:
+            self._rejected_connections += 1
+
+    def _finish(self, endpoint, status, payload, content_type):
+        with self._lock:
+            key = (endpoint if endpoint in ENDPOINTS else 'other', status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+        return status, payload, content_type
+
+    def render_metrics(self):
+        """返回 Prometheus 文本格式的指标"""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            in_flight, rejected = self._in_flight, self._rejected
+            rejected_connections = self._rejected_connections
+        lines = ['# TYPE image_service_requests_total counter']
+        for (endpoint, status), count in requests:
+            lines.append(f'image_service_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        lines += [
+            '# TYPE image_service_in_flight gauge',
+            f'image_service_in_flight {in_flight}',
+            '# TYPE image_service_rejected_total counter',
+            f'image_service_rejected_total {rejected}',
+            '# TYPE image_service_rejected_connections_total counter',
+            f'image_service_rejected_connections_total {rejected_connections}',
+            '# TYPE image_service_request_seconds histogram',
+        ]
+        for endpoint, histogram in self._latency.items():
+            lines += histogram.render('image_service_request_seconds', f'endpoint="{endpoint}"')
+        return '\n'.join(lines) + '\n'
+
+    def start(self):
+        """在后台线程中开始服务，返回监听地址"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='image-service', daemon=True)
+        self._thread.start()
+        return self.address
+
+    def serve_forever(self):
+        """在当前线程中服务直到 shutdown"""
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """停止服务并关闭进程池"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+        self._pool.shutdown()
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='本地图像处理 HTTP 服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8080, help='监听端口')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='处理进程数')
+    parser.add_argument('--queue', type=int, default=DEFAULT_QUEUE_SIZE, help='排队请求数上限')
+    parser.add_argument('--max-connections', type=int, default=DEFAULT_MAX_CONNECTIONS, help='并发连接数上限')
+    parser.add_argument('--verbose', action='store_true', help='输出访问日志')
+    args = parser.parse_args(argv)
+
+    service = ImageService(args.host, args.port, args.workers, args.queue, verbose=args.verbose,
+                           max_connections=args.max_connections)
+    host, port = service.address
+    print(json.dumps({'listening': f'http://{host}:{port}', 'workers': service.workers}), file=sys.stderr)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
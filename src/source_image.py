@@ -0,0 +1,227 @@
+"""
+原始图像模块
+保存打开的源图像，供重置和预览对比使用
+
+在整个会话中保留完整解码的原图，对大尺寸 TIFF/PNG 来说要多占用一帧内存。
+SourceImage 可以只保留源文件的编码字节（或文件的内存映射）和一张显示分辨率的代理图，
+预览直接使用代理图，只有真正执行重置时才重新解码完整原图。
+覆盖保存到源文件之前必须先调用 detach_file，把编码数据复制到内存中。
+"""
+
+import io
+import mmap
+import weakref
+
+from PIL import Image
+
+from . import image_processor, loader
+from .image_cache import CachedImage, cache_key
+
+
+# 原图保留方式
+KEEP_DECODED = 'decoded'   # 保留解码后的图像（占用内存最多，重置最快）
+KEEP_BYTES = 'bytes'       # 保留源文件的编码字节
+KEEP_MMAP = 'mmap'         # 内存映射源文件（由操作系统按需换入换出）
+KEEP_MODES = (KEEP_DECODED, KEEP_BYTES, KEEP_MMAP)
+
+# 代理图的最大边长（足够覆盖预览窗口）
+DEFAULT_PROXY_SIZE = 1600
+
+
+class SourceImage:
+    """
+    打开的源图像
+
+    属性:
+        path: 源文件路径
+        keep: 原图保留方式
+        size: 原图尺寸 (宽, 高)，第一次解码后可用
+        proxy: 显示分辨率的代理图（最大边长不超过 proxy_size），第一次解码后可用
+        entry: 有缓存时，最近一次解码得到的图像及其显示金字塔（CachedImage，不在缓存中），
+               原图被编辑替换后由 entry_for 释放
+    """
+
+    def __init__(self, path, keep=KEEP_DECODED, proxy_size=DEFAULT_PROXY_SIZE, cache=None):
+        """
+        参数:
+            path: 源文件路径
+            keep: 原图保留方式，见 KEEP_MODES
+            proxy_size: 代理图的最大边长
+            cache: 解码图像缓存（ImageCache，可选），打开时从缓存中取出，close 时才放回，
+                   正在编辑的原图不会留在缓存中
+        """
+        if keep not in KEEP_MODES:
+            raise ValueError(f"未知的原图保留方式: {keep}")
+        self.path = path
+        self.keep = keep
+        self.proxy_size = proxy_size
+        self.size = None
+        self.proxy = None
+        self._image = None
+        self._data = None
+        self._mmap = None
+        self._decoded = None
+        self.entry = None
+        self.cache = cache
+        self._key = cache_key(path) if cache is not None else None
+
+    def _keep_encoded(self):
+        """
+        读取（或映射）源文件的编码数据，已有时不再读取
+
+        在缓存未命中、需要解码时才调用：先保存编码数据再解码，保证之后重新解码得到的与第一次完全相同。
+        """
+        if self.keep == KEEP_DECODED or self._data is not None or self._mmap is not None:
+            return
+        with open(self.path, 'rb') as f:
+            if self.keep == KEEP_MMAP:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._data = f.read()
+
+    def decode(self):
+        """
+        返回完整原图
+
+        保留方式为 decoded 时第一次解码后一直保存；其他方式下若上次解码的图像仍被引用
+        （例如尚未编辑就重置）则直接复用，不再被引用时从编码字节或内存映射重新解码。
+        缓存命中时不读取文件：bytes 方式沿用条目保存的编码字节，mmap 方式在第一次需要重新解码时才映射。
+
+        返回:
+            PIL.Image对象（完全不透明的RGBA已转为RGB）
+        """
+        if self._image is not None:
+            return self._image
+        image = self._decoded() if self._decoded is not None else None
+        if image is not None:
+            return image
+
+        entry = self.cache.take(self.path) if self.cache is not None else None
+        if entry is not None and entry.key == self._key:
+            image = entry.image
+            if self.keep == KEEP_BYTES and self._data is None:
+                self._data = entry.data
+        else:
+            entry = None
+            self._keep_encoded()
+            if self._mmap is not None:
+                self._mmap.seek(0)
+                image = image_processor.load_image(self._mmap)
+            elif self._data is not None:
+                image = image_processor.load_image(io.BytesIO(self._data))
+            else:
+                image = loader.load_image(self.path)
+            image.load()
+            image = image_processor.normalize_mode(image)
+            if self.cache is not None:
+                entry = CachedImage(self._key, image, self._data)
+
+        if self.size is None:
+            self.size = image.size
+            if self.keep == KEEP_DECODED:
+                self.proxy = image
+            else:
+                self.proxy = make_proxy(image, self.proxy_size, entry.pyramid if entry else None)
+        if self.keep == KEEP_DECODED:
+            self._image = image
+        self._decoded = weakref.ref(image)
+        self.entry = entry
+        return image
+
+    def entry_for(self, image):
+        """
+        返回保存了指定图像的条目（用于显示金字塔）
+
+        image 已不是解码得到的原图（已被编辑）时释放条目，之后原图只由编码字节保留。
+
+        返回:
+            CachedImage对象或None
+        """
+        if self.entry is not None and self.entry.image is not image:
+            self.entry = None
+        return self.entry
+
+    def detach_file(self):
+        """
+        把原图的编码数据复制到内存中，之后不再引用源文件
+
+        覆盖保存到源文件之前调用：内存映射的文件被截断改写后，重新解码会读到新内容甚至触发
+        SIGBUS；缓存命中时尚未读取的编码数据也会变成保存后的内容。
+        """
+        if self.keep == KEEP_DECODED or self._data is not None:
+            return
+        if self._mmap is not None:
+            self._data = self._mmap[:]
+            self._mmap.close()
+            self._mmap = None
+        else:
+            with open(self.path, 'rb') as f:
+                self._data = f.read()
+
+    @property
+    def resident_bytes(self):
+        """原图部分常驻内存的字节数估计（不含代理图；内存映射由操作系统管理，不计入）"""
+        if self._image is not None:
+            return len(self._image.getbands()) * self.size[0] * self.size[1]
+        return len(self._data) if self._data is not None else 0
+
+    def close(self):
+        """
+        释放编码字节和内存映射
+
+        有缓存且解码得到的原图仍在内存中（例如未经编辑就切换到其他图像）时，把它放回缓存，
+        重新打开时不必再解码。
+        """
+        image = self._image
+        if image is None and self._decoded is not None:
+            image = self._decoded()
+        if self.cache is not None and image is not None:
+            entry = self.entry if self.entry is not None and self.entry.image is image else None
+            self.cache.add(entry or CachedImage(self._key, image, self._data))
+        self.entry = None
+        self._decoded = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._data = None
+        self._image = None
+
+
+def make_proxy(image, proxy_size, pyramid=None, resample=Image.LANCZOS):
+    """
+    生成最大边长不超过 proxy_size 的代理图
+
+    有金字塔时从最接近的层级缩放，否则先用 reduce 做整数倍降采样，再用 resample 滤镜缩放。
+    """
+    scale = min(proxy_size / image.width, proxy_size / image.height)
+    if scale >= 1.0:
+        return image
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    if pyramid is not None:
+        image = pyramid.level_for(scale, scale)
+    else:
+        factor = int(1 / (2 * scale))
+        if factor > 1:
+            image = image.reduce(factor)
+    return image_processor.resize_image(image, size, resample)
+
+
+def open_source(path, keep=KEEP_DECODED, proxy_size=DEFAULT_PROXY_SIZE, cache=None):
+    """
+    打开并解码源图像
+
+    参数:
+        path: 源文件路径
+        keep: 原图保留方式，见 KEEP_MODES
+        proxy_size: 代理图的最大边长
+        cache: 解码图像缓存（ImageCache，可选）
+
+    返回:
+        (SourceImage对象, 已解码的PIL.Image对象)
+    """
+    source = SourceImage(path, keep, proxy_size, cache)
+    try:
+        return source, source.decode()
+    except Exception:
+        source.close()
+        raise
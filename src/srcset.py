@@ -0,0 +1,137 @@
+"""
+响应式图像导出模块
+为每张图像生成一组宽度阶梯（如 320/640/960/1280/1920）的多种格式输出，并写出包含字节大小的JSON清单
+
+级联降采样：阶梯从大到小生成，每一级都由上一级缩放得到而不是从原图缩放，
+只有最大的一级需要处理全分辨率图像。
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from . import image_processor
+from .renditions import open_for_renditions
+
+
+# 默认宽度阶梯
+DEFAULT_WIDTHS = (320, 640, 960, 1280, 1920)
+
+
+def build_ladder(image, widths, aspect_ratio=None, mode='crop'):
+    """
+    级联生成宽度阶梯
+
+    参数:
+        image: PIL.Image对象
+        widths: 宽度列表（大于源图像宽度的会被跳过，不放大）
+        aspect_ratio: 输出宽高比（宽/高），None 表示保持原比例
+        mode: 指定宽高比时的适配方式，crop（裁剪超出部分）或 pad（填充空白）
+
+    返回:
+        按宽度从大到小排列的 [(宽度, 高度, PIL.Image对象), ...]
+    """
+    if mode not in ('crop', 'pad'):
+        raise ValueError(f"未知的适配方式: {mode}")
+    if aspect_ratio is None:
+        aspect_ratio = image.width / image.height
+
+    ladder = []
+    current = None
+    for width in sorted(set(widths), reverse=True):
+        if width > image.width:
+            continue
+        height = max(1, round(width / aspect_ratio))
+        if current is None:
+            # 最大一级：从原图适配到目标宽高比
+            if mode == 'crop':
+                current = image_processor.resize_with_crop(image, width, height)
+            else:
+                current = image_processor.resize_with_pad(image, width, height)
+        else:
+            # 之后每一级宽高比相同，直接从上一级缩放
+            current = current.resize((width, height), Image.LANCZOS)
+        ladder.append((width, height, current))
+    return ladder
+
+
+def export_srcset(source, output_dir, widths=DEFAULT_WIDTHS, formats=('JPEG',), quality=85,
+                  target_size_kb=None, aspect_ratio=None, mode='crop', basename=None, workers=None):
+    """
+    导出响应式图像阶梯和清单
+
+    输出文件名为 "<basename>-<宽度>w<扩展名>"，清单为 "<basename>.srcset.json"，内容包括
+    每一级的宽高、格式、文件名和字节大小，以及可直接用于 <source srcset> 的字符串。
+
+    参数:
+        source: 文件路径、bytes 或PIL.Image对象
+        output_dir: 输出目录
+        widths: 宽度阶梯
+        formats: 输出格式列表，如 ('WEBP', 'JPEG')
+        quality: 编码质量（未指定目标大小时使用）
+        target_size_kb: 目标文件大小（KB），可以是数值或 {宽度: KB} 字典
+        aspect_ratio: 输出宽高比（宽/高），None 表示保持原比例
+        mode: 指定宽高比时的适配方式，crop 或 pad
+        basename: 输出文件名前缀（默认取源文件名）
+        workers: 并行编码的线程数
+
+    返回:
+        清单字典
+    """
+    if basename is None:
+        basename = os.path.splitext(os.path.basename(source))[0] if isinstance(source, str) else 'image'
+    formats = [f.upper() for f in formats]
+
+    # JPEG 源按最大一级需要的尺寸做 draft 解码（未指定宽高比时只约束宽度）
+    max_width = max(widths)
+    draft_height = round(max_width / aspect_ratio) if aspect_ratio else 1
+    image = open_for_renditions(source, [{'width': max_width, 'height': draft_height, 'mode': 'crop'}])
+    ladder = build_ladder(image, widths, aspect_ratio, mode)
+    if not ladder:
+        # 源图像比所有阶梯都窄时，以原始宽度输出一级
+        ladder = build_ladder(image, [image.width], aspect_ratio, mode)
+
+    def encode(job):
+        width, height, rung, format = job
+        target = target_size_kb.get(width) if isinstance(target_size_kb, dict) else target_size_kb
+        if target:
+            return image_processor.compress_to_bytes(rung, target, format)
+        return image_processor.encode_image(rung, format, quality)
+
+    jobs = [(width, height, rung, format) for width, height, rung in ladder for format in formats]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        encoded = list(pool.map(encode, jobs))
+
+    os.makedirs(output_dir, exist_ok=True)
+    entries = []
+    for (width, height, _, format), data in zip(jobs, encoded):
+        extension = image_processor.FORMAT_EXTENSIONS.get(format, '.' + format.lower())
+        filename = f"{basename}-{width}w{extension}"
+        with open(os.path.join(output_dir, filename), 'wb') as f:
+            f.write(data)
+        entries.append({
+            'width': width,
+            'height': height,
+            'format': format,
+            'mime': Image.MIME.get(format, ''),
+            'file': filename,
+            'bytes': len(data),
+        })
+
+    srcset = {}
+    for format in formats:
+        rungs = sorted((e for e in entries if e['format'] == format), key=lambda e: e['width'])
+        srcset[Image.MIME.get(format, format)] = ', '.join(f"{e['file']} {e['width']}w" for e in rungs)
+
+    manifest = {
+        'source': source if isinstance(source, str) else None,
+        'source_size': list(image.size),
+        'renditions': entries,
+        'srcset': srcset,
+    }
+    with open(os.path.join(output_dir, f"{basename}.srcset.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
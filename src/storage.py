@@ -0,0 +1,423 @@
+"""
+存储后端模块
+把图像的读写从本地路径抽象为按键读写的存储，批处理可以直接在对象存储上运行
+
+后端:
+    LocalStorage    本地目录，写入先写临时文件再原子重命名，读取不会看到写了一半的文件
+    MemoryStorage   内存字典（测试和临时结果）
+    ObjectStorage   S3 兼容接口（get_object/put_object/list_objects_v2/delete_object），
+                    可以传入 boto3 客户端，也可以使用本地目录实现的 LocalObjectClient
+
+所有后端都支持 read_many/write_many 批量并行读写：共用一个线程池掩盖每次请求的延迟，
+ObjectStorage 在所有线程间共用同一个客户端（boto3 客户端线程安全，内部维护连接池）。
+"""
+
+import abc
+import io
+import os
+import posixpath
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from . import image_processor
+from .loader import read_file
+from .pipeline import Pipeline
+from .recipe import normalize_recipe, output_name
+from .watcher import IMAGE_EXTENSIONS
+
+
+# 批量读写的默认并发数
+DEFAULT_IO_WORKERS = 8
+
+
+class Storage(abc.ABC):
+    """
+    存储后端基类
+
+    子类必须实现抽象方法 read/write/exists/delete/list，批量读写和图像读写由基类提供。
+    键使用 '/' 分隔的相对路径。
+    """
+
+    def __init__(self, io_workers=DEFAULT_IO_WORKERS):
+        """
+        参数:
+            io_workers: 批量读写的并发数
+        """
+        self.io_workers = io_workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @abc.abstractmethod
+    def read(self, key):
+        """读取对象内容，不存在时抛出 KeyError"""
+
+    @abc.abstractmethod
+    def write(self, key, data):
+        """写入对象（整体替换）"""
+
+    @abc.abstractmethod
+    def exists(self, key):
+        """对象是否存在"""
+
+    @abc.abstractmethod
+    def delete(self, key):
+        """删除对象（不存在时忽略）"""
+
+    @abc.abstractmethod
+    def list(self, prefix=''):
+        """按键排序列出以 prefix 开头的全部键"""
+
+    def _executor(self):
+        """批量读写共用的线程池（按需创建）"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='storage')
+            return self._pool
+
+    def read_many(self, keys):
+        """
+        并行读取多个对象
+
+        参数:
+            keys: 键列表
+
+        返回:
+            生成器，按 keys 的顺序产出 (键, 内容或None, 错误或None)
+        """
+        def job(key):
+            try:
+                return key, self.read(key), None
+            except Exception as e:
+                return key, None, e
+
+        return self._executor().map(job, keys)
+
+    def write_many(self, items):
+        """
+        并行写入多个对象
+
+        参数:
+            items: (键, 内容) 的可迭代对象
+
+        返回:
+            {键: 错误} 字典，全部成功时为空
+        """
+        def job(item):
+            try:
+                self.write(*item)
+                return item[0], None
+            except Exception as e:
+                return item[0], e
+
+        return {key: error for key, error in self._executor().map(job, items) if error is not None}
+
+    def load_image(self, key):
+        """读取并打开图像（基于内存缓冲区，尚未解码）"""
+        try:
+            return Image.open(io.BytesIO(self.read(key)))
+        except Exception as e:
+            raise Exception(f"无法加载图像: {str(e)}")
+
+    def save_image(self, image, key, format=None, quality=95):
+        """
+        编码并写入图像
+
+        参数:
+            image: PIL.Image对象
+            key: 目标键
+            format: 保存格式（None 表示根据扩展名判断）
+            quality: 保存质量（1-100）
+        """
+        if format is None:
+            format = Image.registered_extensions().get(posixpath.splitext(key)[1].lower(), 'PNG')
+        self.write(key, image_processor.encode_image(image, format, quality))
+
+    def close(self):
+        """关闭批量读写线程池"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalStorage(Storage):
+    """本地目录存储"""
+
+    def __init__(self, root, file_pool=None, io_workers=DEFAULT_IO_WORKERS):
+        """
+        参数:
+            root: 根目录
+            file_pool: loader.FilePool（可选），限制同时打开的文件数
+            io_workers: 批量读写的并发数
+        """
+        super().__init__(io_workers)
+        self.root = os.path.abspath(root)
+        self.file_pool = file_pool
+
+    def path(self, key):
+        """键对应的本地路径（拒绝指向根目录之外的键）"""
+        path = os.path.normpath(os.path.join(self.root, *key.split('/')))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError(f"键超出存储根目录: {key}")
+        return path
+
+    def read(self, key):
+        try:
+            return read_file(self.path(key), self.file_pool)
+        except FileNotFoundError:
+            raise KeyError(key)
+
+    def write(self, key, data):
+        """先写入同目录下的临时文件，再用 os.replace 原子替换目标"""
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # 临时文件与目标在同一目录（同一文件系统），重命名才是原子的
+        temp_path = os.path.join(directory, f'.{os.path.basename(path)}.{secrets.token_hex(4)}.tmp')
+        try:
+            with open(temp_path, 'xb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix=''):
+        keys = []
+        for directory, _, files in os.walk(self.root):
+            relative = os.path.relpath(directory, self.root).replace(os.sep, '/')
+            for name in files:
+                if name.startswith('.') and name.endswith('.tmp'):
+                    continue   # 未完成的临时文件
+                key = name if relative == '.' else f'{relative}/{name}'
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+
+class MemoryStorage(Storage):
+    """内存存储（线程安全）"""
+
+    def __init__(self, io_workers=DEFAULT_IO_WORKERS):
+        super().__init__(io_workers)
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def read(self, key):
+        with self._lock:
+            return self._objects[key]
+
+    def write(self, key, data):
+        with self._lock:
+            self._objects[key] = bytes(data)
+
+    def exists(self, key):
+        with self._lock:
+            return key in self._objects
+
+    def delete(self, key):
+        with self._lock:
+            self._objects.pop(key, None)
+
+    def list(self, prefix=''):
+        with self._lock:
+            return sorted(key for key in self._objects if key.startswith(prefix))
+
+
+class ObjectStorage(Storage):
+    """
+    S3 兼容的对象存储
+
+    client 需要提供 boto3 S3 客户端的以下方法：get_object、put_object、head_object、
+    delete_object、list_objects_v2。单次 PUT 本身是原子的，不需要临时对象。
+    """
+
+    def __init__(self, client, bucket, prefix='', io_workers=DEFAULT_IO_WORKERS):
+        """
+        参数:
+            client: S3 兼容客户端（所有线程共用，复用连接）
+            bucket: 存储桶名
+            prefix: 键前缀（如 'jobs/42/'）
+            io_workers: 批量读写的并发数
+        """
+        super().__init__(io_workers)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def read(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except Exception as e:
+            if _is_not_found(e):
+                raise KeyError(key)
+            raise
+        return response['Body'].read()
+
+    def write(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except Exception as e:
+            if _is_not_found(e):
+                return False
+            raise
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def list(self, prefix=''):
+        keys = []
+        kwargs = {'Bucket': self.bucket, 'Prefix': self.prefix + prefix}
+        while True:
+            response = self.client.list_objects_v2(**kwargs)
+            keys += [item['Key'][len(self.prefix):] for item in response.get('Contents', [])]
+            if not response.get('IsTruncated'):
+                return sorted(keys)
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+
+def _is_not_found(error):
+    """判断客户端异常是否表示对象不存在（兼容 boto3 的 ClientError 和 LocalObjectClient）"""
+    if isinstance(error, KeyError):
+        return True
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in ('404', 'NoSuchKey', 'NotFound')
+
+
+class LocalObjectClient:
+    """
+    用本地目录模拟 S3 客户端的最小子集（每个存储桶是一个子目录）
+
+    用于在没有对象存储的环境中运行和测试 ObjectStorage。
+    """
+
+    def __init__(self, root, page_size=1000):
+        """
+        参数:
+            root: 根目录
+            page_size: list_objects_v2 每页返回的键数
+        """
+        self._buckets = {}
+        self.root = root
+        self.page_size = page_size
+        self._lock = threading.Lock()
+
+    def _bucket(self, name):
+        with self._lock:
+            if name not in self._buckets:
+                self._buckets[name] = LocalStorage(os.path.join(self.root, name))
+            return self._buckets[name]
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self._bucket(Bucket).read(Key))}
+
+    def put_object(self, Bucket, Key, Body):
+        self._bucket(Bucket).write(Key, Body)
+        return {}
+
+    def head_object(self, Bucket, Key):
+        if not self._bucket(Bucket).exists(Key):
+            raise KeyError(Key)
+        return {'ContentLength': os.path.getsize(self._bucket(Bucket).path(Key))}
+
+    def delete_object(self, Bucket, Key):
+        self._bucket(Bucket).delete(Key)
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None):
+        keys = self._bucket(Bucket).list(Prefix)
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + self.page_size]
+        response = {'Contents': [{'Key': key} for key in page], 'IsTruncated': start + self.page_size < len(keys)}
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = str(start + self.page_size)
+        return response
+
+
+def open_storage(url, **kwargs):
+    """
+    按 URL 创建存储
+
+    参数:
+        url: 'memory://'、's3://存储桶/前缀'（需要安装 boto3）、'file:///目录' 或本地目录路径
+        **kwargs: 传递给存储构造函数的其他参数
+
+    返回:
+        Storage对象
+    """
+    if url.startswith('memory://'):
+        return MemoryStorage(**kwargs)
+    if url.startswith('s3://'):
+        try:
+            import boto3
+        except ImportError:
+            raise ImportError("使用 s3:// 存储需要安装 boto3: pip install boto3")
+        bucket, _, prefix = url[len('s3://'):].partition('/')
+        if prefix and not prefix.endswith('/'):
+            prefix += '/'
+        return ObjectStorage(boto3.client('s3'), bucket, prefix, **kwargs)
+    if url.startswith('file://'):
+        url = url[len('file://'):]
+    return LocalStorage(url, **kwargs)
+
+
+def run_storage_batch(source, target, recipe, prefix='', output_prefix='', cancel_token=None,
+                      on_result=None, **options):
+    """
+    对源存储中的全部图像运行批处理流水线，结果写入目标存储
+
+    流水线的读取和写出阶段直接调用存储的 read/write（各阶段的多个线程即并行请求），
+    输出键为 output_prefix + 去掉 prefix 的源键，扩展名换成配方输出格式的扩展名（见 recipe.output_name）。
+
+    参数:
+        source: 源存储
+        target: 目标存储
+        recipe: 处理配方
+        prefix: 只处理以此开头的源键
+        output_prefix: 输出键前缀
+        cancel_token: 取消令牌
+        on_result: 每个条目完成时的回调 on_result(PipelineItem)
+        **options: 传递给 Pipeline 的其他参数
+
+    返回:
+        {'done': n, 'failed': n, 'cancelled': n} 统计字典
+    """
+    recipe = normalize_recipe(recipe)
+    keys = [key for key in source.list(prefix) if posixpath.splitext(key)[1].lower() in IMAGE_EXTENSIONS]
+
+    def output_key(key):
+        return output_prefix + output_name(key[len(prefix):], recipe)
+
+    pipeline = Pipeline(recipe, reader=source.read, writer=target.write, output_path_func=output_key, **options)
+    counts = {'done': 0, 'failed': 0, 'cancelled': 0}
+    for item in pipeline.run(keys, cancel_token=cancel_token):
+        if item.cancelled:
+            counts['cancelled'] += 1
+        else:
+            counts['done' if item.ok else 'failed'] += 1
+        if on_result:
+            on_result(item)
+    return counts
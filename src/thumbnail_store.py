@@ -0,0 +1,279 @@
+"""
+缩略图存储模块
+把文件夹视图用的缩略图保存在 SQLite 中，按 (路径, 修改时间, 文件大小) 判断是否过期
+
+第一次扫描文件夹时用进程池并行生成缩略图（默认使用全部CPU核心），
+优先使用 EXIF 中内嵌的缩略图，否则对 JPEG 做 draft 解码；
+之后再打开同一个文件夹时只需一次查询和对每个文件 stat 一次。
+"""
+
+import io
+import itertools
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from PIL import ExifTags, Image
+
+from . import image_processor
+
+
+# 数据库文件名（默认保存在用户缓存目录中，见 default_db_path）
+THUMBNAIL_DB_FILE = 'thumbnails.sqlite'
+
+# 用户缓存目录下本应用的子目录名
+CACHE_DIR_NAME = 'image-processing-tool'
+
+# 缩略图最大边长（与相机内嵌缩略图的 160x120 相当，可以直接使用内嵌缩略图）
+THUMBNAIL_SIZE = 160
+
+# EXIF IFD1 中内嵌 JPEG 缩略图的偏移和长度标签
+_JPEG_IF_OFFSET = 0x0201
+_JPEG_IF_LENGTH = 0x0202
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS thumbnails (
+    path TEXT PRIMARY KEY,
+    directory TEXT,
+    mtime_ns INTEGER,
+    size INTEGER,
+    width INTEGER,
+    height INTEGER,
+    data BLOB,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS thumbnails_directory ON thumbnails (directory);
+'''
+
+
+def embedded_thumbnail(image, thumb_size=THUMBNAIL_SIZE):
+    """
+    读取 EXIF 中内嵌的 JPEG 缩略图
+
+    内嵌缩略图小于 thumb_size 或宽高比与原图不一致（带黑边）时不使用。
+
+    参数:
+        image: 已打开（无需解码）的PIL.Image对象
+        thumb_size: 需要的缩略图最大边长
+
+    返回:
+        PIL.Image对象，没有可用的内嵌缩略图时返回None
+    """
+    exif_bytes = image.info.get('exif')
+    if not exif_bytes:
+        return None
+    try:
+        ifd1 = image.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset, length = ifd1.get(_JPEG_IF_OFFSET), ifd1.get(_JPEG_IF_LENGTH)
+        if not offset or not length:
+            return None
+        # 偏移相对于 TIFF 头，JPEG 的 APP1 数据前面还有 "Exif\0\0"
+        start = offset + (6 if exif_bytes.startswith(b'Exif\x00\x00') else 0)
+        thumbnail = Image.open(io.BytesIO(exif_bytes[start:start + length]))
+        thumbnail.load()
+    except Exception:
+        return None
+    if max(thumbnail.size) < thumb_size:
+        return None
+    if abs(thumbnail.width / thumbnail.height - image.width / image.height) > 0.02 * image.width / image.height:
+        return None
+    return thumbnail
+
+
+def make_thumbnail(path, thumb_size=THUMBNAIL_SIZE):
+    """
+    生成单个文件的缩略图
+
+    参数:
+        path: 图像文件路径
+        thumb_size: 缩略图最大边长
+
+    返回:
+        (原图宽, 原图高, 编码后的缩略图bytes)；不透明图像编码为 JPEG，透明图像为 PNG
+    """
+    with image_processor.load_image(path) as image:
+        width, height = image.size
+        thumbnail = embedded_thumbnail(image, thumb_size)
+        if thumbnail is None:
+            # thumbnail() 对 JPEG 会先做 draft 解码
+            image.thumbnail((thumb_size, thumb_size))
+            thumbnail = image_processor.normalize_mode(image)
+            if thumbnail is image:
+                thumbnail = image.copy()
+        else:
+            thumbnail.thumbnail((thumb_size, thumb_size))
+
+    if thumbnail.mode in ('RGBA', 'LA', 'PA') or 'transparency' in thumbnail.info:
+        data = image_processor.encode_image(thumbnail.convert('RGBA'), 'PNG')
+    else:
+        data = image_processor.encode_image(thumbnail, 'JPEG', 85)
+    return width, height, data
+
+
+def _thumbnail_job(args):
+    """进程池任务：返回 (路径, 结果或None, 错误信息或None)"""
+    path, thumb_size = args
+    try:
+        return path, make_thumbnail(path, thumb_size), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def _thumbnail_batch(paths, thumb_size):
+    """进程池任务：依次生成一批缩略图，返回 _thumbnail_job 结果的列表"""
+    return [_thumbnail_job((path, thumb_size)) for path in paths]
+
+
+def user_cache_dir():
+    """
+    返回当前用户的缓存目录（不存在时创建）
+
+    Windows 为 %LOCALAPPDATA%，macOS 为 ~/Library/Caches，其他系统为 $XDG_CACHE_HOME（默认 ~/.cache），
+    其下再加 CACHE_DIR_NAME 子目录。
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser(os.path.join('~', 'AppData', 'Local'))
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser(os.path.join('~', 'Library', 'Caches'))
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache'))
+    path = os.path.join(base, CACHE_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def default_db_path():
+    """默认的缩略图数据库路径（用户缓存目录下的 THUMBNAIL_DB_FILE）"""
+    return os.path.join(user_cache_dir(), THUMBNAIL_DB_FILE)
+
+
+class ThumbnailStore:
+    """SQLite 缩略图存储"""
+
+    def __init__(self, db_path=None, thumb_size=THUMBNAIL_SIZE):
+        """
+        参数:
+            db_path: SQLite 文件路径（默认为 default_db_path()，与启动时的工作目录无关）
+            thumb_size: 缩略图最大边长
+        """
+        if db_path is None:
+            db_path = default_db_path()
+        self.db_path = db_path
+        self.thumb_size = thumb_size
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        """关闭数据库"""
+        self._conn.close()
+
+    def lookup(self, paths):
+        """
+        读取未过期的缩略图
+
+        同一目录的记录用一次查询读出，再与每个文件的当前状态比较。
+
+        参数:
+            paths: 文件路径列表
+
+        返回:
+            ({路径: (原图宽, 原图高, 缩略图bytes)}, [(路径, mtime_ns, 大小), ...] 缺失或过期的文件)
+        """
+        rows = {}
+        for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+            for row in self._conn.execute(
+                'SELECT path, mtime_ns, size, width, height, data FROM thumbnails WHERE directory = ?',
+                (directory,)
+            ):
+                rows[row[0]] = row[1:]
+
+        found = {}
+        stale = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            key = os.path.abspath(path)
+            row = rows.get(key)
+            if row is not None and row[:2] == (stat.st_mtime_ns, stat.st_size):
+                found[path] = row[2:]
+            else:
+                stale.append((path, stat.st_mtime_ns, stat.st_size))
+        return found, stale
+
+    def populate(self, paths, workers=None, processes=True, commit_every=100,
+                 on_result=None, cancel_token=None):
+        """
+        为缺失或过期的文件生成缩略图并保存
+
+        参数:
+            paths: 文件路径列表
+            workers: 工作进程数（默认为CPU核心数）
+            processes: 是否使用进程池（False 时使用线程池）
+            commit_every: 每生成多少张提交一次
+            on_result: 结果回调 on_result(路径, (原图宽, 原图高, 缩略图bytes) 或 None)，
+                       包括已存在的缩略图，在调用 populate 的线程中执行
+            cancel_token: 取消令牌
+
+        返回:
+            {'cached': n, 'created': n, 'failed': n} 统计字典
+        """
+        found, stale = self.lookup(paths)
+        counts = {'cached': len(found), 'created': 0, 'failed': 0}
+        if on_result:
+            for path, result in found.items():
+                on_result(path, result)
+        if not stale:
+            return counts
+
+        stats = {path: (mtime_ns, size) for path, mtime_ns, size in stale}
+        pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        workers = workers or os.cpu_count() or 1
+        rows = []
+        pending = list(stats)
+        chunksize = max(1, min(32, len(pending) // (workers * 4)))
+        with pool_class(max_workers=workers) as pool:
+            # 按批提交独立的 Future，取消时逐个取消尚未开始的批次
+            # （shutdown(cancel_futures=True) 需要 Python 3.9）
+            futures = [
+                pool.submit(_thumbnail_batch, pending[i:i + chunksize], self.thumb_size)
+                for i in range(0, len(pending), chunksize)
+            ]
+            try:
+                for path, result, error in itertools.chain.from_iterable(f.result() for f in futures):
+                    if cancel_token is not None and cancel_token.cancelled:
+                        break
+                    if result is None:
+                        counts['failed'] += 1
+                    else:
+                        counts['created'] += 1
+                        mtime_ns, size = stats[path]
+                        rows.append((os.path.abspath(path), os.path.dirname(os.path.abspath(path)),
+                                     mtime_ns, size) + result)
+                    if on_result:
+                        on_result(path, result)
+                    if len(rows) >= commit_every:
+                        self._store(rows)
+                        rows = []
+            finally:
+                for future in futures:
+                    future.cancel()
+                self._store(rows)
+        return counts
+
+    def _store(self, rows):
+        """批量写入缩略图"""
+        if not rows:
+            return
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO thumbnails '
+                '(path, directory, mtime_ns, size, width, height, data, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [row + (now,) for row in rows]
+            )
@@ -3,8 +3,11 @@ UI组件封装
 包含像素信息面板、裁剪控制面板、压缩面板等
 """
 
+import io
+import os
 import tkinter as tk
 from tkinter import ttk, messagebox
+from PIL import Image, ImageTk
 from .language import get_text
 
 
@@ -105,6 +108,12 @@ class CenterCropPanel:
         self.height_entry = tk.Entry(size_frame, textvariable=self.height_var, width=10)
         self.height_entry.grid(row=0, column=3, padx=5)
 
+        # 自动中心点（未设置中心点时按显著区域确定）
+        self.auto_center_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            self.frame, text=get_text('auto_center'), variable=self.auto_center_var
+        ).pack(anchor='w')
+
         # 执行按钮
         self.crop_button = tk.Button(
             self.frame, text=get_text('execute_crop'), command=self.execute_crop,
@@ -141,7 +150,7 @@ class CenterCropPanel:
 
             # 调用回调函数
             if self.on_crop_callback:
-                self.on_crop_callback(width, height, center_x, center_y)
+                self.on_crop_callback(width, height, center_x, center_y, self.auto_center_var.get())
 
         except ValueError:
             messagebox.showerror(get_text('error'), get_text('error_invalid_number'))
@@ -151,17 +160,23 @@ class CenterCropPanel:
         self.center_x_var.set(str(int(x)))
         self.center_y_var.set(str(int(y)))
 
+    def set_busy(self, busy):
+        """后台任务执行期间禁用切割按钮"""
+        self.crop_button.config(state='disabled' if busy else 'normal')
+
 
 class CompressPanel:
     """图像压缩控制面板"""
 
-    def __init__(self, parent_frame, on_compress_callback):
+    def __init__(self, parent_frame, on_compress_callback, on_abort_callback=None, on_accept_callback=None):
         """
         初始化压缩面板
 
         参数:
             parent_frame: 父容器
             on_compress_callback: 执行压缩的回调函数
+            on_abort_callback: 中止压缩的回调函数
+            on_accept_callback: 提前接受当前最佳结果的回调函数
         """
         self.frame = tk.LabelFrame(parent_frame, text=get_text('compress_title'), padx=10, pady=10)
         self.on_compress_callback = on_compress_callback
@@ -191,6 +206,16 @@ class CompressPanel:
         tk.Radiobutton(format_frame, text="JPEG", variable=self.format_var, value='JPEG').pack(side='left', padx=5)
         tk.Radiobutton(format_frame, text="PNG", variable=self.format_var, value='PNG').pack(side='left')
 
+        # 提前结束容差
+        tolerance_frame = tk.Frame(self.frame)
+        tolerance_frame.pack(fill='x', pady=5)
+
+        tk.Label(tolerance_frame, text=f"{get_text('compress_tolerance')}:").pack(side='left')
+        self.tolerance_var = tk.StringVar(value='3')
+        self.tolerance_entry = tk.Entry(tolerance_frame, textvariable=self.tolerance_var, width=5)
+        self.tolerance_entry.pack(side='left', padx=5)
+        tk.Label(tolerance_frame, text='%').pack(side='left')
+
         # 执行按钮
         self.compress_button = tk.Button(
             self.frame, text=get_text('start_compress'), command=self.execute_compress,
@@ -198,6 +223,24 @@ class CompressPanel:
         )
         self.compress_button.pack(pady=10)
 
+        # 中止 / 接受当前结果按钮（仅在压缩期间可用）
+        control_frame = tk.Frame(self.frame)
+        control_frame.pack()
+        self.abort_button = tk.Button(
+            control_frame, text=get_text('compress_abort'), command=on_abort_callback,
+            padx=10, state='disabled'
+        )
+        self.abort_button.pack(side='left', padx=5)
+        self.accept_button = tk.Button(
+            control_frame, text=get_text('compress_accept'), command=on_accept_callback,
+            padx=10, state='disabled'
+        )
+        self.accept_button.pack(side='left', padx=5)
+
+        # 进度显示
+        self.progress_label = tk.Label(self.frame, text="", font=('Arial', 8), fg='gray')
+        self.progress_label.pack()
+
         # 结果显示
         self.result_label = tk.Label(self.frame, text="", font=('Arial', 9), fg='green')
         self.result_label.pack()
@@ -214,6 +257,10 @@ class CompressPanel:
             target_size = float(target_size)
             unit = self.unit_var.get()
             format_type = self.format_var.get()
+            tolerance_text = self.tolerance_var.get().strip()
+            tolerance = float(tolerance_text) / 100 if tolerance_text else 0.0
+            if not 0 <= tolerance < 1:
+                raise ValueError(tolerance_text)
 
             # 转换为KB
             if unit == 'MB':
@@ -221,24 +268,49 @@ class CompressPanel:
             else:
                 target_size_kb = target_size
 
-            # 调用回调函数
+            # 调用回调函数（压缩在后台执行，完成后通过 show_result 显示结果）
             if self.on_compress_callback:
-                actual_size = self.on_compress_callback(target_size_kb, format_type)
-                if actual_size:
-                    self.result_label.config(text=get_text('compress_result', size=actual_size))
+                self.clear_result()
+                self.on_compress_callback(target_size_kb, format_type, tolerance)
 
         except ValueError:
             messagebox.showerror(get_text('error'), get_text('error_invalid_number'))
 
+    def show_progress(self, probes, quality, scale, best_size_kb):
+        """
+        显示压缩进度
+
+        参数:
+            probes: 已尝试的编码次数
+            quality: 当前质量参数
+            scale: 当前缩放比例
+            best_size_kb: 目前满足目标的最佳大小（KB），尚无时为None
+        """
+        best = f"{best_size_kb:.2f} KB" if best_size_kb is not None else '-'
+        self.progress_label.config(text=get_text(
+            'compress_progress', probes=probes, quality=quality, scale=scale, best=best
+        ))
+
+    def show_result(self, actual_size):
+        """显示压缩结果"""
+        self.result_label.config(text=get_text('compress_result', size=actual_size))
+
     def clear_result(self):
         """清除结果显示"""
+        self.progress_label.config(text="")
         self.result_label.config(text="")
 
+    def set_busy(self, busy):
+        """后台任务执行期间禁用压缩按钮，启用中止和接受按钮"""
+        self.compress_button.config(state='disabled' if busy else 'normal')
+        self.abort_button.config(state='normal' if busy else 'disabled')
+        self.accept_button.config(state='normal' if busy else 'disabled')
+
 
 class ActionPanel:
     """操作按钮面板"""
 
-    def __init__(self, parent_frame, on_save_callback, on_preview_callback):
+    def __init__(self, parent_frame, on_save_callback, on_preview_callback, on_cancel_callback=None):
         """
         初始化操作面板
 
@@ -246,6 +318,7 @@ class ActionPanel:
             parent_frame: 父容器
             on_save_callback: 保存回调函数
             on_preview_callback: 预览回调函数
+            on_cancel_callback: 取消后台任务的回调函数
         """
         self.frame = tk.Frame(parent_frame, padx=10, pady=10)
 
@@ -263,6 +336,19 @@ class ActionPanel:
         )
         self.preview_button.pack(fill='x', pady=5)
 
+        # 取消按钮（仅在后台任务执行期间可用）
+        self.cancel_button = tk.Button(
+            self.frame, text=get_text('cancel_button'), command=on_cancel_callback,
+            bg='#F44336', fg='white', padx=30, pady=5, state='disabled'
+        )
+        if on_cancel_callback:
+            self.cancel_button.pack(fill='x', pady=5)
+
+    def set_busy(self, busy):
+        """后台任务执行期间禁用保存按钮并启用取消按钮"""
+        self.save_button.config(state='disabled' if busy else 'normal')
+        self.cancel_button.config(state='normal' if busy else 'disabled')
+
 
 class ResizePanel:
     """图像尺寸调整面板"""
@@ -373,20 +459,157 @@ class ResizePanel:
             # 获取调整模式
             mode = self.mode_var.get()
 
-            # 调用回调函数
+            # 调用回调函数（调整在后台执行，完成后通过 show_result 显示结果）
             if self.on_resize_callback:
-                result = self.on_resize_callback(width, height, mode)
-                if result:
-                    self.result_label.config(text=get_text('resize_result', width=width, height=height))
+                self.on_resize_callback(width, height, mode)
 
         except ValueError:
             messagebox.showerror(get_text('error'), get_text('error_invalid_number'))
 
+    def show_result(self, width, height):
+        """显示调整结果"""
+        self.result_label.config(text=get_text('resize_result', width=width, height=height))
+
     def clear_result(self):
         """清除结果显示"""
         self.result_label.config(text="")
 
+    def set_busy(self, busy):
+        """后台任务执行期间禁用调整按钮"""
+        self.resize_button.config(state='disabled' if busy else 'normal')
+
     def set_current_size(self, width, height):
         """设置当前图片尺寸到输入框"""
         self.width_var.set(str(width))
         self.height_var.set(str(height))
+
+
+class ThumbnailGrid:
+    """
+    文件夹缩略图网格窗口
+
+    缩略图以编码后的字节保存，只为当前可见的格子解码和创建 PhotoImage，
+    上万个文件的文件夹也能立即显示和流畅滚动。
+    """
+
+    def __init__(self, parent, directory, on_select_callback, on_close_callback=None, tile_size=160):
+        """
+        初始化缩略图网格窗口
+
+        参数:
+            parent: 父窗口
+            directory: 文件夹路径（显示在标题中）
+            on_select_callback: 点击缩略图的回调 on_select_callback(路径)
+            on_close_callback: 关闭窗口的回调
+            tile_size: 缩略图最大边长
+        """
+        self.on_select_callback = on_select_callback
+        self.on_close_callback = on_close_callback
+        self.tile_size = tile_size
+        self.cell = tile_size + 30   # 格子尺寸（含文件名和间距）
+        self.paths = []
+        self.thumbnails = {}         # 路径 -> 编码后的缩略图bytes
+        self.photos = {}             # 路径 -> PhotoImage（只保留可见的格子）
+        self.columns = 1
+        self.closed = False
+        self.redraw_pending = False
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(get_text('folder_view_title', directory=directory))
+        self.window.geometry("900x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.canvas = tk.Canvas(self.window, bg='#2b2b2b', highlightthickness=0)
+        scrollbar = tk.Scrollbar(self.window, orient='vertical', command=self.on_scroll)
+        self.canvas.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.canvas.pack(side='left', fill='both', expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self.layout())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", self.on_mousewheel)
+
+    def set_paths(self, paths):
+        """设置要显示的文件列表"""
+        self.paths = list(paths)
+        self.layout()
+
+    def set_thumbnail(self, path, data):
+        """
+        设置单个文件的缩略图
+
+        参数:
+            path: 文件路径
+            data: 编码后的缩略图bytes
+        """
+        if self.closed:
+            return
+        self.thumbnails[path] = data
+        # 大量缩略图同时到达时合并为一次重绘
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.window.after_idle(self.redraw)
+
+    def layout(self):
+        """按窗口宽度重新计算列数和滚动区域"""
+        width = max(self.canvas.winfo_width(), self.cell)
+        self.columns = max(1, width // self.cell)
+        rows = (len(self.paths) + self.columns - 1) // self.columns
+        self.canvas.config(scrollregion=(0, 0, self.columns * self.cell, rows * self.cell))
+        self.redraw()
+
+    def redraw(self):
+        """只绘制可见的格子"""
+        self.redraw_pending = False
+        if self.closed:
+            return
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = int(top // self.cell) * self.columns
+        last = min(len(self.paths), (int(bottom // self.cell) + 1) * self.columns)
+
+        self.canvas.delete('tile')
+        visible = {}
+        for index in range(first, last):
+            path = self.paths[index]
+            x = (index % self.columns) * self.cell + self.cell // 2
+            y = (index // self.columns) * self.cell + self.tile_size // 2 + 5
+            photo = self.photos.get(path)
+            if photo is None and path in self.thumbnails:
+                photo = ImageTk.PhotoImage(Image.open(io.BytesIO(self.thumbnails[path])))
+            if photo is not None:
+                visible[path] = photo
+                self.canvas.create_image(x, y, image=photo, tags='tile')
+            else:
+                half = self.tile_size // 2
+                self.canvas.create_rectangle(x - half, y - half, x + half, y + half,
+                                             outline='#555555', tags='tile')
+            self.canvas.create_text(x, y + self.tile_size // 2 + 12, text=os.path.basename(path),
+                                    fill='white', width=self.cell - 10, tags='tile')
+        self.photos = visible
+
+    def on_scroll(self, *args):
+        """滚动条拖动"""
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def on_mousewheel(self, event):
+        """鼠标滚轮滚动"""
+        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self.redraw()
+
+    def on_click(self, event):
+        """点击缩略图"""
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        column = int(x // self.cell)
+        index = int(y // self.cell) * self.columns + column
+        if column < self.columns and 0 <= index < len(self.paths):
+            self.on_select_callback(self.paths[index])
+
+    def close(self):
+        """关闭窗口"""
+        self.closed = True
+        if self.on_close_callback:
+            self.on_close_callback()
+        self.window.destroy()
@@ -0,0 +1,264 @@
+"""
+监视文件夹模块
+持续监视收件目录，新文件写入完成后按配方自动处理
+
+增量扫描策略:
+    - 记录每个目录的 mtime，只有 mtime 变化（有文件新增/删除/重命名）的目录才用 os.scandir 重新列举；
+      mtime 变化后的 settle_seconds 内每轮都重新列举，以免漏掉同一个 mtime 刻度内新建的文件
+    - 每隔 full_rescan_seconds 重新列举全部目录，发现原地改写（目录 mtime 不变）的文件和需要重试的失败文件
+    - 新发现的文件进入待定列表，每轮只对待定文件单独 stat，大小和修改时间在
+      settle_seconds 内保持不变才视为写入完成（防抖），然后提交到工作线程池处理
+    - 已处理文件记录 (size, mtime)，不会重复处理；从目录中消失的文件同时删除记录
+
+用法:
+    python -m src.watcher 收件目录 输出目录 --recipe recipe.json
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .pipeline import read_file, write_file, decode_bytes, transform_image, encode_image_for_recipe
+from .recipe import normalize_recipe, load_recipe, output_name
+
+
+# 监视的图像扩展名
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+
+
+def process_file(path, recipe, output_path):
+    """
+    按配方处理单个文件
+
+    参数:
+        path: 输入文件路径
+        recipe: 配方字典
+        output_path: 输出路径
+
+    返回:
+        写出的字节数
+    """
+    image = decode_bytes(read_file(path))
+    image = transform_image(image, recipe)
+    data = encode_image_for_recipe(image, recipe)
+    write_file(output_path, data)
+    return len(data)
+
+
+class FolderWatcher:
+    """收件目录监视器"""
+
+    def __init__(self, directory, recipe, output_dir, settle_seconds=2.0, poll_interval=1.0,
+                 workers=2, recursive=True, on_result=None, full_rescan_seconds=60.0):
+        """
+        初始化监视器
+
+        参数:
+            directory: 监视的目录
+            recipe: 处理配方
+            output_dir: 输出目录（位于监视目录内时会被自动排除）
+            settle_seconds: 文件大小和修改时间保持不变多久后才开始处理
+            poll_interval: 轮询间隔（秒）
+            workers: 处理线程数
+            recursive: 是否监视子目录
+            on_result: 结果回调 on_result(path, output_path, error)，在工作线程中调用
+            full_rescan_seconds: 每隔多久不论 mtime 是否变化都重新列举全部目录
+        """
+        self.directory = os.path.abspath(directory)
+        self.recipe = normalize_recipe(recipe)
+        self.output_dir = os.path.abspath(output_dir)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.recursive = recursive
+        self.on_result = on_result
+        self.full_rescan_seconds = full_rescan_seconds
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='watch-worker')
+        self._dir_mtimes = {}    # 目录 -> (mtime_ns, 观察到该 mtime 的时间)
+        self._subdirs = {}       # 目录 -> 子目录列表（上次列举的结果）
+        self._files = {}         # 目录 -> 图像文件集合（上次列举的结果）
+        self._last_full_scan = None
+        self._pending = {}       # 文件 -> (size, mtime_ns, 首次观察到该状态的时间)
+        self._processed = {}     # 文件 -> (size, mtime_ns)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def output_path_for(self, path):
+        """保持相对目录结构，替换为配方输出格式的扩展名（见 recipe.output_name）"""
+        relative = os.path.relpath(path, self.directory)
+        return os.path.join(self.output_dir, output_name(relative, self.recipe))
+
+    def poll_once(self, now=None):
+        """
+        执行一轮扫描
+
+        参数:
+            now: 当前时间（默认 time.monotonic()，便于测试）
+
+        返回:
+            本轮提交处理的文件路径列表
+        """
+        now = time.monotonic() if now is None else now
+        full = self._last_full_scan is None or now - self._last_full_scan >= self.full_rescan_seconds
+        if full:
+            self._last_full_scan = now
+        self._scan_changed_dirs(self.directory, now, full)
+
+        submitted = []
+        for path, (size, mtime, since) in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # 文件已被删除或移走
+                del self._pending[path]
+                continue
+
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                # 仍在写入，重新计时
+                self._pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+            elif now - since >= self.settle_seconds:
+                del self._pending[path]
+                with self._lock:
+                    self._processed[path] = (size, mtime)
+                self._pool.submit(self._process, path)
+                submitted.append(path)
+        return submitted
+
+    def _scan_changed_dirs(self, directory, now, full=False):
+        """重新列举 mtime 发生变化或在 settle_seconds 内变化过的目录，full 为 True 时列举全部目录"""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._forget(directory)
+            return
+
+        previous = self._dir_mtimes.get(directory)
+        if previous is None or previous[0] != mtime:
+            self._dir_mtimes[directory] = (mtime, now)
+            self._list_dir(directory, now)
+        elif full or now - previous[1] < self.settle_seconds:
+            self._list_dir(directory, now)
+
+        if self.recursive:
+            for subdir in self._subdirs.get(directory, []):
+                self._scan_changed_dirs(subdir, now, full)
+
+    def _list_dir(self, directory, now):
+        """列举目录，跟踪其中的图像文件并丢弃已消失的文件和子目录的记录"""
+        subdirs = []
+        files = set()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path != self.output_dir:
+                        subdirs.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    files.add(entry.path)
+                    self._track(entry, now)
+        self._drop_files(self._files.get(directory, set()) - files)
+        for subdir in set(self._subdirs.get(directory, [])) - set(subdirs):
+            self._forget(subdir)
+        self._files[directory] = files
+        self._subdirs[directory] = subdirs
+
+    def _forget(self, directory):
+        """丢弃已消失的目录（及其子目录）的全部记录"""
+        self._dir_mtimes.pop(directory, None)
+        self._drop_files(self._files.pop(directory, set()))
+        for subdir in self._subdirs.pop(directory, []):
+            self._forget(subdir)
+
+    def _drop_files(self, paths):
+        """丢弃已消失的文件的记录，同名文件再出现时按新文件处理"""
+        for path in paths:
+            self._pending.pop(path, None)
+        with self._lock:
+            for path in paths:
+                self._processed.pop(path, None)
+
+    def _track(self, entry, now):
+        """将新出现或已变化的文件加入待定列表"""
+        path = entry.path
+        if path in self._pending:
+            return
+        stat = entry.stat()
+        with self._lock:
+            done = self._processed.get(path)
+        if done == (stat.st_size, stat.st_mtime_ns):
+            return
+        self._pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+
+    def _process(self, path):
+        """在工作线程中处理单个文件"""
+        output_path = self.output_path_for(path)
+        error = None
+        try:
+            process_file(path, self.recipe, output_path)
+        except Exception as e:
+            error = e
+            # 处理失败的文件在所在目录下次重新列举时（最迟下一次全量扫描）重新检测
+            with self._lock:
+                self._processed.pop(path, None)
+        if self.on_result:
+            self.on_result(path, output_path, error)
+
+    def run_forever(self, cancel_token=None):
+        """
+        持续轮询直到 stop() 或取消令牌被触发
+
+        参数:
+            cancel_token: 取消令牌
+        """
+        while not self._stop.is_set() and not (cancel_token is not None and cancel_token.cancelled):
+            self.poll_once()
+            self._stop.wait(self.poll_interval)
+
+    def stop(self):
+        """停止轮询"""
+        self._stop.set()
+
+    def shutdown(self, wait=True):
+        """停止轮询并关闭工作线程池"""
+        self.stop()
+        self._pool.shutdown(wait=wait)
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='监视收件目录并按配方自动处理新图像')
+    parser.add_argument('directory', help='监视的目录')
+    parser.add_argument('output_dir', help='输出目录')
+    parser.add_argument('--recipe', help='配方JSON文件（默认仅重新编码为JPEG）')
+    parser.add_argument('--settle', type=float, default=2.0, help='文件稳定多少秒后处理')
+    parser.add_argument('--interval', type=float, default=1.0, help='轮询间隔（秒）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='处理线程数')
+    parser.add_argument('--rescan', type=float, default=60.0, help='全量重新扫描的间隔（秒）')
+    args = parser.parse_args(argv)
+
+    recipe = load_recipe(args.recipe) if args.recipe else normalize_recipe({})
+
+    def report(path, output_path, error):
+        if error:
+            print(f"✗ {path}: {error}", file=sys.stderr)
+        else:
+            print(f"✓ {path} -> {output_path}")
+
+    watcher = FolderWatcher(
+        args.directory, recipe, args.output_dir,
+        settle_seconds=args.settle, poll_interval=args.interval,
+        workers=args.workers, on_result=report, full_rescan_seconds=args.rescan
+    )
+    print(f"Watching {watcher.directory} (Ctrl+C to stop)")
+    try:
+        watcher.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
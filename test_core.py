@@ -5,7 +5,9 @@
 
 from PIL import Image
 import io
+import numpy as np
 from src import image_processor
+from src.executor import TaskExecutor, CancelToken, OperationCancelled
 
 def test_image_creation():
     """测试图像创建"""
@@ -48,13 +50,127 @@ def test_center_crop(img):
     cropped = image_processor.center_crop(img, 1000, 800, 50, 50)
     print(f"✓ 边界裁剪（超出部分被忽略）: {cropped.size}")
 
+def test_auto_center_crop():
+    """测试显著区域自动中心点"""
+    print("\n测试4b: 自动中心点...")
+    from PIL import ImageDraw
+    img = Image.new('RGB', (1600, 1200), 'white')
+    draw = ImageDraw.Draw(img)
+    for i in range(20):
+        draw.line((1200 + i * 12, 800, 1200 + i * 12, 1100), fill='black', width=3)
+
+    center_x, center_y = image_processor.find_salient_center(img, 400, 400)
+    assert 1200 <= center_x <= 1450 and 800 <= center_y <= 1100
+    cropped = image_processor.auto_center_crop(img, 400, 400)
+    assert cropped.size == (400, 400)
+
+    # 纯色图像回退到几何中心
+    flat = Image.new('RGB', (800, 600), 'red')
+    assert image_processor.find_salient_center(flat, 400, 300) == (400, 300)
+    print(f"✓ 显著区域中心: ({center_x}, {center_y})")
+
+def test_auto_trim():
+    """测试自动去除均匀边框"""
+    print("\n测试4c: 自动去边...")
+    from PIL import ImageDraw
+    img = Image.new('RGB', (3000, 2000), 'white')
+    ImageDraw.Draw(img).rectangle((345, 210, 2611, 1777), fill=(20, 90, 200))
+
+    assert image_processor.find_content_bbox(img) == (345, 210, 2612, 1778)
+    trimmed = image_processor.auto_trim(img, padding=5)
+    assert trimmed.size == (2277, 1578)
+
+    # 远离主体的小标记远超容差，不能在缩小图中被平均掉
+    marked = Image.new('RGB', (4000, 4000), 'white')
+    marked.paste((200, 200, 200), (3001, 3001, 3003, 3003))
+    assert image_processor.find_content_bbox(marked, tolerance=10) == (3001, 3001, 3003, 3003)
+    ImageDraw.Draw(marked).rectangle((400, 500, 1999, 2199), fill=(20, 90, 200))
+    assert image_processor.find_content_bbox(marked, tolerance=10) == (400, 500, 3003, 3003)
+
+    # 没有边框时返回原图
+    flat = Image.new('RGB', (800, 600), 'red')
+    assert image_processor.auto_trim(flat) is flat
+    print(f"✓ 去边后尺寸: {trimmed.size}")
+
+def test_opaque_alpha():
+    """测试完全不透明RGBA图像的快速路径"""
+    print("\n测试4d: 不透明透明通道...")
+    opaque = Image.new('RGBA', (400, 300), (10, 20, 30, 255))
+    assert image_processor.has_opaque_alpha(opaque)
+    assert image_processor.resize_with_pad(opaque, 200, 200).mode == 'RGB'
+    assert image_processor.resize_with_crop(opaque, 200, 200).mode == 'RGB'
+
+    transparent = Image.new('RGBA', (400, 300), (10, 20, 30, 0))
+    assert not image_processor.has_opaque_alpha(transparent)
+    assert image_processor.normalize_mode(transparent) is transparent
+    assert image_processor.resize_with_pad(transparent, 200, 200).mode == 'RGBA'
+
+    # 检查过的图像被原地编辑或派生出新图像后，不会沿用之前的结论
+    edited = opaque.copy()
+    edited.paste((0, 0, 0, 0), (0, 0, 10, 10))
+    assert not image_processor.has_opaque_alpha(edited)
+    assert image_processor.normalize_mode(edited) is edited
+    opaque.putalpha(128)
+    assert not image_processor.has_opaque_alpha(opaque.crop((0, 0, 50, 50)))
+    print("✓ 不透明RGBA按RGB处理，透明图像保持RGBA")
+
+def test_transparent_resize():
+    """测试透明图像缩放时边缘不混入透明像素的颜色"""
+    print("\n测试4e: 透明图像缩放...")
+    # 透明的绿色背景上一个红色方块
+    cutout = Image.new('RGBA', (300, 300), (0, 255, 0, 0))
+    cutout.paste((255, 0, 0, 255), (75, 75, 225, 225))
+    palette = cutout.convert('RGB').quantize(4)
+    palette.info['transparency'] = palette.getpixel((0, 0))
+
+    for source in (cutout, cutout.convert('PA'), palette):
+        padded = image_processor.resize_with_pad(source, 97, 61)
+        pixels = np.asarray(padded).astype(int)
+        assert (pixels[..., 3] == 255).all()                   # 白色填充完全不透明
+        assert (abs(pixels[..., 1] - pixels[..., 2]) <= 1).all()   # 只有红白混合，没有绿色
+
+        clear = image_processor.resize_with_pad(source, 97, 61, (0, 0, 0, 0))
+        assert clear.getpixel((0, 0))[3] == 0                  # 保留透明背景
+    print("✓ 预乘透明度缩放，边缘无杂色")
+
 def test_compress(img):
     """测试压缩"""
     print("\n测试5: 图像压缩...")
+    before = img.tobytes()
     compressed, actual_size = image_processor.compress_to_size(img, 50, 'JPEG')
     assert actual_size <= 60  # 允许一定误差
+    assert img.tobytes() == before  # 不复制输入，也不修改输入
     print(f"✓ 目标50KB, 实际: {actual_size:.2f}KB")
 
+def test_compress_progress(img):
+    """测试压缩进度、取消与提前接受"""
+    print("\n测试5b: 压缩进度与取消...")
+    events = []
+    _, actual_size = image_processor.compress_to_size(
+        img, 50, 'JPEG', progress_callback=lambda *args: events.append(args)
+    )
+    assert [e[0] for e in events] == list(range(1, len(events) + 1))
+    assert events[-1][3] is not None and events[-1][3] <= 50
+
+    # 请求接受：得到第一个满足目标的结果后立即返回
+    token = CancelToken()
+    token.accept()
+    events.clear()
+    _, accepted_size = image_processor.compress_to_size(
+        img, 50, 'JPEG', progress_callback=lambda *args: events.append(args), cancel_token=token
+    )
+    assert len(events) == 1 and accepted_size <= 50
+
+    # 请求取消：抛出 OperationCancelled
+    token = CancelToken()
+    token.cancel()
+    try:
+        image_processor.compress_to_size(img, 50, 'JPEG', cancel_token=token)
+        assert False, "应当抛出 OperationCancelled"
+    except OperationCancelled:
+        pass
+    print(f"✓ 共 {len(events)} 次试编码即接受, 取消正常")
+
 def test_coord_conversion():
     """测试坐标转换"""
     print("\n测试6: 坐标转换...")
@@ -68,6 +184,917 @@ def test_coord_conversion():
     assert canvas_x == 100 and canvas_y == 100
     print(f"✓ 原图->Canvas: (100,100) -> ({canvas_x},{canvas_y})")
 
+class FakeRoot:
+    """模拟 Tk 根窗口的 after 调度，便于在无显示环境下测试"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.errors = []
+
+    def after(self, ms, func):
+        self.callbacks.append(func)
+
+    def report_callback_exception(self, exc, val, tb):
+        self.errors.append(val)
+
+    def run_until_idle(self, executor):
+        import time
+        while executor.busy or self.callbacks:
+            if self.callbacks:
+                self.callbacks.pop(0)()
+            time.sleep(0.01)
+
+
+def test_task_executor(img):
+    """测试后台任务执行器"""
+    print("\n测试7: 后台任务执行器...")
+    import threading
+    root = FakeRoot()
+    executor = TaskExecutor(root)
+    results = []
+
+    # 正常完成：回调在调用 poll 的线程中执行
+    executor.submit(
+        'compress', lambda cancel_token: image_processor.compress_to_size(img, 50, 'JPEG'),
+        on_success=lambda r: results.append(('ok', threading.current_thread().name, r[1])),
+        on_finally=lambda: results.append('finally')
+    )
+    root.run_until_idle(executor)
+    assert results[0][0] == 'ok' and results[0][1] == threading.current_thread().name
+    assert results[-1] == 'finally'
+
+    # 取消：工作函数在检查点中止，结果被丢弃
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(cancel_token):
+        started.set()
+        release.wait(5)
+        cancel_token.raise_if_cancelled()
+        return 'done'
+
+    results.clear()
+    task = executor.submit('slow', slow, on_success=results.append, on_cancel=lambda: results.append('cancelled'))
+    started.wait(5)
+    task.cancel()
+    release.set()
+    root.run_until_idle(executor)
+    assert results == ['cancelled']
+
+    # 回调抛出的异常交给 report_callback_exception，其他任务照常收到回调
+    def broken(result):
+        raise RuntimeError("callback failed")
+
+    results.clear()
+    executor.main_thread_callback(broken)('progress')
+    executor.submit('first', lambda cancel_token: 1, on_success=broken, on_finally=lambda: results.append('finally'))
+    executor.submit('second', lambda cancel_token: 2, on_success=results.append)
+    root.run_until_idle(executor)
+    assert len(root.errors) == 2 and all(str(e) == "callback failed" for e in root.errors)
+    assert sorted(results, key=str) == [2, 'finally'] and not executor.busy
+    executor.shutdown()
+    print("✓ 后台执行与取消正常")
+
+def test_pipeline(img):
+    """测试批处理流水线"""
+    print("\n测试8: 批处理流水线...")
+    import os
+    import tempfile
+    from src.pipeline import Pipeline, run_batch
+
+    recipe = {
+        'steps': [{'op': 'resize', 'width': 200, 'height': 100, 'mode': 'crop'}],
+        'format': 'PNG',
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for i in range(6):
+            path = os.path.join(tmp, f'in_{i}.png')
+            img.save(path)
+            sources.append(path)
+        sources.append(os.path.join(tmp, 'missing.png'))
+
+        results = run_batch(sources, recipe, os.path.join(tmp, 'out'), queue_size=2)
+        assert len(results) == 7
+        assert sum(1 for r in results if r.ok) == 6
+        for result in results:
+            if result.ok:
+                with Image.open(result.output_path) as out:
+                    assert out.size == (200, 100)
+
+        # 只有扩展名不同的输入不会写到同一个输出
+        img.save(os.path.join(tmp, 'in_0.jpg'))
+        results = run_batch([sources[0], os.path.join(tmp, 'in_0.jpg')], recipe, os.path.join(tmp, 'out2'))
+        assert sorted(os.listdir(os.path.join(tmp, 'out2'))) == ['in_0.jpg.png', 'in_0.png']
+
+        # 自定义输出路径重复时后一个条目失败，不覆盖前一个
+        results = run_batch(sources[:2], recipe, None, output_path_func=lambda source: os.path.join(tmp, 'same.png'))
+        assert sorted(r.ok for r in results) == [False, True]
+        assert 'same.png' in str(next(r.error for r in results if not r.ok))
+
+        # 输入线程中的异常在已送入的条目处理完后抛出，不会被当作正常结束
+        def failing_sources():
+            yield sources[0]
+            raise OSError("listing failed")
+        processed = []
+        try:
+            for result in Pipeline(recipe, os.path.join(tmp, 'out3')).run(failing_sources()):
+                processed.append(result)
+            assert False, "应抛出输入线程中的异常"
+        except OSError as e:
+            assert str(e) == "listing failed" and len(processed) == 1 and processed[0].ok
+    print(f"✓ 处理 {len(results)} 个条目, 失败条目单独报告")
+
+def test_folder_watcher(img):
+    """测试监视文件夹的防抖与增量处理"""
+    print("\n测试9: 监视文件夹...")
+    import os
+    import tempfile
+    import time
+    from src.watcher import FolderWatcher
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        watcher = FolderWatcher(
+            tmp, {'format': 'PNG'}, os.path.join(tmp, 'out'),
+            settle_seconds=1.0, on_result=lambda *args: results.append(args)
+        )
+        img.save(os.path.join(tmp, 'a.jpg'))
+        assert watcher.poll_once(now=0) == []       # 刚出现，等待稳定
+        assert len(watcher.poll_once(now=2)) == 1   # 稳定后提交
+        assert watcher.poll_once(now=4) == []       # 不会重复处理
+        watcher.shutdown()
+        assert results[0][2] is None and os.path.exists(os.path.join(tmp, 'out', 'a.jpg.png'))
+
+        # 目录 mtime 没有变化的新建和改写、以及删除后重新出现的同名文件都不会漏掉
+        inbox = os.path.join(tmp, 'inbox')
+        os.mkdir(inbox)
+        results.clear()
+        watcher = FolderWatcher(
+            inbox, {'format': 'PNG'}, os.path.join(tmp, 'out2'), settle_seconds=1.0,
+            full_rescan_seconds=10.0, on_result=lambda *args: results.append(args)
+        )
+
+        def keep_dir_mtime(write):
+            stat = os.stat(inbox)
+            write()
+            os.utime(inbox, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        def wait_results(count):
+            deadline = time.time() + 5
+            while len(results) < count and time.time() < deadline:
+                time.sleep(0.01)
+            assert len(results) == count and all(r[2] is None for r in results)
+
+        a, b = os.path.join(inbox, 'a.png'), os.path.join(inbox, 'b.png')
+        img.save(a)
+        assert watcher.poll_once(now=0) == []
+        keep_dir_mtime(lambda: img.save(b))                     # 同一个 mtime 刻度内新建
+        assert watcher.poll_once(now=0.5) == []
+        assert sorted(watcher.poll_once(now=2)) == [a, b]
+        wait_results(2)
+
+        keep_dir_mtime(lambda: img.rotate(90).save(a))          # 原地改写，目录 mtime 不变
+        assert watcher.poll_once(now=5) == []
+        assert watcher.poll_once(now=10) == []                  # 全量扫描发现变化，等待稳定
+        assert watcher.poll_once(now=12) == [a]
+        wait_results(3)
+
+        with open(b, 'rb') as f:
+            data = f.read()
+        stat = os.stat(b)
+        os.remove(b)
+        assert watcher.poll_once(now=13) == []
+        with open(b, 'wb') as f:
+            f.write(data)
+        os.utime(b, ns=(stat.st_atime_ns, stat.st_mtime_ns))   # 大小和修改时间都与处理过的相同
+        watcher.poll_once(now=14)
+        assert watcher.poll_once(now=16) == [b]
+        watcher.shutdown()
+        wait_results(4)
+    print("✓ 新文件稳定后处理一次，改写和重新出现的文件也会处理")
+
+def test_resumable_batch(img):
+    """测试可断点续跑的批处理清单"""
+    print("\n测试10: 断点续跑清单...")
+    import os
+    import tempfile
+    from src.manifest import run_resumable_batch, JobManifest
+
+    recipe = {'format': 'PNG'}
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for i in range(4):
+            path = os.path.join(tmp, f'in_{i}.png')
+            img.save(path)
+            sources.append(path)
+        bad = os.path.join(tmp, 'bad.png')
+        with open(bad, 'wb') as f:
+            f.write(b'not an image')
+        sources.append(bad)
+        manifest_path = os.path.join(tmp, 'job.sqlite')
+        out = os.path.join(tmp, 'out')
+
+        first = run_resumable_batch(sources, recipe, out, manifest_path)
+        assert first['done'] == 4 and first['failed'] == 1
+
+        # 重复的输入只处理一次
+        dup = run_resumable_batch([sources[0], sources[0]], recipe, out, os.path.join(tmp, 'dup.sqlite'))
+        assert dup == {'skipped': 0, 'done': 1, 'failed': 0, 'cancelled': 0}
+
+        # 重新运行：已完成的跳过，只重试失败的
+        second = run_resumable_batch(sources, recipe, out, manifest_path)
+        assert second['skipped'] == 4 and second['failed'] == 1
+
+        # 配方变化后全部重新处理
+        third = run_resumable_batch(sources, {'format': 'JPEG'}, out, manifest_path)
+        assert third['done'] == 4
+
+        # 分片互不重叠且覆盖全部输入
+        shard_counts = [
+            run_resumable_batch(sources, {'format': 'BMP'}, out, manifest_path, shard_index=i, shard_count=2)
+            for i in range(2)
+        ]
+        assert sum(c['done'] + c['failed'] for c in shard_counts) == 5
+
+        manifest = JobManifest(manifest_path)
+        assert len(manifest.failures()) == 1
+        manifest.close()
+    print(f"✓ 重跑跳过 {second['skipped']} 个已完成条目")
+
+def test_renditions(img):
+    """测试单次解码的多规格输出"""
+    print("\n测试11: 多规格输出...")
+    from src.renditions import generate_renditions, ImagePyramid
+
+    specs = [
+        {'name': 'thumb', 'width': 100, 'height': 100, 'mode': 'crop'},
+        {'name': 'listing', 'width': 300, 'height': 300, 'mode': 'pad', 'format': 'PNG'},
+        {'name': 'zoom', 'width': 1000, 'height': 1000, 'mode': 'fit'},
+    ]
+    renditions = generate_renditions(img, specs)
+    sizes = {name: Image.open(io.BytesIO(data)).size for name, data in renditions.items()}
+    assert sizes == {'thumb': (100, 100), 'listing': (300, 300), 'zoom': (800, 600)}
+
+    # 金字塔选择不小于目标尺寸的最小层级
+    pyramid = ImagePyramid(img)
+    assert pyramid.level_for(0.2, 0.2).size == (200, 150)
+    print(f"✓ 规格尺寸: {sizes}")
+
+def test_srcset(img):
+    """测试响应式图像阶梯导出"""
+    print("\n测试12: 响应式图像导出...")
+    import json
+    import os
+    import tempfile
+    from src.srcset import export_srcset
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = export_srcset(img, tmp, widths=(160, 320, 640, 1920), formats=('JPEG', 'PNG'), basename='red')
+        # 1920 大于源图像宽度，被跳过
+        assert sorted({e['width'] for e in manifest['renditions']}) == [160, 320, 640]
+        assert len(manifest['renditions']) == 6
+        for entry in manifest['renditions']:
+            assert os.path.getsize(os.path.join(tmp, entry['file'])) == entry['bytes']
+            assert entry['height'] == entry['width'] * 3 // 4
+        with open(os.path.join(tmp, 'red.srcset.json'), encoding='utf-8') as f:
+            assert json.load(f)['srcset']['image/jpeg'].startswith('red-160w.jpg 160w')
+    print(f"✓ 生成 {len(manifest['renditions'])} 个阶梯文件和清单")
+
+def test_source_image():
+    """测试只保留编码字节的原图"""
+    print("\n测试13: 原图延迟解码...")
+    import os
+    import tempfile
+    from src.source_image import open_source
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'large.png')
+        Image.new('RGB', (4000, 3000), (30, 60, 90)).save(path)
+        for keep in ('decoded', 'bytes', 'mmap'):
+            source, image = open_source(path, keep)
+            assert source.size == (4000, 3000)
+            assert source.decode() is image          # 尚未编辑时直接复用
+            if keep != 'decoded':
+                assert max(source.proxy.size) == 1600
+                assert source.resident_bytes < 4000 * 3000
+                del image                            # 编辑后原图不再被引用
+                assert source.decode().getpixel((10, 10)) == (30, 60, 90)
+            source.close()
+
+        # 覆盖保存到源文件前复制编码数据，重置仍得到原来的图像
+        source, image = open_source(path, 'mmap')
+        source.detach_file()
+        Image.new('RGB', (10, 10)).save(path)
+        del image
+        assert source.decode().size == (4000, 3000)
+        source.close()
+    print("✓ 预览使用代理图，重置时重新解码")
+
+def test_image_cache():
+    """测试最近打开图像的LRU缓存"""
+    print("\n测试14: 解码图像缓存...")
+    import os
+    import tempfile
+    from src.image_cache import ImageCache
+    from src.source_image import open_source
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(3):
+            path = os.path.join(tmp, f'{i}.png')
+            Image.new('RGB', (1000, 1000), (i * 50, 0, 0)).save(path)
+            paths.append(path)
+
+        # 预算约容纳两张图像（每张按 4/3 帧计 4MB）
+        cache = ImageCache(budget_mb=9)
+        source, first = open_source(paths[0], 'bytes', cache=cache)
+        assert len(cache) == 0                                   # 正在编辑的图像不在缓存中
+        source.close()                                           # 切换离开时放回缓存
+        stat = os.stat(paths[0])
+        with open(paths[0], 'r+b') as f:                         # 大小和修改时间不变，缓存键不变
+            f.write(bytes(stat.st_size))
+        os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        source, again = open_source(paths[0], 'bytes', cache=cache)
+        assert again is first and cache.hits == 1 and len(cache) == 0
+        assert max(source.entry.thumbnail.size) == 256
+
+        # 命中时不读取文件，编辑后重置从条目保存的编码字节重新解码
+        assert source.entry_for(again.rotate(90)) is None
+        del first, again
+        assert source.decode().getpixel((0, 0)) == (0, 0, 0)
+        source.close()
+
+        for path in paths[1:]:
+            open_source(path, cache=cache)[0].close()
+        assert len(cache) == 2 and cache.get(paths[0]) is None   # 最久未使用的被淘汰
+
+        # 文件被修改后旧条目失效
+        stat = os.stat(paths[2])
+        os.utime(paths[2], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert cache.get(paths[2]) is None
+    print(f"✓ 命中 {cache.hits} 次, 缓存 {len(cache)} 张, {cache.nbytes // 1024} KB")
+
+def test_folder_browser():
+    """测试文件夹浏览与预读"""
+    print("\n测试15: 文件夹浏览...")
+    import os
+    import tempfile
+    import time
+    from src.folder_browser import FolderBrowser
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(6):
+            Image.new('RGB', (4000, 3000), (i * 40, 100, 100)).save(os.path.join(tmp, f'IMG_{i}.jpg'))
+        with open(os.path.join(tmp, 'notes.txt'), 'w') as f:
+            f.write('not an image')
+
+        browser = FolderBrowser.for_file(os.path.join(tmp, 'IMG_2.jpg'), prefetch=2)
+        assert len(browser) == 6 and browser.index == 2
+        preview, size = browser.preview()
+        assert size == (4000, 3000) and max(preview.size) == 1600
+
+        # 预读的相邻文件在切换时已经就绪
+        time.sleep(0.5)
+        start = time.perf_counter()
+        assert browser.move(1).endswith('IMG_3.jpg')
+        browser.preview()
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.1, elapsed
+
+        # 跳转后范围外的预读被丢弃
+        browser.move(-3)
+        assert browser.move(-1) is None
+        assert set(browser._futures) == {os.path.join(tmp, f'IMG_{i}.jpg') for i in range(3)}
+        browser.close()
+    print(f"✓ 切换到预读好的图像用时 {elapsed * 1000:.1f} ms")
+
+def test_thumbnail_store():
+    """测试SQLite缩略图存储"""
+    print("\n测试16: 缩略图存储...")
+    import os
+    import tempfile
+    from src.thumbnail_store import ThumbnailStore, embedded_thumbnail
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(5):
+            path = os.path.join(tmp, f'{i}.jpg')
+            Image.new('RGB', (1200, 800), (i * 50, 80, 80)).save(path)
+            paths.append(path)
+        with open(os.path.join(tmp, 'broken.jpg'), 'wb') as f:
+            f.write(b'not a jpeg')
+        paths.append(os.path.join(tmp, 'broken.jpg'))
+
+        # 带内嵌缩略图的 JPEG：IFD0 只有方向标签，IFD1 指向紧随其后的缩略图数据
+        import struct
+        thumb = io.BytesIO()
+        Image.new('RGB', (240, 160), 'blue').save(thumb, 'JPEG')
+        thumb = thumb.getvalue()
+        exif = (b'Exif\x00\x00II*\x00' + struct.pack('<I', 8)
+                + struct.pack('<H', 1) + struct.pack('<HHII', 0x0112, 3, 1, 1) + struct.pack('<I', 26)
+                + struct.pack('<H', 2) + struct.pack('<HHII', 0x0201, 4, 1, 56)
+                + struct.pack('<HHII', 0x0202, 4, 1, len(thumb)) + struct.pack('<I', 0) + thumb)
+        exif_path = os.path.join(tmp, 'exif.jpg')
+        Image.new('RGB', (1200, 800), 'red').save(exif_path, exif=exif)
+        assert embedded_thumbnail(Image.open(exif_path)).getpixel((5, 5))[2] > 200   # 蓝色的内嵌缩略图
+        paths.append(exif_path)
+
+        store = ThumbnailStore(os.path.join(tmp, 'thumbs.sqlite'))
+        results = {}
+        counts = store.populate(paths, workers=2, on_result=lambda p, r: results.setdefault(p, r))
+        assert counts == {'cached': 0, 'created': 6, 'failed': 1}
+        width, height, data = results[paths[0]]
+        assert (width, height) == (1200, 800) and max(Image.open(io.BytesIO(data)).size) == 160
+        assert Image.open(io.BytesIO(results[exif_path][2])).getpixel((5, 5))[2] > 200
+
+        # 第二次直接从存储读取，修改过的文件重新生成
+        stat = os.stat(paths[1])
+        os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        counts = store.populate(paths, processes=False)
+        assert counts == {'cached': 5, 'created': 1, 'failed': 1}
+
+        # 取消后不再生成，尚未开始的批次被丢弃
+        from src.executor import CancelToken
+        token = CancelToken()
+        token.cancel()
+        os.utime(paths[2], ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+        assert store.populate(paths, workers=2, cancel_token=token)['created'] == 0
+        store.close()
+
+        # 默认数据库在用户缓存目录中，与工作目录无关
+        environ = dict(os.environ)
+        cwd = os.getcwd()
+        try:
+            home = os.path.join(tmp, 'home')
+            os.environ.update(HOME=home, XDG_CACHE_HOME=os.path.join(home, '.cache'),
+                              LOCALAPPDATA=os.path.join(home, 'AppData', 'Local'))
+            os.chdir(tmp)
+            store = ThumbnailStore()
+            assert store.db_path.startswith(home) and os.path.exists(store.db_path)
+            assert not os.path.exists(os.path.join(tmp, 'thumbnails.sqlite'))
+            store.close()
+        finally:
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(environ)
+    print(f"✓ 重新打开时缓存 {counts['cached']} 张")
+
+def test_probe():
+    """测试只读文件头的图像探测"""
+    print("\n测试17: 文件头探测...")
+    import os
+    import tempfile
+    from src.probe import ProbeIndex, oriented_size, probe, sniff_format
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, mode, kwargs in [('a.jpg', 'RGB', {}), ('b.png', 'RGBA', {}), ('c.gif', 'P', {}),
+                                   ('d.bmp', 'RGB', {}), ('e.webp', 'RGBA', {}),
+                                   ('f.webp', 'RGB', {'lossless': True}), ('g.tif', 'L', {})]:
+            path = os.path.join(tmp, name)
+            Image.new(mode, (321, 123)).save(path, **kwargs)
+            paths.append(path)
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        rotated = os.path.join(tmp, 'rotated.jpg')
+        Image.new('RGB', (321, 123)).save(rotated, exif=exif)
+        paths.append(rotated)
+
+        for path in paths:
+            info = probe(path)
+            with Image.open(path) as image:
+                assert info['format'] == image.format and info['mode'] == image.mode, (path, info)
+            assert (info['width'], info['height']) == (321, 123), (path, info)
+        assert probe(rotated)['orientation'] == 6 and oriented_size(probe(rotated)) == (123, 321)
+        assert sniff_format(b'not an image') is None
+
+        # 索引：第二次扫描直接读取，修改过的文件重新探测，无法识别的文件报告错误
+        with open(os.path.join(tmp, 'broken.jpg'), 'wb') as f:
+            f.write(b'not a jpeg')
+        paths.append(os.path.join(tmp, 'broken.jpg'))
+        index = ProbeIndex(os.path.join(tmp, 'probe.sqlite'))
+        results, errors = index.probe_many(paths)
+        assert len(results) == 8 and list(errors) == [paths[-1]]
+        Image.new('RGB', (50, 60)).save(paths[0])
+        stat = os.stat(paths[0])
+        os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        results, errors = index.probe_many(paths)
+        assert (results[paths[0]]['width'], results[paths[0]]['height']) == (50, 60)
+        assert results[rotated]['orientation'] == 6
+        index.close()
+    print(f"✓ 探测 {len(results)} 个文件")
+
+def test_file_pool(img):
+    """测试读入缓冲区的加载器和文件数上限"""
+    print("\n测试18: 文件句柄管理...")
+    import os
+    import tempfile
+    from src.loader import FilePool, load_image
+    from src.pipeline import run_batch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for i in range(20):
+            path = os.path.join(tmp, f'in_{i}.png')
+            img.save(path)
+            sources.append(path)
+
+        # 返回的图像尚未解码，但不再占用文件描述符
+        image = load_image(sources[0])
+        assert isinstance(image.fp, io.BytesIO)
+        assert image.size == img.size
+
+        pool = FilePool(max_open=2)
+        recipe = {'steps': [{'op': 'resize', 'width': 50, 'height': 50, 'mode': 'crop'}], 'format': 'PNG'}
+        results = run_batch(sources, recipe, os.path.join(tmp, 'out'), file_pool=pool,
+                            workers={'read': 8, 'write': 8})
+        assert all(r.ok for r in results)
+        stats = pool.stats
+        assert stats['open'] == 0 and stats['peak_open'] <= 2 and stats['files'] == 40
+        assert stats['bytes_read'] == sum(os.path.getsize(s) for s in sources)
+        assert stats['bytes_written'] == sum(r.bytes_written for r in results)
+    print(f"✓ 最多同时打开 {stats['peak_open']} 个文件, 等待 {stats['waits']} 次")
+
+def test_archive_batch(img):
+    """测试归档输入输出的批处理"""
+    print("\n测试19: 归档批处理...")
+    import tarfile
+    import zipfile
+    from src.archive import ArchiveWriter, iter_archive, run_archive_batch
+
+    recipe = {'steps': [{'op': 'resize', 'width': 64, 'height': 64, 'mode': 'crop'}], 'format': 'JPEG'}
+    source = io.BytesIO()
+    with zipfile.ZipFile(source, 'w') as archive:
+        for i in range(4):
+            data = io.BytesIO()
+            img.save(data, 'PNG')
+            archive.writestr(f'photos/{i}.png', data.getvalue())
+        archive.writestr('photos/broken.jpg', b'not a jpeg')
+        archive.writestr('readme.txt', b'hello')
+        archive.writestr('__MACOSX/photos/._0.png', b'resource fork')
+    assert [m.name for m in iter_archive(source)] == [f'photos/{i}.png' for i in range(4)] + ['photos/broken.jpg']
+
+    target = io.BytesIO()
+    counts = run_archive_batch(source, target, recipe)
+    assert counts == {'done': 4, 'failed': 1, 'cancelled': 0}
+    with zipfile.ZipFile(target) as archive:
+        infos = archive.infolist()
+        assert sorted(info.filename for info in infos) == [f'photos/{i}.png.jpg' for i in range(4)]
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in infos)
+        assert Image.open(io.BytesIO(archive.read('photos/0.png.jpg'))).size == (64, 64)
+
+    # tar.gz 以流模式读取，输出为 tar
+    source = io.BytesIO()
+    with tarfile.open(fileobj=source, mode='w:gz') as archive:
+        data = io.BytesIO()
+        img.save(data, 'PNG')
+        info = tarfile.TarInfo('a.png')
+        info.size = len(data.getvalue())
+        archive.addfile(info, io.BytesIO(data.getvalue()))
+    source.seek(0)
+    target = io.BytesIO()
+    with ArchiveWriter(target, 'tar') as writer:
+        for member in iter_archive(source):
+            writer.write(member.name, member.take())
+    target.seek(0)
+    with tarfile.open(fileobj=target) as archive:
+        assert archive.getnames() == ['a.png']
+    print(f"✓ 归档中 {counts['done']} 张处理完成, 不解压到磁盘")
+
+def test_pipe_mode(img):
+    """测试标准输入输出管道模式"""
+    print("\n测试20: 管道模式...")
+    from src.pipe import main as pipe_main, read_response, write_frame, STATUS_OK, STATUS_ERROR
+
+    source = io.BytesIO()
+    img.save(source, 'PNG')
+    source = source.getvalue()
+
+    # 单张：操作按命令行顺序执行
+    stdout = io.BytesIO()
+    code = pipe_main(['--crop', '0,0,400,300', '--resize', '100x100', '--mode', 'pad', '--format', 'webp'],
+                     io.BytesIO(source), stdout)
+    assert code == 0
+    with Image.open(io.BytesIO(stdout.getvalue())) as out:
+        assert out.format == 'WEBP' and out.size == (100, 100)
+
+    # 分帧：一个进程处理多张，出错的帧单独报告
+    stdin = io.BytesIO()
+    for data in (source, b'broken', source):
+        write_frame(stdin, data)
+    stdin.seek(0)
+    stdout = io.BytesIO()
+    assert pipe_main(['--framed', '--resize', '64x48'], stdin, stdout) == 1
+    stdout.seek(0)
+    responses = [read_response(stdout) for _ in range(3)]
+    assert [status for status, _ in responses] == [STATUS_OK, STATUS_ERROR, STATUS_OK]
+    assert Image.open(io.BytesIO(responses[2][1])).size == (64, 48)
+    assert stdout.read() == b''
+    print("✓ 分帧模式连续处理 3 帧")
+
+def test_http_service(img):
+    """测试本地 HTTP 服务"""
+    print("\n测试21: HTTP 服务...")
+    import http.client
+    import os
+    import socket
+    from src.service import ImageService
+
+    source = io.BytesIO()
+    img.save(source, 'PNG')
+    source = source.getvalue()
+
+    service = ImageService(port=0, workers=2, queue_size=1)
+    host, port = service.start()
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+
+        def post(path, body=source):
+            conn.request('POST', path, body)
+            response = conn.getresponse()
+            return response.status, response.getheader('Content-Type'), response.read()
+
+        status, content_type, data = post('/center_crop?width=300&height=200')
+        sock = conn.sock
+        assert status == 200 and content_type == 'image/jpeg'
+        assert Image.open(io.BytesIO(data)).size == (300, 200)
+        status, content_type, data = post('/resize?width=120&height=120&mode=pad&format=png')
+        assert status == 200 and content_type == 'image/png' and Image.open(io.BytesIO(data)).size == (120, 120)
+        status, _, data = post('/compress?target_kb=10&format=webp')
+        assert status == 200 and len(data) <= 10 * 1024
+        assert post('/resize?width=120')[0] == 400
+        assert post('/resize?width=120&height=120', b'broken')[0] == 422
+        assert conn.sock is sock   # 同一连接上完成全部请求
+
+        def raw_request(headers):
+            with socket.create_connection((host, port), timeout=10) as raw:
+                raw.sendall(b'POST /compress?target_kb=10 HTTP/1.1\r\nHost: x\r\n' + headers + b'\r\n')
+                return raw.makefile('rb').read()   # 服务端关闭连接后才返回
+
+        # Content-Length 无效时返回 400 并关闭连接（负数不会让服务端一直读到连接结束）
+        assert raw_request(b'Content-Length: abc\r\n').startswith(b'HTTP/1.1 400')
+        assert raw_request(b'Content-Length: -1\r\n').startswith(b'HTTP/1.1 400')
+
+        # 队列已满时不读取请求体，立即拒绝并关闭连接
+        slots = [service._slots.acquire(blocking=False) for _ in range(3)]
+        assert slots == [True, True, True]
+        assert post('/compress?target_kb=10')[0] == 503
+        assert conn.sock is None
+        assert raw_request(b'Content-Length: 50000000\r\n').startswith(b'HTTP/1.1 503')
+        for _ in slots:
+            service._slots.release()
+
+        conn.request('GET', '/metrics')
+        metrics = conn.getresponse().read().decode()
+        assert 'image_service_requests_total{endpoint="resize",status="200"} 1' in metrics
+        assert 'image_service_request_seconds_count{endpoint="center_crop"} 1' in metrics
+        assert 'image_service_rejected_total 2' in metrics
+
+        # 工作进程崩溃后进程池损坏，属于服务端故障，返回 503 而不是 422
+        try:
+            service._pool.submit(os._exit, 1).result()
+        except Exception:
+            pass
+        assert post('/resize?width=120&height=120')[0] == 503
+        conn.close()
+    finally:
+        service.shutdown()
+
+    # 并发连接数达到上限时，新连接收到 503 后被关闭，不会再创建线程
+    service = ImageService(port=0, workers=1, processes=False, max_connections=1)
+    host, port = service.start()
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        conn.request('GET', '/health')
+        assert conn.getresponse().read() == b'{"status": "ok"}'
+        assert raw_request(b'Content-Length: 0\r\n').startswith(b'HTTP/1.1 503')
+        conn.request('GET', '/metrics')
+        assert 'image_service_rejected_connections_total 1' in conn.getresponse().read().decode()
+        conn.close()
+
+        # 其他服务端错误返回 500
+        service._pool.shutdown()
+        assert service.handle('resize', {'width': ['120'], 'height': ['120']}, source)[0] == 500
+    finally:
+        service.shutdown()
+    print("✓ keep-alive 连接上完成 6 个请求, 指标正确")
+
+def test_storage(img):
+    """测试存储后端和基于存储的批处理"""
+    print("\n测试22: 存储后端...")
+    import os
+    import tempfile
+    from src.storage import LocalObjectClient, LocalStorage, MemoryStorage, ObjectStorage, Storage, run_storage_batch
+
+    # 未实现抽象方法的后端不能实例化
+    try:
+        type('PartialStorage', (Storage,), {'read': lambda self, key: b''})()
+        assert False, "应抛出 TypeError"
+    except TypeError:
+        pass
+
+    source = MemoryStorage()
+    target = MemoryStorage()
+    data = io.BytesIO()
+    img.save(data, 'PNG')
+    errors = source.write_many([(f'in/{i}.png', data.getvalue()) for i in range(10)] + [('in/notes.txt', b'x')])
+    assert errors == {}
+    source.write('in/broken.jpg', b'not a jpeg')
+    assert len(source.list('in/')) == 12
+
+    results = list(source.read_many(['in/0.png', 'missing.png']))
+    assert results[0][1] == data.getvalue() and isinstance(results[1][2], KeyError)
+
+    recipe = {'steps': [{'op': 'resize', 'width': 80, 'height': 60, 'mode': 'crop'}], 'format': 'WEBP'}
+    counts = run_storage_batch(source, target, recipe, prefix='in/', output_prefix='out/')
+    assert counts == {'done': 10, 'failed': 1, 'cancelled': 0}
+    assert target.list() == sorted(f'out/{i}.png.webp' for i in range(10))
+    assert target.load_image('out/3.png.webp').size == (80, 60)
+    source.close()
+    target.close()
+
+    # 本地目录：原子写入不留临时文件；S3 兼容接口在本地替身上分页列举
+    with tempfile.TemporaryDirectory() as tmp:
+        local = LocalStorage(tmp)
+        local.save_image(img, 'a/b.jpg')
+        assert os.listdir(os.path.join(tmp, 'a')) == ['b.jpg'] and local.load_image('a/b.jpg').format == 'JPEG'
+        try:
+            local.path('../escape')
+            assert False, "应拒绝超出根目录的键"
+        except ValueError:
+            pass
+        objects = ObjectStorage(LocalObjectClient(tmp, page_size=3), 'bucket', 'jobs/1/')
+        assert objects.write_many((f'{i}.bin', b'x' * i) for i in range(7)) == {}
+        assert objects.list() == sorted(f'{i}.bin' for i in range(7))
+        assert objects.read('6.bin') == b'x' * 6 and not objects.exists('7.bin')
+        objects.close()
+    print(f"✓ 内存存储上处理 {counts['done']} 张")
+
+def test_benchmark():
+    """测试基准脚本和基线比较"""
+    print("\n测试23: 性能基准...")
+    import benchmark
+
+    results = benchmark.run_benchmarks(sizes=(0.05,), modes=('RGB', 'P'), name_filter='compress_to_size/JPEG',
+                                       repeat=1, corpus_dir=None)
+    assert [r['case'] for r in results['results']] == [
+        f'compress_to_size/JPEG/{level}@0.05MP/{mode}/photo' for mode in ('RGB', 'P') for level in ('easy', 'hard')
+    ]
+    assert all(r['encodes'] > 1 for r in results['results'])
+    assert benchmark.compare_results(results, results) == []
+
+    # 基线更快、编码更少时报告回退
+    baseline = {'results': [dict(r, wall_ms=r['wall_ms'] / 2, encodes=r['encodes'] - 1)
+                            for r in results['results']]}
+    regressions = benchmark.compare_results(results, baseline)
+    assert len(regressions) == 8 and {r['metric'] for r in regressions} == {'wall_ms', 'encodes'}
+    print(f"✓ {len(results['results'])} 个用例, 基线比较发现 {len(regressions)} 项回退")
+
+def test_corpus():
+    """测试合成测试图像库"""
+    print("\n测试24: 合成测试图像...")
+    import os
+    import tempfile
+    import corpus
+
+    # 相同种子生成相同像素，不同种子不同
+    first = corpus.generate('photo', 0.1, seed=7)
+    assert first.tobytes() == corpus.generate('photo', 0.1, seed=7).tobytes()
+    assert first.tobytes() != corpus.generate('photo', 0.1, seed=8).tobytes()
+
+    # 内容有代表性：照片和纹理远比纯色难压缩，图形带有半透明
+    sizes = {}
+    for kind in corpus.KINDS:
+        image = corpus.generate(kind, 0.1)
+        assert image.mode == corpus.NATURAL_MODES[kind]
+        sizes[kind] = len(image_processor.encode_image(image, 'JPEG', 85))
+    solid = len(image_processor.encode_image(Image.new('RGB', first.size, 'red'), 'JPEG', 85))
+    assert sizes['photo'] > 5 * solid and sizes['texture'] > sizes['photo']
+    alpha = np.asarray(corpus.generate('graphic', 0.1).getchannel('A'))
+    assert alpha.min() == 0 and ((alpha > 0) & (alpha < 255)).any()
+    for mode in corpus.MODES:
+        assert corpus.generate('screenshot', 0.1, mode).mode == mode
+
+    # 磁盘缓存：第二次读取缓存文件，内容相同
+    with tempfile.TemporaryDirectory() as tmp:
+        library = corpus.Corpus(tmp, seed=3)
+        image = library.get('texture', 0.1)
+        path = library.path('texture', 0.1, 'L')
+        assert os.path.exists(path) and os.listdir(tmp) == [os.path.basename(path)]
+        assert library.get('texture', 0.1).tobytes() == image.tobytes()
+    print(f"✓ 照片 JPEG {sizes['photo'] // 1024} KB, 纯色 {solid // 1024} KB")
+
+def test_instrumentation():
+    """测试性能记录"""
+    print("\n测试25: 性能记录...")
+    import json
+    import os
+    import tempfile
+    import corpus
+    from src import instrumentation
+    from src.app import ImageProcessorApp
+
+    photo = corpus.generate('photo', 0.1)
+    pixels = photo.width * photo.height
+    assert image_processor.compress_to_size.__instrumented__
+    assert ImageProcessorApp.on_compress.__instrumented__
+    original_save = Image.Image.save
+
+    # 默认关闭：不产生记录，也不替换 Pillow 的方法
+    buffer = instrumentation.RingBufferSink(capacity=50)
+    instrumentation.add_sink(buffer)
+    image_processor.compress_to_size(photo, 5, 'JPEG')
+    assert buffer.records() == [] and Image.Image.save is original_save
+    instrumentation.remove_sink(buffer)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, 'ops.jsonl')
+        log = instrumentation.JsonLinesSink(log_path)
+        instrumentation.enable([buffer, log], trace_memory=True)
+        try:
+            # 嵌套调用的编码计入最外层，只产生一条记录
+            result = image_processor.compress_to_size(photo, 5, 'JPEG')
+            (record,) = buffer.records()
+            assert record['name'] == 'image_processor.compress_to_size' and record['depth'] == 0
+            assert record['encodes'] > 1 and record['decodes'] >= 1
+            assert record['input_pixels'] == pixels and record['output_pixels'] == result[0].width * result[0].height
+            assert record['wall_ms'] > 0 and record['peak_bytes'] is not None and record['error'] is None
+
+            # 异常也会记录
+            try:
+                image_processor.load_image(os.path.join(tmp, 'missing.png'))
+                assert False, "应抛出异常"
+            except Exception:
+                assert buffer.last()['name'] == 'image_processor.load_image'
+                assert buffer.last()['error'] == 'Exception'
+
+            # nested=True 时嵌套调用单独记录
+            instrumentation.enable(nested=True)
+            framed = Image.new('RGB', (photo.width + 40, photo.height + 40), 'white')
+            framed.paste(photo, (20, 20))
+            image_processor.auto_trim(framed)
+            names = [(r['name'], r['depth']) for r in buffer.records()[-3:]]
+            assert names == [('image_processor.find_content_bbox', 1), ('image_processor.crop_image', 1),
+                             ('image_processor.auto_trim', 0)]
+            summary = buffer.summary()
+            assert summary['image_processor.compress_to_size']['count'] == 1
+        finally:
+            outputs = instrumentation.disable()
+            log.close()
+        assert outputs == [buffer, log] and Image.Image.save is original_save
+        with open(log_path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert lines == buffer.records()
+
+        # Python 3.8 没有 tracemalloc.reset_peak 时退化为净增量
+        has_reset_peak = instrumentation._HAS_RESET_PEAK
+        instrumentation._HAS_RESET_PEAK = False
+        instrumentation.enable([buffer], trace_memory=True)
+        try:
+            image_processor.resize_image(photo, (100, 75))
+            assert buffer.last()['peak_bytes'] is not None
+        finally:
+            instrumentation.disable()
+            instrumentation._HAS_RESET_PEAK = has_reset_peak
+    print(f"✓ {instrumentation.format_record(record)}")
+
+def test_single_frame():
+    """测试应用默认设置下编辑后只保留一帧完整图像"""
+    print("\n测试26: 默认设置下的内存占用...")
+    import gc
+    import inspect
+    import os
+    import tempfile
+    import weakref
+    from src.app import ImageProcessorApp
+    from src.image_cache import ImageCache
+    from src.source_image import open_source
+
+    defaults = inspect.signature(ImageProcessorApp.__init__).parameters
+    keep, cache_mb = defaults['keep_original'].default, defaults['cache_mb'].default
+    assert cache_mb > 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'large.png')
+        Image.new('RGB', (3000, 2000), (30, 60, 90)).save(path)
+        cache = ImageCache(cache_mb)
+
+        # 与 ImageProcessorApp.load_file 相同的打开方式，然后编辑一次并刷新显示
+        source, current = open_source(path, keep, cache=cache)
+        original = weakref.ref(current)
+        assert source.entry_for(current) is not None
+        current = image_processor.crop_image(current, 0, 0, 2999, 1999)
+        assert source.entry_for(current) is None
+        gc.collect()
+        assert original() is None and len(cache) == 0     # 只剩编辑后的一帧
+
+        # 编辑过的原图已释放，切换离开时没有东西放回缓存；重置时重新解码
+        current = source.decode()
+        assert current.getpixel((0, 0)) == (30, 60, 90)
+        source.close()
+        assert len(cache) == 1
+    print("✓ 编辑后原图只以编码字节保留")
+
 def main():
     print("=" * 50)
     print("图像处理核心功能测试")
@@ -78,8 +1105,33 @@ def main():
         test_fit_to_canvas(img)
         test_crop(img)
         test_center_crop(img)
+        test_auto_center_crop()
+        test_auto_trim()
+        test_opaque_alpha()
+        test_transparent_resize()
         test_compress(img)
+        test_compress_progress(img)
         test_coord_conversion()
+        test_task_executor(img)
+        test_pipeline(img)
+        test_folder_watcher(img)
+        test_resumable_batch(img)
+        test_renditions(img)
+        test_srcset(img)
+        test_source_image()
+        test_image_cache()
+        test_folder_browser()
+        test_thumbnail_store()
+        test_probe()
+        test_file_pool(img)
+        test_archive_batch(img)
+        test_pipe_mode(img)
+        test_http_service(img)
+        test_storage(img)
+        test_benchmark()
+        test_corpus()
+        test_instrumentation()
+        test_single_frame()
 
         print("\n" + "=" * 50)
         print("✓ 所有测试通过！")